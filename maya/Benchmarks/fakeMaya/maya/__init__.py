@@ -0,0 +1,7 @@
+""" Fake Maya
+    Description:
+                 - Headless stand-in for the maya package used by the benchmarks, no Maya or license needed.
+                 - See maya.cmds for the scene model and the latency settings.
+
+    Author: Rahul Nathan
+"""
@@ -0,0 +1,228 @@
+""" Fake maya.api.OpenMaya
+    Description:
+                 - The few OpenMaya 2.0 classes used by the tools, reading the scene of the fake maya.cmds.
+                 - MItMeshPolygon spreads the face centers of a mesh evenly through its bounds, in a fixed order.
+                 - Message callbacks are registered and removed but never fire, like the fake script jobs.
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import itertools
+
+from maya import cmds
+
+_callbackIds = itertools.count(1)
+_callbacks = {}
+
+class MSpace(object):
+    kObject = 2
+    kWorld = 4
+
+class MPoint(object):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+class MDagPath(object):
+    def __init__(self, name):
+        self.name = name
+
+    def fullPathName(self):
+        return self.name
+
+    def partialPathName(self):
+        return self.name
+
+class MObject(object):
+    """ Node of the fake scene, following it through renames by its uuid.
+    """
+    def __init__(self, uuid=None):
+        self._uuid = uuid
+
+    def isNull(self):
+        return self._uuid is None
+
+    def _name(self):
+        return cmds._uuids.get(self._uuid)
+
+class MObjectHandle(object):
+    def __init__(self, node):
+        self._node = node
+
+    def object(self):
+        return self._node
+
+    def isValid(self):
+        return self._node._name() is not None
+
+    def isAlive(self):
+        return self.isValid()
+
+    def hashCode(self):
+        return hash(self._node._uuid)
+
+class MUuid(object):
+    def __init__(self, uuid):
+        self._uuid = uuid
+
+    def asString(self):
+        return self._uuid
+
+class MPlug(object):
+    def __init__(self, node, attribute, index=None):
+        self._node = node
+        self._attribute = attribute
+        self._index = index
+
+    def node(self):
+        return self._node
+
+    def partialName(self, useLongNames=False, **kwargs):
+        return self._attribute if self._index is None else self._attribute + "RGB"[self._index]
+
+    def child(self, index):
+        return MPlug(self._node, self._attribute, index)
+
+    def asDouble(self):
+        value = cmds._nodes[self._node._name()]["attrs"].get(self._attribute, cmds.DEFAULT_ATTRIBUTES.get(self._attribute, 0.0))
+        if isinstance(value, (list, tuple)):
+            if self._index is None:
+                raise RuntimeError("(kFailure): Unexpected Internal Failure")
+            return float(value[self._index])
+        return float(value)
+
+class MFnDependencyNode(object):
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def typeName(self):
+        return cmds._nodes[self._node._name()]["type"]
+
+    def name(self):
+        return self._node._name()
+
+    def uuid(self):
+        return MUuid(self._node._uuid)
+
+    def hasAttribute(self, attribute):
+        name = self._node._name()
+        return attribute in cmds._nodes[name]["attrs"] or attribute in cmds.NODE_TYPE_ATTRIBUTES.get(self.typeName, ())
+
+    def findPlug(self, attribute, wantNetworkedPlug=False):
+        if not self.hasAttribute(attribute):
+            raise RuntimeError("(kInvalidParameter): Object does not exist")
+        return MPlug(self._node, attribute)
+
+class MFnDagNode(MFnDependencyNode):
+    def fullPathName(self):
+        names = []
+        name = self._node._name()
+        while name is not None:
+            names.insert(0, name)
+            name = cmds._nodes[name]["parent"]
+        return "|" + "|".join(names)
+
+    def partialPathName(self):
+        return self._node._name()
+
+def _addCallback(*args):
+    callbackId = next(_callbackIds)
+    _callbacks[callbackId] = args
+    return callbackId
+
+class MMessage(object):
+    @staticmethod
+    def removeCallback(callbackId):
+        _callbacks.pop(callbackId, None)
+
+    @staticmethod
+    def removeCallbacks(callbackIds):
+        for callbackId in callbackIds:
+            _callbacks.pop(callbackId, None)
+
+class MDGMessage(MMessage):
+    @staticmethod
+    def addNodeAddedCallback(function, nodeType="dependNode", clientData=None):
+        return _addCallback("nodeAdded", function, nodeType)
+
+    @staticmethod
+    def addNodeRemovedCallback(function, nodeType="dependNode", clientData=None):
+        return _addCallback("nodeRemoved", function, nodeType)
+
+class MNodeMessage(MMessage):
+    kAttributeSet = 0x8
+
+    @staticmethod
+    def addNameChangedCallback(node, function, clientData=None):
+        return _addCallback("nameChanged", function, node)
+
+    @staticmethod
+    def addAttributeChangedCallback(node, function, clientData=None):
+        return _addCallback("attributeChanged", function, node)
+
+class MDagMessage(MMessage):
+    @staticmethod
+    def addAllDagChangesCallback(function, clientData=None):
+        return _addCallback("allDagChanges", function)
+
+class MSceneMessage(MMessage):
+    kAfterNew = 3
+    kAfterOpen = 7
+
+    @staticmethod
+    def addCallback(message, function, clientData=None):
+        return _addCallback("scene", function, message)
+
+class MSelectionList(object):
+    def __init__(self):
+        self._items = []
+
+    def add(self, name):
+        node = cmds._node(name)
+        if node is None:
+            raise RuntimeError("(kInvalidParameter): Object does not exist")
+        self._items.append(node)
+        return self
+
+    def length(self):
+        return len(self._items)
+
+    def getDagPath(self, index):
+        return MDagPath(self._items[index])
+
+    def getDependNode(self, index):
+        return MObject(cmds._nodes[self._items[index]]["uuid"])
+
+class MItMeshPolygon(object):
+    """ Iterates the faces of a fake mesh.
+    """
+    def __init__(self, dagPath):
+        cmds._call("MItMeshPolygon")
+        attrs = cmds._nodes[cmds._node(dagPath.fullPathName())]["attrs"]
+        self._count = attrs.get("polygons", 0)
+        self._bounds = attrs.get("bounds") or [0.0] * 6
+        self._index = 0
+
+        # Faces on a cubic lattice filling the bounds
+        self._side = max(1, int(round(self._count ** (1.0 / 3))) + 1)
+
+    def isDone(self):
+        return self._index >= self._count
+
+    def next(self):
+        self._index += 1
+
+    def index(self):
+        return self._index
+
+    def count(self):
+        return self._count
+
+    def center(self, space=MSpace.kObject):
+        side = self._side
+        cell = (self._index % side, self._index // side % side, self._index // (side * side) % side)
+        return MPoint(*[self._bounds[axis] + (cell[axis] + 0.5) / side * (self._bounds[axis + 3] - self._bounds[axis])
+                        for axis in range(3)])
@@ -0,0 +1,882 @@
+""" Fake maya.cmds
+    Description:
+                 - In-process stand-in for maya.cmds, enough to import and run exportGPUCache.py, Lit_af.py and
+                   cameraTools.py headless.
+                 - Keeps a small scene of nodes with a type, a parent and attributes. Node names are unique and
+                   long names are the short names.
+                 - Counts every command call, and adds up a modelled time per call: a fixed latency, plus costs
+                   scaling with the scene size, the imported megabytes and the exported polygons.
+                 - The modelled time is deterministic, so numbers compare run to run. With sleep enabled the
+                   latency is also spent for real, for wall clock measures.
+                 - Settings come from configure() or, for worker processes, from FAKE_MAYA_* environment variables.
+
+    Usage:
+                 import maya.cmds as cmds
+                 cmds.configure(callLatency=0.0001, sleep=False)
+                 cmds.resetStats()
+                 ...
+                 print(cmds.stats())
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import collections
+import itertools
+import json
+import os
+import time
+
+# Cost model of the fake session, in seconds
+DEFAULT_SETTINGS = {
+    "callLatency": 0.0001,                   # Every command
+    "latencyPerNode": 0.000001,              # Commands listing the whole scene, per node
+    "importLatencyPerMB": 0.5,               # Alembic import, per megabyte of the file
+    "exportLatencyPerMillionPolygons": 2.0,  # gpuCache export, per million polygons
+    "polygonsPerMB": 20000,                  # Polygons of an imported alembic, per megabyte
+    "piecesPerFile": 1,                      # Meshes of an imported alembic
+    "materialsPerFile": 1,                   # Shading groups of an imported alembic, shared round robin by the pieces
+    "outputBytesPerPolygon": 1,              # Size of the written gpu caches, per polygon and sample
+    "cacheLoadLatencyPerMB": 0.2,            # gpuCache background reading, per megabyte of cache
+    "sleep": False,                          # Also spend the modelled time for real
+}
+ENVIRONMENT_PREFIX = "FAKE_MAYA_"
+
+# Attribute values returned for attributes never set
+DEFAULT_ATTRIBUTES = {
+    "intermediateObject": 0,
+    "visibility": 1,
+    "worldMatrix[0]": [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0],
+    "cacheFileName": "",
+}
+
+# Attributes of the light shapes with mtoa loaded, answered by attributeQuery even when never set
+_ARNOLD_LIGHT_ATTRIBUTES = ("color", "intensity", "aiExposure", "aiSamples", "aiCastShadows", "aiShadowDensity",
+                            "aiShadowColor", "aiDiffuse", "aiSpecular", "aiSss", "aiIndirect", "aiVolume")
+NODE_TYPE_ATTRIBUTES = {
+    "ambientLight": ("color", "intensity"),
+    "directionalLight": _ARNOLD_LIGHT_ATTRIBUTES,
+    "pointLight": _ARNOLD_LIGHT_ATTRIBUTES,
+    "spotLight": _ARNOLD_LIGHT_ATTRIBUTES + ("aiRoundness",),
+    "areaLight": _ARNOLD_LIGHT_ATTRIBUTES + ("aiSpread", "aiRoundness", "aiSoftEdge"),
+    "aiAreaLight": _ARNOLD_LIGHT_ATTRIBUTES + ("aiSpread", "aiRoundness", "aiSoftEdge"),
+    "aiSkyDomeLight": _ARNOLD_LIGHT_ATTRIBUTES,
+    "aiMeshLight": _ARNOLD_LIGHT_ATTRIBUTES,
+    "aiPhotometricLight": _ARNOLD_LIGHT_ATTRIBUTES,
+}
+
+# Node types created below a transform
+SHAPE_TYPES = ("mesh", "gpuCache", "camera", "imagePlane", "implicitBox", "locator")
+
+# Values returned by the queries of the UI commands, per flag
+UI_QUERY_VALUES = {
+    "value": 1.0,
+    "v1": 1.0,
+    "v2": 1.0,
+    "rgbValue": [1.0, 1.0, 1.0],
+    "text": "",
+    "exists": False,
+    "camera": "persp",
+    "childArray": [],
+}
+
+# Commands doing nothing but creating or editing UI, and commands with no effect on the fake scene
+UI_COMMANDS = (
+    "window", "showWindow", "deleteUI", "columnLayout", "rowColumnLayout", "rowLayout", "frameLayout",
+    "formLayout", "scrollLayout", "tabLayout", "separator", "text", "textField", "button", "shelfButton",
+    "checkBox", "colorSliderGrp", "floatField", "intField", "floatFieldGrp", "intFieldGrp", "floatSliderGrp",
+    "radioButtonGrp", "optionMenu", "menuItem", "textScrollList", "setParent", "evalDeferred",
+    "objectTypeUI", "modelPanel", "getPanel", "progressBar", "treeView",
+)
+NO_EFFECT_COMMANDS = (
+    "loadPlugin", "refresh", "warning", "currentUnit", "playbackOptions", "currentTime", "CreateAreaLight",
+    "lookThru", "viewFit", "polyInfo", "dgdirty", "flushUndo", "setKeyframe", "keyTangent",
+)
+
+#=================================================================#
+# Session
+#=================================================================#
+_settings = dict(DEFAULT_SETTINGS)
+_nodes = collections.OrderedDict()
+_uuids = {}
+_selection = []
+_connections = []
+_uuidCounter = itertools.count(1)
+_counts = collections.Counter()
+_modelSeconds = [0.0]
+_undoChunks = [0]
+_scriptJobs = {}
+_sceneName = [None]
+# The Arnold node types of NODE_TYPE_ATTRIBUTES are always known, as if mtoa was loaded
+_plugins = set(["mtoa"])
+# Written gpu caches and whether their hierarchy was optimized, outliving the scenes
+_cacheFiles = {}
+
+def configure(**settings):
+    """ Changes the cost model of the fake session.
+        Args:
+            settings: Keys of DEFAULT_SETTINGS.
+    """
+    for key in settings:
+        if key not in DEFAULT_SETTINGS:
+            raise KeyError("Unknown fake maya setting %s"%key)
+    _settings.update(settings)
+
+def settings():
+    """ Current cost model of the fake session.
+        Returns:
+            settings (dict): Copy of the settings.
+    """
+    return dict(_settings)
+
+def environment(**settings):
+    """ Environment variables passing settings to fake Maya worker processes.
+        Args:
+            settings: Keys of DEFAULT_SETTINGS, defaults to the current settings.
+        Returns:
+            environment (dict): FAKE_MAYA_* variables.
+    """
+    values = dict(_settings)
+    values.update(settings)
+
+    return dict((ENVIRONMENT_PREFIX + key.upper(), json.dumps(value)) for key, value in values.items())
+
+def _configureFromEnvironment():
+    """ Reads the FAKE_MAYA_* environment variables.
+    """
+    for key in DEFAULT_SETTINGS:
+        value = os.environ.get(ENVIRONMENT_PREFIX + key.upper())
+        if value is not None:
+            _settings[key] = json.loads(value)
+
+def resetStats():
+    """ Clears the call counts and the modelled time.
+    """
+    _counts.clear()
+    _modelSeconds[0] = 0.0
+
+def stats():
+    """ Call counts and modelled time since the last resetStats().
+        Returns:
+            stats (dict): calls (total), counts (per command) and modelSeconds.
+    """
+    return {
+        "calls": sum(_counts.values()),
+        "counts": dict(_counts),
+        "modelSeconds": round(_modelSeconds[0], 6),
+    }
+
+def resetScene():
+    """ Empties the scene, keeping the default cameras.
+    """
+    _nodes.clear()
+    _uuids.clear()
+    del _selection[:]
+    del _connections[:]
+    for camera in ("persp", "top", "front", "side"):
+        _createNode("transform", camera)
+        _createNode("camera", camera + "Shape", camera)
+    _createNode("shadingEngine", "initialShadingGroup")
+
+def _call(command, extraSeconds=0.0):
+    """ Counts a command call and adds its modelled time.
+        Args:
+            command (string): Name of the command.
+            extraSeconds (float): Cost on top of the call latency.
+    """
+    seconds = _settings["callLatency"] + extraSeconds
+    _counts[command] += 1
+    _modelSeconds[0] += seconds
+    if _settings["sleep"] and seconds > 0:
+        time.sleep(seconds)
+
+def _sceneScan():
+    """ Cost of a command walking the whole scene.
+        Returns:
+            seconds (float): Modelled time.
+    """
+    return _settings["latencyPerNode"] * len(_nodes)
+
+#=================================================================#
+# Scene Model
+#=================================================================#
+def _createNode(nodeType, name=None, parent=None, attributes=None):
+    """ Adds a node to the scene.
+        Args:
+            nodeType (string): Type of the node.
+            name (string): Wanted name, made unique.
+            parent (string): Parent node.
+            attributes (dict): Initial attributes.
+        Returns:
+            name (string): Name of the node.
+    """
+    name = _uniqueName(name or nodeType + "1")
+    uuid = "FAKE0000-0000-0000-0000-%012d"%next(_uuidCounter)
+    _nodes[name] = {"type": nodeType, "parent": parent, "attrs": dict(attributes or {}), "uuid": uuid}
+    _uuids[uuid] = name
+
+    return name
+
+def _uniqueName(name):
+    """ Makes a node name unique, like Maya, by incrementing its trailing number.
+        Args:
+            name (string): Wanted name.
+        Returns:
+            name (string): Unused name.
+    """
+    name = name.split("|")[-1]
+    if name not in _nodes:
+        return name
+    base = name.rstrip("0123456789")
+    index = 1
+    while "%s%d"%(base, index) in _nodes:
+        index += 1
+
+    return "%s%d"%(base, index)
+
+def _node(name):
+    """ Finds a node from a name, a long name, a plug or a uuid.
+        Args:
+            name (string): Node name.
+        Returns:
+            name (string): Name of the node in the scene, or None.
+    """
+    if name in _uuids:
+        return _uuids[name]
+    name = name.split(".")[0].split("|")[-1]
+
+    return name if name in _nodes else None
+
+def _flatten(items):
+    """ Flattens the node arguments of a command.
+        Args:
+            items (tuple): Names and lists of names.
+        Returns:
+            names (list): Names.
+    """
+    names = []
+    for item in items:
+        if item is None:
+            continue
+        if isinstance(item, (list, tuple)):
+            names.extend(_flatten(item))
+        else:
+            names.append(item)
+
+    return names
+
+def _childrenMap():
+    """ Children of every node, to answer many queries in one pass over the scene.
+        Returns:
+            children (dict): Names of the children, keyed on the parent name.
+    """
+    children = {}
+    for name, node in _nodes.items():
+        children.setdefault(node["parent"], []).append(name)
+
+    return children
+
+def _descendants(name, children=None):
+    """ All the descendants of a node, depth first.
+        Args:
+            name (string): Node name.
+            children (dict): Map from _childrenMap(), built when not given.
+        Returns:
+            descendants (list): Names of the descendants.
+    """
+    children = _childrenMap() if children is None else children
+    descendants = []
+    for child in children.get(name, []):
+        descendants.append(child)
+        descendants.extend(_descendants(child, children))
+
+    return descendants
+
+def _isShape(name):
+    """ Checks if a node is a shape.
+        Args:
+            name (string): Node name.
+        Returns:
+            isShape (bool): True for the non transform dag nodes.
+    """
+    return _nodes[name]["parent"] is not None and _nodes[name]["type"] not in ("transform", "lodGroup")
+
+def _hierarchy(names):
+    """ Nodes with all their descendants, each once.
+        Args:
+            names (list): Node names.
+        Returns:
+            nodes (list): Names of the nodes and their descendants.
+    """
+    children = _childrenMap()
+    nodes = []
+    seen = set()
+    for name in names:
+        for node in [name] + _descendants(name, children):
+            if node not in seen:
+                seen.add(node)
+                nodes.append(node)
+
+    return nodes
+
+def _polygons(names):
+    """ Polygons of the meshes below nodes.
+        Args:
+            names (list): Node names.
+        Returns:
+            polygons (int): Face count.
+    """
+    return sum(_nodes[node]["attrs"].get("polygons", 0) for node in _hierarchy(names) if _nodes[node]["type"] == "mesh")
+
+def _typeMatches(name, nodeType):
+    """ Checks the type of a node.
+        Args:
+            name (string): Node name.
+            nodeType (string): Type or list of types, None matches everything.
+        Returns:
+            matches (bool): True if the node has one of the types.
+    """
+    if nodeType is None:
+        return True
+    types = nodeType if isinstance(nodeType, (list, tuple)) else [nodeType]
+    if "light" in types and _nodes[name]["type"].lower().endswith("light"):
+        return True
+
+    return _nodes[name]["type"] in types
+
+#=================================================================#
+# Commands
+#=================================================================#
+def file(*args, **kwargs):
+    """ Imports alembics, scaled on the file size, and handles new, open, rename and save.
+        An alembic is one transform and one mesh, or a group of pieces with piecesPerFile.
+        Saved scenes hold their nodes as json after the header line, open reads them back.
+    """
+    global _uuidCounter
+    if kwargs.get("i") or kwargs.get("i_"):
+        filePath = args[0]
+        megabytes = os.path.getsize(filePath) / float(1 << 20)
+        _call("file", _settings["importLatencyPerMB"] * megabytes)
+        return _importAlembic(os.path.splitext(os.path.basename(filePath))[0], megabytes)
+
+    _call("file")
+    if kwargs.get("new"):
+        resetScene()
+        _sceneName[0] = None
+        return None
+    if kwargs.get("open") or kwargs.get("o"):
+        resetScene()
+        with open(args[0]) as sceneFile:
+            sceneFile.readline()
+            nodes = sceneFile.read()
+        if nodes.strip():
+            _nodes.clear()
+            _uuids.clear()
+            _nodes.update(json.loads(nodes))
+            _uuids.update((node["uuid"], name) for name, node in _nodes.items())
+            # New nodes must not reuse the uuids of the opened ones
+            _uuidCounter = itertools.count(max([next(_uuidCounter)] + [int(uuid.split("-")[-1]) + 1 for uuid in _uuids]))
+        _sceneName[0] = args[0]
+        return args[0]
+    if "rename" in kwargs:
+        _sceneName[0] = kwargs["rename"]
+        return kwargs["rename"]
+    if kwargs.get("save"):
+        with open(_sceneName[0], "w") as sceneFile:
+            sceneFile.write("//Maya ASCII fake scene, %d nodes\n"%len(_nodes))
+            json.dump(_nodes, sceneFile)
+        return _sceneName[0]
+    if kwargs.get("query") or kwargs.get("q"):
+        return _sceneName[0] or "untitled"
+
+def _importAlembic(name, megabytes):
+    """ Creates the nodes of an imported alembic.
+        Args:
+            name (string): Name of the alembic file, without extension.
+            megabytes (float): Size of the alembic file.
+        Returns:
+            nodes (list): Created nodes, like file -returnNewNodes.
+    """
+    pieces = max(1, _settings["piecesPerFile"])
+    polygons = max(1, int(megabytes * _settings["polygonsPerMB"]))
+    size = polygons ** 0.5
+
+    materials = ["initialShadingGroup"]
+    if _settings["materialsPerFile"] > 1:
+        materials = [_createNode("shadingEngine", "%s_mat%d_SG"%(name, i)) for i in range(_settings["materialsPerFile"])]
+    nodes = [material for material in materials if material != "initialShadingGroup"]
+
+    root = _createNode("transform", name + "_abc")
+    nodes.append(root)
+    for i in range(pieces):
+        # Pieces side by side along x
+        xMin = -size + 2 * size * i / pieces
+        xMax = -size + 2 * size * (i + 1) / pieces
+        transform = root if pieces == 1 else _createNode("transform", "piece%d"%(i + 1), root)
+        shape = _createNode("mesh", transform + "Shape", transform,
+                            {"polygons": max(1, polygons // pieces), "bounds": [xMin, 0.0, -size, xMax, size, size]})
+        _nodes[materials[i % len(materials)]]["attrs"].setdefault("members", []).append(shape)
+        nodes.extend([shape] if pieces == 1 else [transform, shape])
+
+    return nodes
+
+def ls(*args, **kwargs):
+    """ Lists nodes: the given ones, the selection, the geometry or all the nodes, filtered by type.
+    """
+    _call("ls", _sceneScan())
+    if kwargs.get("nodeTypes"):
+        return sorted(set(list(NODE_TYPE_ATTRIBUTES) + [node["type"] for node in _nodes.values()]))
+    nodeType = kwargs.get("type")
+    if kwargs.get("sl") or kwargs.get("selection"):
+        names = list(_selection)
+    elif args:
+        names = [_node(name) for name in _flatten(args) if _node(name)]
+    else:
+        names = list(_nodes)
+
+    if kwargs.get("dag"):
+        names = _hierarchy(names)
+    if kwargs.get("geometry"):
+        names = [name for name in names if _nodes[name]["type"] in ("mesh", "nurbsSurface", "gpuCache")]
+    if kwargs.get("lights"):
+        names = [name for name in names if _nodes[name]["type"].lower().endswith("light")]
+    if kwargs.get("cameras"):
+        names = [name for name in names if _nodes[name]["type"] == "camera"]
+    if kwargs.get("transforms"):
+        names = [name for name in names if _nodes[name]["type"] == "transform"]
+
+    names = [name for name in names if _typeMatches(name, nodeType)]
+    if kwargs.get("uuid"):
+        return [_nodes[name]["uuid"] for name in names]
+    if kwargs.get("showType") or kwargs.get("st"):
+        return [item for name in names for item in (name, _nodes[name]["type"])]
+
+    return names
+
+def listRelatives(*args, **kwargs):
+    """ Lists the parents, shapes, children or descendants of nodes.
+    """
+    _call("listRelatives")
+    nodeType = kwargs.get("type")
+    children = _childrenMap()
+    related = []
+    for name in [_node(name) for name in _flatten(args) if _node(name)]:
+        if kwargs.get("p") or kwargs.get("parent"):
+            parent = _nodes[name]["parent"]
+            related.extend([parent] if parent else [])
+        elif kwargs.get("ad") or kwargs.get("allDescendents"):
+            related.extend(_descendants(name, children))
+        elif kwargs.get("s") or kwargs.get("shapes"):
+            related.extend([child for child in children.get(name, []) if _isShape(child)])
+        else:
+            related.extend(children.get(name, []))
+
+    if kwargs.get("noIntermediate") or kwargs.get("ni"):
+        related = [name for name in related if not _nodes[name]["attrs"].get("intermediateObject")]
+    related = [name for name in related if _typeMatches(name, nodeType)]
+
+    return related or None
+
+def createNode(nodeType, **kwargs):
+    """ Creates a node, with a parent transform for shapes created without one.
+    """
+    _call("createNode")
+    name = kwargs.get("n") or kwargs.get("name")
+    parent = kwargs.get("p") or kwargs.get("parent")
+    if kwargs.get("s") or kwargs.get("shared"):
+        if name in _nodes:
+            return name
+    if parent is None and (nodeType in SHAPE_TYPES or nodeType.lower().endswith("light")):
+        parent = _createNode("transform", (name or nodeType) + "Transform")
+
+    return _createNode(nodeType, name, _node(parent) if parent else None)
+
+def shadingNode(nodeType, **kwargs):
+    """ Creates a shading node.
+    """
+    _call("shadingNode")
+
+    return _createNode(nodeType, kwargs.get("name") or kwargs.get("n"))
+
+def _lightCommand(nodeType):
+    """ Builds a light creation command.
+        Args:
+            nodeType (string): Type of the light shape.
+        Returns:
+            command (function): Creates the light, returns its shape.
+    """
+    def command(*args, **kwargs):
+        _call(nodeType)
+        transform = _createNode("transform", kwargs.get("name") or kwargs.get("n") or nodeType)
+        return _createNode(nodeType, transform + "Shape", transform)
+    command.__name__ = nodeType
+
+    return command
+
+ambientLight = _lightCommand("ambientLight")
+directionalLight = _lightCommand("directionalLight")
+pointLight = _lightCommand("pointLight")
+spotLight = _lightCommand("spotLight")
+
+def camera(*args, **kwargs):
+    """ Creates a camera, or queries and edits the camera attributes.
+    """
+    _call("camera")
+    if args and (kwargs.get("query") or kwargs.get("q")):
+        cameraQueries = {"horizontalFieldOfView": 54.43, "hfv": 54.43, "verticalFieldOfView": 37.85, "vfv": 37.85,
+                         "nearClipPlane": 0.1, "ncp": 0.1, "farClipPlane": 10000.0, "fcp": 10000.0}
+        if kwargs.get("startupCamera") or kwargs.get("sc"):
+            name = _node(args[0])
+            transform = _nodes[name]["parent"] if _nodes[name]["type"] == "camera" else name
+            return transform in ("persp", "top", "front", "side")
+        for flag, value in cameraQueries.items():
+            if kwargs.get(flag):
+                return value
+        return None
+    if args and (kwargs.get("edit") or kwargs.get("e")):
+        return None
+    transform = _createNode("transform", kwargs.get("name") or "camera1")
+    shape = _createNode("camera", transform + "Shape", transform)
+
+    return [transform, shape]
+
+def imagePlane(*args, **kwargs):
+    """ Creates an image plane, attached to a camera with the camera flag: parented under the camera transform and
+        connected to the imagePlane attribute of the camera shape. Edits and queries do nothing.
+    """
+    _call("imagePlane")
+    if kwargs.get("edit") or kwargs.get("e") or kwargs.get("query") or kwargs.get("q"):
+        return None
+    transform = _createNode("transform", kwargs.get("name") or kwargs.get("n") or "imagePlane1")
+    shape = _createNode("imagePlane", transform + "Shape", transform)
+    cameraName = _node(kwargs.get("camera") or kwargs.get("c") or "")
+    if cameraName:
+        if _nodes[cameraName]["type"] == "camera":
+            cameraShape, cameraName = cameraName, _nodes[cameraName]["parent"]
+        else:
+            cameraShape = next((name for name, node in _nodes.items() if node["parent"] == cameraName and node["type"] == "camera"), None)
+        _nodes[transform]["parent"] = cameraName
+        if cameraShape:
+            index = len([destination for source, destination in _connections if destination.startswith(cameraShape + ".imagePlane[")])
+            _connections.append((shape + ".message", "%s.imagePlane[%d]"%(cameraShape, index)))
+
+    return [transform, shape]
+
+def rename(*args, **kwargs):
+    """ Renames a node, the first one when given a list.
+    """
+    _call("rename")
+    names = _flatten(args[:-1])
+    oldName = _node(names[0])
+    newName = _uniqueName(args[-1])
+    _nodes[newName] = _nodes.pop(oldName)
+    _uuids[_nodes[newName]["uuid"]] = newName
+    for node in _nodes.values():
+        if node["parent"] == oldName:
+            node["parent"] = newName
+    if oldName in _selection:
+        _selection[_selection.index(oldName)] = newName
+
+    return newName
+
+def select(*args, **kwargs):
+    """ Replaces, extends or clears the selection.
+    """
+    _call("select")
+    names = [_node(name) for name in _flatten(args) if _node(name)]
+    if kwargs.get("cl") or kwargs.get("clear"):
+        del _selection[:]
+        return
+    if kwargs.get("add") or kwargs.get("af"):
+        _selection.extend([name for name in names if name not in _selection])
+    elif kwargs.get("d") or kwargs.get("deselect"):
+        _selection[:] = [name for name in _selection if name not in names]
+    else:
+        _selection[:] = names
+
+def delete(*args, **kwargs):
+    """ Deletes nodes with their descendants, the selection without arguments, or faces of meshes.
+    """
+    _call("delete")
+    names = _flatten(args) or list(_selection)
+    for name in [name for name in names if ".f[" in name]:
+        mesh = _node(name)
+        start, end = name.split(".f[")[1].rstrip("]").split(":") if ":" in name else (name.split(".f[")[1].rstrip("]"),) * 2
+        attrs = _nodes[mesh]["attrs"]
+        attrs["polygons"] = max(0, attrs.get("polygons", 0) - (int(end) - int(start) + 1))
+
+    for node in _hierarchy([_node(name) for name in names if ".f[" not in name and _node(name)]):
+        _uuids.pop(_nodes.pop(node)["uuid"], None)
+        if node in _selection:
+            _selection.remove(node)
+
+def duplicate(*args, **kwargs):
+    """ Duplicates nodes with their descendants.
+    """
+    _call("duplicate")
+    duplicates = []
+    for name in [_node(name) for name in _flatten(args) if _node(name)]:
+        copies = {}
+        for node in [name] + _descendants(name):
+            parent = _nodes[node]["parent"]
+            copyParent = copies.get(parent, parent if node != name else _nodes[name]["parent"])
+            copies[node] = _createNode(_nodes[node]["type"], node, copyParent, _nodes[node]["attrs"])
+        duplicates.append(copies[name])
+
+    return duplicates
+
+def sets(*args, **kwargs):
+    """ Creates a set, lists its members, or adds members to it. forceElement takes them out of the other shading groups.
+    """
+    _call("sets")
+    if kwargs.get("q") or kwargs.get("query"):
+        return list(_nodes[_node(args[0])]["attrs"].get("members", [])) or None
+    if kwargs.get("e") or kwargs.get("edit"):
+        target = _node(kwargs.get("forceElement") or kwargs.get("fe") or kwargs.get("add"))
+        added = _flatten(args)
+        if kwargs.get("forceElement") or kwargs.get("fe"):
+            addedNodes = set(_node(member) for member in added)
+            for name, node in _nodes.items():
+                if node["type"] == "shadingEngine" and name != target and node["attrs"].get("members"):
+                    node["attrs"]["members"] = [member for member in node["attrs"]["members"] if _node(member) not in addedNodes]
+        _nodes[target]["attrs"].setdefault("members", []).extend(added)
+        return None
+
+    return _createNode("shadingEngine" if kwargs.get("renderable") else "objectSet", kwargs.get("name") or kwargs.get("n"))
+
+def listConnections(*args, **kwargs):
+    """ Lists the nodes connected to nodes, the sets holding them and the recorded connections.
+    """
+    _call("listConnections", _sceneScan())
+    names = set(_node(name) for name in _flatten(args) if _node(name))
+    connected = []
+    for name, node in _nodes.items():
+        if any(_node(member) in names for member in node["attrs"].get("members", [])):
+            connected.append(name)
+    for source, destination in _connections:
+        if _node(source) in names:
+            connected.append(_node(destination))
+        elif _node(destination) in names:
+            connected.append(_node(source))
+    connected = [name for name in connected if name and _typeMatches(name, kwargs.get("type") or kwargs.get("t"))]
+
+    return connected or None
+
+def connectAttr(source, destination, **kwargs):
+    """ Records a connection.
+    """
+    _call("connectAttr")
+    _connections.append((source, destination))
+
+def disconnectAttr(source, destination, **kwargs):
+    """ Removes a connection.
+    """
+    _call("disconnectAttr")
+    if (source, destination) in _connections:
+        _connections.remove((source, destination))
+
+def setAttr(plug, *values, **kwargs):
+    """ Stores an attribute value.
+    """
+    _call("setAttr")
+    name = _node(plug)
+    if name is None:
+        raise RuntimeError("No object matches name: %s"%plug)
+    attribute = plug.split(".", 1)[1]
+    _nodes[name]["attrs"][attribute] = values[0] if len(values) == 1 else list(values)
+
+def getAttr(plug, **kwargs):
+    """ Reads an attribute value, the default for the ones never set.
+    """
+    _call("getAttr")
+    name = _node(plug)
+    if name is None:
+        raise ValueError("No object matches name: %s"%plug)
+    attribute = plug.split(".", 1)[1]
+    if attribute in _nodes[name]["attrs"]:
+        return _nodes[name]["attrs"][attribute]
+
+    return DEFAULT_ATTRIBUTES.get(attribute, 0.0)
+
+def addAttr(*args, **kwargs):
+    """ Adds an attribute with its default value.
+    """
+    _call("addAttr")
+    name = _node(args[0]) if args else (_selection[-1] if _selection else None)
+    attribute = kwargs.get("longName") or kwargs.get("ln")
+    _nodes[name]["attrs"].setdefault(attribute, kwargs.get("defaultValue", kwargs.get("dv", "" if kwargs.get("dataType") == "string" else 0.0)))
+
+def attributeQuery(attribute, **kwargs):
+    """ Checks if a node has an attribute, set on it or one of the attributes of its type.
+    """
+    _call("attributeQuery")
+    name = _node(kwargs.get("node") or kwargs.get("n"))
+    if name is None:
+        return False
+
+    return attribute in _nodes[name]["attrs"] or attribute in NODE_TYPE_ATTRIBUTES.get(_nodes[name]["type"], ())
+
+def pluginInfo(name, **kwargs):
+    """ Queries if a plugin is loaded, the only query supported.
+    """
+    _call("pluginInfo")
+
+    return name in _plugins
+
+def loadPlugin(name, **kwargs):
+    """ Marks a plugin as loaded.
+    """
+    _call("loadPlugin")
+    _plugins.add(name)
+
+def unloadPlugin(name, **kwargs):
+    """ Marks a plugin as unloaded.
+    """
+    _call("unloadPlugin")
+    _plugins.discard(name)
+
+def objExists(name):
+    """ Checks if a node exists.
+    """
+    _call("objExists")
+
+    return _node(name) is not None
+
+def nodeType(name, **kwargs):
+    """ Type of a node.
+    """
+    _call("nodeType")
+
+    return _nodes[_node(name)]["type"]
+
+def exactWorldBoundingBox(*args, **kwargs):
+    """ Union of the bounds of the meshes below the nodes.
+    """
+    _call("exactWorldBoundingBox")
+    bounds = None
+    for node in _hierarchy([_node(name) for name in _flatten(args) if _node(name)]):
+        nodeBounds = _nodes[node]["attrs"].get("bounds")
+        if nodeBounds is None:
+            continue
+        if bounds is None:
+            bounds = list(nodeBounds)
+        else:
+            bounds = [min(bounds[i], nodeBounds[i]) for i in range(3)] + [max(bounds[i + 3], nodeBounds[i + 3]) for i in range(3)]
+
+    return bounds or [0.0] * 6
+
+def polyEvaluate(*args, **kwargs):
+    """ Face count of the meshes below the nodes.
+    """
+    _call("polyEvaluate")
+
+    return _polygons([_node(name) for name in _flatten(args) if _node(name)])
+
+def polyReduce(*args, **kwargs):
+    """ Removes a percentage of the faces of a mesh.
+    """
+    _call("polyReduce")
+    percentage = kwargs.get("percentage", kwargs.get("p", 50))
+    for name in [_node(name) for name in _flatten(args) if _node(name)]:
+        attrs = _nodes[name]["attrs"]
+        attrs["polygons"] = int(attrs.get("polygons", 0) * (100 - percentage) / 100.0)
+
+def gpuCache(*args, **kwargs):
+    """ Writes a gpu cache sized on the polygons of the nodes, the number of samples and the output flags.
+        Without UVs a cache is 30% smaller, with the hdf format 40% larger. Optimizing the hierarchy
+        costs 30% more at export and makes the cache 40% faster to load.
+        waitForBackgroundReading models the loading of the caches of all the gpuCache nodes.
+    """
+    if kwargs.get("waitForBackgroundReading"):
+        return _loadCaches()
+    polygons = _polygons([_node(name) for name in _flatten(args) if _node(name)])
+    startTime = kwargs.get("startTime", kwargs.get("st", 1))
+    endTime = kwargs.get("endTime", kwargs.get("et", startTime))
+    evaluations = (endTime - startTime) / kwargs.get("simulationRate", kwargs.get("sr", 1.0))
+    samples = int(evaluations / kwargs.get("sampleMultiplier", kwargs.get("smr", 1)) + 1e-6) + 1
+    optimize = kwargs.get("optimize", kwargs.get("o", False))
+    _call("gpuCache", _settings["exportLatencyPerMillionPolygons"] * polygons * samples / 1e6 * (1.3 if optimize else 1.0))
+    if "directory" not in kwargs:
+        return None
+    size = polygons * samples * _settings["outputBytesPerPolygon"]
+    if not kwargs.get("writeUVs", kwargs.get("wuv", True)):
+        size *= 0.7
+    if kwargs.get("dataFormat", kwargs.get("df", "ogawa")) == "hdf":
+        size *= 1.4
+    cachePath = os.path.join(kwargs["directory"], kwargs["fileName"] + ".abc")
+    with open(cachePath, "wb") as cacheFile:
+        cacheFile.truncate(max(1, int(size)))
+    _cacheFiles[os.path.abspath(cachePath)] = optimize
+
+    return [cachePath]
+
+def _loadCaches():
+    """ Models the reading of the caches set on the gpuCache nodes of the scene.
+    """
+    seconds = 0.0
+    for name, node in _nodes.items():
+        cachePath = node["attrs"].get("cacheFileName") if node["type"] == "gpuCache" else None
+        if cachePath and os.path.isfile(cachePath):
+            speedup = 0.6 if _cacheFiles.get(os.path.abspath(cachePath)) else 1.0
+            seconds += _settings["cacheLoadLatencyPerMB"] * os.path.getsize(cachePath) / float(1 << 20) * speedup
+    _call("gpuCache", seconds)
+
+def undoInfo(*args, **kwargs):
+    """ Tracks the open undo chunks.
+    """
+    _call("undoInfo")
+    if kwargs.get("openChunk"):
+        _undoChunks[0] += 1
+    if kwargs.get("closeChunk"):
+        _undoChunks[0] -= 1
+    if kwargs.get("query") or kwargs.get("q"):
+        return True
+
+def scriptJob(*args, **kwargs):
+    """ Registers, checks and kills script jobs, which never fire in the fake session.
+    """
+    _call("scriptJob")
+    if "exists" in kwargs:
+        return kwargs["exists"] in _scriptJobs
+    if "kill" in kwargs:
+        _scriptJobs.pop(kwargs["kill"], None)
+        return None
+    jobId = len(_scriptJobs) + 1
+    _scriptJobs[jobId] = kwargs
+
+    return jobId
+
+def error(message):
+    """ Raises like cmds.error.
+    """
+    _call("error")
+    raise RuntimeError(message)
+
+def _uiCommand(name):
+    """ Builds a UI command, answering queries from UI_QUERY_VALUES.
+        Args:
+            name (string): Name of the command.
+        Returns:
+            command (function): The fake command.
+    """
+    def command(*args, **kwargs):
+        _call(name)
+        if kwargs.get("query") or kwargs.get("q"):
+            for flag, value in UI_QUERY_VALUES.items():
+                if kwargs.get(flag):
+                    return value
+            return None
+        if kwargs.get("exists") or kwargs.get("ex"):
+            return False
+        if kwargs.get("edit") or kwargs.get("e"):
+            return None
+        return "%s%d"%(name, _counts[name])
+    command.__name__ = name
+
+    return command
+
+for _name in UI_COMMANDS + NO_EFFECT_COMMANDS:
+    globals()[_name] = _uiCommand(_name)
+
+_configureFromEnvironment()
+resetScene()
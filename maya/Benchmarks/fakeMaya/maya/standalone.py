@@ -0,0 +1,21 @@
+""" Fake maya.standalone
+    Description:
+                 - initialize() and uninitialize() only count as calls of the fake maya.cmds.
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import maya.cmds as cmds
+
+def initialize(name="python"):
+    """ Pretends to start a Maya session.
+        Args:
+            name (string): Name of the application, ignored.
+    """
+    cmds._call("standalone.initialize")
+
+def uninitialize():
+    """ Pretends to end the Maya session.
+    """
+    cmds._call("standalone.uninitialize")
@@ -0,0 +1,444 @@
+""" Run Benchmarks
+    Description:
+                 - Headless benchmarks of exportGPUCache.py, Lit_af.py and cameraTools.py, run against the fake
+                   maya package of fakeMaya, without Maya or a license.
+                 - conversion: throughput of exportImportGPUCache against the number of alembic files.
+                 - pieces: conversion of one alembic against its number of pieces, per shading mode.
+                 - frames: export of one animated alembic against its number of frames, over the whole range,
+                   decimated, and as the slowest chunk of a split range, the time of a run with a worker per chunk.
+                 - lights: Lit_af attribute functions against the number of selected lights.
+                 - cameras: cameraTools attribute functions against the number of selected cameras and imagePlanes.
+                 - Each case records the wall time (best of --repeat), the modelled Maya time and the cmds call count
+                   per command. The modelled time and the call counts do not depend on the machine, they are the
+                   numbers to compare between runs.
+
+    Usage:
+                 python runBenchmarks.py [--suite conversion|pieces|frames|lights|cameras] [--quick] [--repeat N]
+                                         [--latency SECONDS] [--sleep] [--output FILE] [--compare FILE]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+FAKE_MAYA_DIRECTORY = os.path.join(BENCHMARK_DIRECTORY, "fakeMaya")
+TOOL_DIRECTORIES = [os.path.join(os.path.dirname(BENCHMARK_DIRECTORY), name)
+                    for name in ("ExportGPUCache", "LIT_AF", "CameraTools")]
+
+# The fake maya goes first, also for the worker processes started by the tools
+sys.path[:0] = [FAKE_MAYA_DIRECTORY] + TOOL_DIRECTORIES
+os.environ["PYTHONPATH"] = os.pathsep.join([FAKE_MAYA_DIRECTORY] + [path for path in [os.environ.get("PYTHONPATH")] if path])
+
+import maya.cmds as cmds
+
+SIZES = {
+    "conversion": [10, 50, 200],
+    "pieces": [10, 100, 1000],
+    "frames": [100, 500, 2000],
+    "lights": [10, 100, 1000],
+    "cameras": [10, 100, 1000],
+}
+QUICK_SIZES = {
+    "conversion": [10],
+    "pieces": [10, 100],
+    "frames": [100],
+    "lights": [10, 100],
+    "cameras": [10, 100],
+}
+ALEMBIC_MB = 4
+CHUNK_FRAMES = 250
+
+#=================================================================#
+# Measures
+#=================================================================#
+class Quiet(object):
+    """ Silences the prints of the tools.
+    """
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+def measure(suite, operation, size, setup, run, repeat=3):
+    """ Runs one benchmark case.
+        The scene is rebuilt before every repeat, only run() is measured.
+        Args:
+            suite (string): Name of the suite.
+            operation (string): Name of the measured operation.
+            size (int): Number of files, lights or cameras of the case.
+            setup (function): Builds the scene, returns the argument of run().
+            run (function): The measured operation.
+            repeat (int): Number of runs, the best wall time is kept.
+        Returns:
+            case (dict): Wall seconds, modelled seconds, call count and calls per command.
+    """
+    wallTimes = []
+    for i in range(repeat):
+        cmds.resetScene()
+        with Quiet():
+            context = setup()
+            cmds.resetStats()
+            startTime = time.time()
+            run(context)
+            wallTimes.append(time.time() - startTime)
+        stats = cmds.stats()
+
+    case = {
+        "suite": suite,
+        "operation": operation,
+        "size": size,
+        "wallSeconds": round(min(wallTimes), 6),
+        "modelSeconds": stats["modelSeconds"],
+        "calls": stats["calls"],
+        "counts": stats["counts"],
+    }
+    print("  %-10s %-22s %6d  %10.4fs wall  %10.4fs model  %8d calls"%(
+        suite, operation, size, case["wallSeconds"], case["modelSeconds"], case["calls"]))
+
+    return case
+
+#=================================================================#
+# Suites
+#=================================================================#
+def conversionSuite(sizes, repeat):
+    """ Converts directories of 4MB alembic files, with the Maya assembly and with the fast assembly.
+        Args:
+            sizes (list): Numbers of alembic files.
+            repeat (int): Number of runs per case.
+        Returns:
+            cases (list): Benchmark cases.
+    """
+    import exportGPUCache
+
+    cases = []
+    for size in sizes:
+        directoryPath = tempfile.mkdtemp(prefix="gpuCacheBenchmark")
+        try:
+            for i in range(size):
+                # Sparse files, the fake import only reads the size
+                with open(os.path.join(directoryPath, "asset%04d.abc"%i), "wb") as abcFile:
+                    abcFile.truncate(ALEMBIC_MB << 20)
+
+            for operation, fastAssembly in (("convert", False), ("convertFastAssembly", True)):
+                run = lambda context: exportGPUCache.exportImportGPUCache(directoryPath, force=True, fastAssembly=fastAssembly)
+                cases.append(measure("conversion", operation, size, lambda: None, run, repeat))
+        finally:
+            shutil.rmtree(directoryPath)
+
+    return cases
+
+def piecesSuite(sizes, repeat):
+    """ Converts one 4MB alembic split in pieces sharing 8 materials, with each shading mode.
+        Args:
+            sizes (list): Numbers of pieces.
+            repeat (int): Number of runs per case.
+        Returns:
+            cases (list): Benchmark cases.
+    """
+    import exportGPUCache
+    import gpuCacheProfiles
+
+    directoryPath = tempfile.mkdtemp(prefix="gpuCacheBenchmark")
+    abcFilePath = os.path.join(directoryPath, "asset.abc")
+    with open(abcFilePath, "wb") as abcFile:
+        abcFile.truncate(ALEMBIC_MB << 20)
+
+    settings = cmds.settings()
+    cases = []
+    try:
+        for size in sizes:
+            cmds.configure(piecesPerFile=size, materialsPerFile=8)
+            for shading in gpuCacheProfiles.SHADING_MODES:
+                options = exportGPUCache.conversionOptions(shading=shading)
+                run = lambda context: exportGPUCache.convertAlembic(abcFilePath, directoryPath, options=options)
+                cases.append(measure("pieces", shading, size, lambda: None, run, repeat))
+    finally:
+        cmds.configure(piecesPerFile=settings["piecesPerFile"], materialsPerFile=settings["materialsPerFile"])
+        shutil.rmtree(directoryPath)
+
+    return cases
+
+def framesSuite(sizes, repeat):
+    """ Exports a 4MB alembic over ranges of frames: every frame, one frame in 4, and the slowest chunk
+        of CHUNK_FRAMES frames, which bounds a chunked run with one worker per chunk.
+        Args:
+            sizes (list): Numbers of frames.
+            repeat (int): Number of runs per case.
+        Returns:
+            cases (list): Benchmark cases.
+    """
+    import exportGPUCache
+    import gpuCacheFrames
+
+    directoryPath = tempfile.mkdtemp(prefix="gpuCacheBenchmark")
+    abcFilePath = os.path.join(directoryPath, "asset.abc")
+    with open(abcFilePath, "wb") as abcFile:
+        abcFile.truncate(ALEMBIC_MB << 20)
+
+    cases = []
+    try:
+        for size in sizes:
+            options = exportGPUCache.conversionOptions(endTime=size, chunkFrames=CHUNK_FRAMES)
+            run = lambda context: exportGPUCache.convertAlembic(abcFilePath, directoryPath, options=options)
+            cases.append(measure("frames", "serial", size, lambda: None, run, repeat))
+
+            decimated = exportGPUCache.conversionOptions(endTime=size, decimate=4)
+            run = lambda context: exportGPUCache.convertAlembic(abcFilePath, directoryPath, options=decimated)
+            cases.append(measure("frames", "decimate4", size, lambda: None, run, repeat))
+
+            chunk = gpuCacheFrames.frameChunks(options)[0]
+            run = lambda context: exportGPUCache.convertAlembic(abcFilePath, directoryPath, options=options, chunk=chunk)
+            cases.append(measure("frames", "slowestChunk", size, lambda: None, run, repeat))
+    finally:
+        shutil.rmtree(directoryPath)
+
+    return cases
+
+def lightsSuite(sizes, repeat):
+    """ Applies the Lit_af attributes to selections of point lights.
+        Args:
+            sizes (list): Numbers of selected lights.
+            repeat (int): Number of runs per case.
+        Returns:
+            cases (list): Benchmark cases.
+    """
+    with Quiet():
+        import Lit_af
+    import litAfCore
+    rules = [
+        {"type": "aiAreaLight", "name": "aiAreaLight*", "set": {"aiSamples": 3}},
+        {"group": "lightRig*", "where": "intensity >= 0", "set": {"intensity": 2.5, "color": [1.0, 0.5, 0.2]}},
+    ]
+
+    def setup(size):
+        lights = [cmds.listRelatives(cmds.pointLight(), parent=True)[0] for i in range(size)]
+        cmds.select(lights)
+
+    def setupTweak(size):
+        # A rig already matching the panel, but for the intensity of one light in ten
+        setup(size)
+        Lit_af.applyAllAttributes(False)
+        for light in cmds.ls(sl=1)[::10]:
+            cmds.setAttr(light + ".intensity", 5.0)
+
+    def setupGroups(size):
+        # Rig groups of a point, an Arnold area and an ambient light, the groups selected
+        groups = []
+        for i in range(max(1, size // 3)):
+            group = cmds.createNode("transform", n="lightRig1")
+            for nodeType in ("pointLight", "aiAreaLight", "ambientLight"):
+                cmds.createNode(nodeType, p=cmds.createNode("transform", n=nodeType + "1", p=group))
+            groups.append(group)
+        cmds.select(groups)
+
+    def setupIndex(size):
+        setupGroups(size)
+        return Lit_af.LightIndex()
+
+    snapshotPath = os.path.join(tempfile.mkdtemp(prefix="litAfBenchmark"), "lightRig.json.gz")
+
+    def setupSnapshot(size):
+        # A saved look, then a variant changing the intensity of one light in three
+        setupGroups(size)
+        Lit_af.saveSnapshot(snapshotPath, Lit_af.captureSnapshot())
+        for light in cmds.ls(type="light", long=True)[::3]:
+            cmds.setAttr(light + ".intensity", 5.0)
+
+    operations = [
+        ("color", setup, lambda context: Lit_af.lightColorAtrribute(Lit_af.lightColor)),
+        ("intensity", setup, lambda context: Lit_af.intensityAttribute(Lit_af.intensityInputField)),
+        ("castShadows", setup, lambda context: Lit_af.castShadowOff(Lit_af.castShadowCheckBox)),
+        ("allAttributes", setup, lambda context: applyAllLightAttributes(Lit_af)),
+        ("applyAll", setup, lambda context: Lit_af.applyAllAttributes(False)),
+        ("applyChanged", setupTweak, lambda context: Lit_af.applyAllAttributes(True)),
+        ("applyAllGroups", setupGroups, lambda context: Lit_af.applyAllAttributes(False)),
+        ("intensityDrag", setup, lambda context: dragLightAttribute(Lit_af)),
+        ("indexBuild", setupGroups, lambda context: Lit_af.LightIndex()),
+        ("indexFind", setupIndex, lambda context: context.find("aiAreaLight", "aiAreaLight*", "lightRig*",
+                                                                 Lit_af.parseRanges("intensity >= 1, aiSamples > 0"))),
+        ("snapshotSave", setupGroups, lambda context: Lit_af.saveSnapshot(snapshotPath, Lit_af.captureSnapshot())),
+        ("snapshotRestore", setupSnapshot, lambda context: Lit_af.restoreSnapshot(snapshotPath)),
+        ("rules", setupGroups, lambda context: litAfCore.applyRules(rules)),
+    ]
+    cases = []
+    try:
+        for size in sizes:
+            for operation, setupCase, run in operations:
+                cases.append(measure("lights", operation, size, lambda: setupCase(size), run, repeat))
+    finally:
+        shutil.rmtree(os.path.dirname(snapshotPath))
+
+    return cases
+
+def applyAllLightAttributes(Lit_af):
+    """ Presses every Apply button of Lit_af, like an artist setting up a light rig.
+        Args:
+            Lit_af (module): The imported Lit_af module.
+    """
+    Lit_af.lightColorAtrribute(Lit_af.lightColor)
+    Lit_af.intensityAttribute(Lit_af.intensityInputField)
+    Lit_af.exposureAttribute(Lit_af.exposureInputField)
+    Lit_af.spreadAttribute(Lit_af.spreadInputField)
+    Lit_af.roundnessAttribute(Lit_af.roundnessInputField)
+    Lit_af.softEdgeAttribute(Lit_af.softEdgeInputField)
+    Lit_af.samplesAttribute(Lit_af.samplesInputField)
+    Lit_af.castShadowOn(Lit_af.castShadowCheckBox)
+    Lit_af.shadowDensityAttribute(Lit_af.shadowDensityInputField)
+    Lit_af.shadowColorAtrribute(Lit_af.shadowColor)
+    Lit_af.diffuseVisibility(Lit_af.diffuseInputField)
+    Lit_af.specularVisibility(Lit_af.specularInputField)
+    Lit_af.sssVisibility(Lit_af.sssInputField)
+    Lit_af.indirectVisibility(Lit_af.indirectInputField)
+    Lit_af.volumeVisibility(Lit_af.volumeInputField)
+
+def dragLightAttribute(Lit_af, moves=60):
+    """ Drags the intensity slider of Lit_af, one second of mouse moves at 60 frames per second, then releases it.
+        Args:
+            Lit_af (module): The imported Lit_af module.
+            moves (int): Number of drag events.
+    """
+    for i in range(moves):
+        Lit_af.dragAttribute("intensity", Lit_af.intensityInputField, "slider")
+        time.sleep(1.0 / 60)
+    Lit_af.endDragAttribute("intensity", Lit_af.intensityInputField, "slider")
+
+def camerasSuite(sizes, repeat):
+    """ Applies the cameraTools attributes to selections of cameras and imagePlanes.
+        Args:
+            sizes (list): Numbers of selected cameras.
+            repeat (int): Number of runs per case.
+        Returns:
+            cases (list): Benchmark cases.
+    """
+    with Quiet():
+        import cameraTools
+    camTools = cameraTools.camTools
+
+    def setupCameras(size):
+        cmds.select([cmds.camera()[0] for i in range(size)])
+
+    def setupImagePlanes(size):
+        cmds.select([cmds.imagePlane(camera=cmds.camera()[0])[0] for i in range(size)])
+
+    def setupScene(size):
+        # Unselected shot cameras with their imagePlanes, the scene jobs would have cleared the targets
+        for i in range(size):
+            cmds.imagePlane(camera=cmds.camera(name="shot%d_cam"%i)[0])
+        cmds.select(clear=True)
+        camTools.clearTargets()
+
+    filmback = [("horizontalFilmAperture", 1.417), ("verticalFilmAperture", 0.945)]
+
+    operations = [
+        ("focalLength", setupCameras, lambda context: camTools.setFieldValue("focalLength", camTools.focalLength)),
+        ("filmGate", setupCameras, lambda context: camTools.setFieldValue("displayFilmGate", None, 1)),
+        ("imagePlaneSize", setupImagePlanes, lambda context: camTools.sizeFunc()),
+        ("imagePlaneViews", setupImagePlanes, lambda context: camTools.allViews()),
+        ("selectImagePlanes", setupImagePlanes, lambda context: camTools.selectImgPlaneFunc()),
+        ("filmbackAll", setupScene, lambda context: camTools.applyAttributes(filmback, "camera", "All Cameras")),
+        ("filmbackMatching", setupScene, lambda context: camTools.applyAttributes(filmback, "camera", "Cameras Matching", "shot1*")),
+        ("imagePlaneDepthAll", setupScene, lambda context: camTools.applyAttributes([("depth", 50.0)], "imagePlane", "All Cameras")),
+    ]
+    cases = []
+    for size in sizes:
+        for operation, setup, run in operations:
+            cases.append(measure("cameras", operation, size, lambda: setup(size), run, repeat))
+
+    return cases
+
+SUITES = [
+    ("conversion", conversionSuite),
+    ("pieces", piecesSuite),
+    ("frames", framesSuite),
+    ("lights", lightsSuite),
+    ("cameras", camerasSuite),
+]
+
+#=================================================================#
+# Results
+#=================================================================#
+def compareResults(baseline, results):
+    """ Prints the change of each case against a baseline run.
+        Args:
+            baseline (dict): Results of a previous run, from --output.
+            results (dict): Results of this run.
+    """
+    baselineCases = dict(((case["suite"], case["operation"], case["size"]), case) for case in baseline["cases"])
+    print("\nCompared to %s"%baseline.get("started"))
+    print("  %-10s %-22s %6s  %16s  %16s  %16s"%("suite", "operation", "size", "wall", "model", "calls"))
+    for case in results["cases"]:
+        previous = baselineCases.get((case["suite"], case["operation"], case["size"]))
+        if previous is None:
+            continue
+        print("  %-10s %-22s %6d  %16s  %16s  %16s"%(
+            case["suite"], case["operation"], case["size"],
+            ratio(previous["wallSeconds"], case["wallSeconds"]),
+            ratio(previous["modelSeconds"], case["modelSeconds"]),
+            ratio(previous["calls"], case["calls"])))
+
+def ratio(previous, current):
+    """ Formats a change, like 120 -> 60 (0.50x).
+        Args:
+            previous (float): Baseline value.
+            current (float): New value.
+        Returns:
+            text (string): Formatted change.
+    """
+    if not previous:
+        return "%g -> %g"%(previous, current)
+
+    return "%.3g -> %.3g (%.2fx)"%(previous, current, current / float(previous))
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the maya tools headless, against a fake maya.")
+    parser.add_argument("--suite", action="append", choices=[name for name, suite in SUITES],
+                        help="Suite to run, can be repeated. All of them by default.")
+    parser.add_argument("--quick", action="store_true", help="Smaller cases only.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the best wall time is kept.")
+    parser.add_argument("--latency", type=float, default=None, help="Modelled seconds of every cmds call.")
+    parser.add_argument("--sleep", action="store_true", help="Also spend the modelled time, for wall clock measures.")
+    parser.add_argument("--output", default=None, help="Json file the results are written to.")
+    parser.add_argument("--compare", default=None, help="Json results of a previous run to compare with.")
+    args = parser.parse_args()
+
+    settings = {"sleep": args.sleep}
+    if args.latency is not None:
+        settings["callLatency"] = args.latency
+    cmds.configure(**settings)
+    os.environ.update(cmds.environment())
+
+    results = {
+        "started": time.time(),
+        "python": platform.python_version(),
+        "settings": cmds.settings(),
+        "cases": [],
+    }
+    sizes = QUICK_SIZES if args.quick else SIZES
+    for name, suite in SUITES:
+        if args.suite and name not in args.suite:
+            continue
+        results["cases"].extend(suite(sizes[name], args.repeat))
+
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            json.dump(results, outputFile, indent=1, sort_keys=True)
+        print("\nResults saved to %s"%args.output)
+
+    if args.compare:
+        with open(args.compare) as baselineFile:
+            compareResults(json.load(baselineFile), results)
@@ -7,9 +7,19 @@
 
 #Import Statements
 import maya.cmds as cmds
+import fnmatch
 import sys
 from functools import partial
 
+# Cameras the attributes are applied to
+TARGET_MODES = ("Selection", "All Cameras", "Cameras Matching")
+
+# Attributes written to the imagePlanes of the targets, the others go to the cameras
+IMAGE_PLANE_ATTRIBUTES = ("alphaGain", "depth", "sizeX", "sizeY", "offsetX", "offsetY", "rotate", "displayOnlyIfCurrent")
+
+# Scene changes which can add cameras or change their names, the resolved targets are found again after them
+TARGET_EVENTS = ("DagObjectCreated", "NameChanged", "SceneOpened", "NewSceneOpened", "Undo", "Redo")
+
 class CameraTools(object):
     """ Methods to create and control the attributes of the camera and imagePlane
     """
@@ -21,9 +31,12 @@ class CameraTools(object):
             cmds.deleteUI(self.camWindow)
             
         self.camWindow = cmds.window("Camera Tools")
-        cmds.window(self.camWindow, edit=True, width=300, height=60, sizeable=False)
-        
+        cmds.window(self.camWindow, edit=True, width=300, height=130, sizeable=False)
+
+        # (kind, mode, pattern) -> (selection, targets), kept between clicks
+        self.targetCache = {}
         self.createLayout()
+        self.watchScene()
    
     #====================================================================#
     # Create UI
@@ -33,9 +46,28 @@ class CameraTools(object):
         """
         mainLayout = cmds.columnLayout(width=300)
         cmds.separator()
+        self.createTargetLayout(mainLayout)
         self.createCameraControlLayout(mainLayout)
         self.imagePlaneControlLayout(mainLayout)
     
+    #----------------------------------------#
+    # Target Layout
+    #----------------------------------------#
+    def createTargetLayout(self, mainLayout):
+        """ Create the layout choosing the cameras the attributes are applied to.
+            Args:
+                mainLayout (cmds.columnLayout): Main Layout of the window.
+        """
+        cmds.frameLayout(width=300, label="Targets", marginWidth=5, parent=mainLayout)
+        cmds.rowColumnLayout(numberOfColumns=2, cw2=[150,140])
+        self.targetMenu = cmds.optionMenu(label="Apply to")
+        for mode in TARGET_MODES:
+            cmds.menuItem(label=mode)
+        self.patternField = cmds.textField(text="*", annotation="Camera name pattern of Cameras Matching, e.g. shot*_cam")
+        cmds.setParent('..')
+        self.targetReport = cmds.text(label="", align="left")
+        cmds.setParent('..')
+
     #----------------------------------------#
     # Camera Control Layout
     #----------------------------------------#   
@@ -59,33 +91,35 @@ class CameraTools(object):
         cmds.rowColumnLayout (numberOfColumns=2)
 
         self.horizAperture = cmds.floatFieldGrp(label="Horizontal Film Aperture", cal=[1, 'left'], cw2=[120,80], v1=1.417, precision=3)
-        HA_button = cmds.button(label="Apply", command='self.setFieldValue("horizontalFilmAperture", self.horizAperture)')
+        HA_button = cmds.button(label="Apply", command=partial(self.applyField, "horizontalFilmAperture", self.horizAperture))
 
         self.vertAperture = cmds.floatFieldGrp(l="Vertical Film Aperture", cal=[1, 'left'], cw2=[120,80], v1=0.945, precision=3)
-        VA_button = cmds.button(label="Apply", command='self.setFieldValue("verticalFilmAperture", self.vertAperture)')
+        VA_button = cmds.button(label="Apply", command=partial(self.applyField, "verticalFilmAperture", self.vertAperture))
 
         self.focalLength = cmds.floatFieldGrp(label="Focal Length", cal=[1, 'left'], cw2=[120,80], v1=35)
-        FL_button = cmds.button(label="Apply", command='self.setFieldValue("focalLength", self.focalLength)')
+        FL_button = cmds.button(label="Apply", command=partial(self.applyField, "focalLength", self.focalLength))
 
         self.nearClip = cmds.floatFieldGrp(label="Near Clip Plane", cal=[1, 'left'], cw2=[120,80], v1=0.1)
-        NC_button = cmds.button(label="Apply", command='self.setFieldValue("nearClipPlane", self.nearClip)')
+        NC_button = cmds.button(label="Apply", command=partial(self.applyField, "nearClipPlane", self.nearClip))
 
         self.farClip = cmds.floatFieldGrp(label="Far Clip Plane", cal=[1, 'left'], cw2=[120,80], v1=100000)
-        FC_button = cmds.button(label="Apply", command='self.setFieldValue("farClipPlane", self.farClip)')
+        FC_button = cmds.button(label="Apply", command=partial(self.applyField, "farClipPlane", self.farClip))
 
         cmds.setParent('..')
+        filmback_button = cmds.button(label="Apply Filmback", width=290, command=self.filmbackFunc,
+                                      annotation="Apply both film apertures to the targets in one step")
 
         cmds.text(label="Display Options:", font="boldLabelFont", align="left")
         cmds.columnLayout()
         self.filmGate = cmds.checkBox(
             label="Display Film Gate", 
-            onc='self.setFieldValue("displayFilmGate", None, 1)', 
-            ofc='self.setFieldValue("displayFilmGate", None, 0)'
+            onc=partial(self.applyValue, "displayFilmGate", 1),
+            ofc=partial(self.applyValue, "displayFilmGate", 0)
         )
         self.resGate = cmds.checkBox(
             label="Display Resolution Gate", 
-            onc='self.setFieldValue("displayResolution", None, 1)', 
-            ofc='self.setFieldValue("displayResolution", None, 0)'
+            onc=partial(self.applyValue, "displayResolution", 1),
+            ofc=partial(self.applyValue, "displayResolution", 0)
         )
         cmds.separator()
         cmds.setParent('..')
@@ -105,11 +139,11 @@ class CameraTools(object):
             collapsable=True, 
             marginWidth=5,
             parent=mainLayout,
-            expandCommand=partial(frameCollapseChanged, str(mainLayout)),
-            collapseCommand=partial(frameCollapseChanged, str(mainLayout))
+            expandCommand=partial(self.frameCollapseChanged, str(mainLayout)),
+            collapseCommand=partial(self.frameCollapseChanged, str(mainLayout))
         )
         cmds.separator(style="none")
-        selectImgPlaneButton = cmds.button(label="Select all imagePlanes", command='self.selectImgPlaneFunc()')
+        selectImgPlaneButton = cmds.button(label="Select all imagePlanes", command=self.selectImgPlaneFunc)
         cmds.text(label="Display:", font="boldLabelFont", align="left")
         cmds.columnLayout()
         ipDisplay = cmds.radioButtonGrp(
@@ -117,32 +151,32 @@ class CameraTools(object):
             l1="Looking through Camera",
             l2="In all views",
             cw2=[150,80],
-            on1='self.lookThrough()',
-            on2='self.allViews()'
+            on1=self.lookThrough,
+            on2=self.allViews
         )
         cmds.separator()
 
         cmds.rowColumnLayout (numberOfColumns=2)
         self.alphaGain = cmds.floatFieldGrp(label="Alpha Gain", cal=[1, 'left'], cw2=[80,80], v1=1, precision=3)
-        AG_button = cmds.button(label="Apply", command='self.setFieldValue("alphaGain", self.alphaGain)')
+        AG_button = cmds.button(label="Apply", command=partial(self.applyField, "alphaGain", self.alphaGain))
         cmds.setParent('..')
         cmds.separator()
 
         cmds.text(label="Placement:", font="boldLabelFont", align="left")
         cmds.rowColumnLayout (numberOfColumns=2)
         self.depth = cmds.floatFieldGrp(label="Depth", cal=[1, 'left'], cw2=[50,80], v1=100, precision=3)
-        depth_button = cmds.button(label="Apply", command='self.setFieldValue("depth", self.depth)')
+        depth_button = cmds.button(label="Apply", command=partial(self.applyField, "depth", self.depth))
         cmds.setParent('..')
 
         cmds.rowColumnLayout (numberOfColumns=2)
         self.size = cmds.floatFieldGrp(label="Size", cal=[1, 'left'], nf=2, cw3=[50,80,80], v1=1.417, v2=0.945, precision=3)
-        size_button = cmds.button(label="Apply", command='self.sizeFunc()')
+        size_button = cmds.button(label="Apply", command=self.sizeFunc)
         self.offset = cmds.floatFieldGrp(label="Offset", cal=[1, 'left'], nf=2, cw3=[50,80,80], v1=0, v2=0, precision=3)
-        offset_button = cmds.button(label="Apply", command='self.offsetFunc()')
+        offset_button = cmds.button(label="Apply", command=self.offsetFunc)
 
         cmds.rowColumnLayout (numberOfColumns=2)
         self.ipRotate = cmds.floatFieldGrp(label="Rotate", cal=[1, 'left'], cw2=[50,80], v1=0, precision=3)
-        rotate_button = cmds.button(label="Apply", command='self.setFieldValue("rotate", self.ipRotate)')
+        rotate_button = cmds.button(label="Apply", command=partial(self.applyField, "rotate", self.ipRotate))
         cmds.setParent('..')
         cmds.separator(style="none")
         cmds.setParent('..')
@@ -165,6 +199,118 @@ class CameraTools(object):
         """
         cmds.showWindow(self.camWindow)
     
+    #====================================================================#
+    # Targets
+    #====================================================================#
+    def watchScene(self):
+        """ Clears the resolved targets after the scene changes, for as long as the window is open.
+        """
+        for event in TARGET_EVENTS:
+            cmds.scriptJob(event=[event, self.clearTargets], parent=self.camWindow)
+
+    def clearTargets(self, *args):
+        """ Forgets the resolved targets, they are found again at the next click.
+        """
+        self.targetCache.clear()
+
+    def targetMode(self):
+        """ Reads the targets chosen in the UI.
+            Returns:
+                mode (string): One of TARGET_MODES.
+                pattern (string): Camera name pattern of "Cameras Matching", None for the other modes.
+        """
+        mode = TARGET_MODES[(cmds.optionMenu(self.targetMenu, query=True, select=True) or 1) - 1]
+        pattern = (cmds.textField(self.patternField, query=True, text=True) or "*") if mode == "Cameras Matching" else None
+
+        return mode, pattern
+
+    def resolveTargets(self, kind, mode=None, pattern=None):
+        """ Finds the camera or imagePlane shapes the attributes are written to, cached between clicks.
+            Args:
+                kind (string): "camera" or "imagePlane".
+                mode (string): One of TARGET_MODES, read from the UI when None.
+                pattern (string): Camera name pattern of "Cameras Matching".
+            Returns:
+                targets (list): Camera or imagePlane shapes.
+        """
+        if mode is None:
+            mode, pattern = self.targetMode()
+        # The selection is part of the key, it changes between clicks far more often than the scene
+        selection = tuple(cmds.ls(sl=True, long=True) or []) if mode == "Selection" else ()
+        key = (kind, mode, pattern)
+        cached = self.targetCache.get(key)
+        if cached is not None and cached[0] == selection:
+            targets = cached[1]
+            # Deleted shapes do not fire any of the TARGET_EVENTS
+            if not targets or len(cmds.ls(targets, long=True) or []) == len(targets):
+                return targets
+
+        targets = self.findTargets(kind, mode, pattern, selection)
+        self.targetCache[key] = (selection, targets)
+
+        return targets
+
+    def findTargets(self, kind, mode, pattern, selection):
+        """ Lists the camera or imagePlane shapes of the targets.
+            Args:
+                kind (string): "camera" or "imagePlane".
+                mode (string): One of TARGET_MODES.
+                pattern (string): Camera name pattern of "Cameras Matching".
+                selection (tuple): Selected nodes, for the "Selection" mode.
+            Returns:
+                targets (list): Camera shapes, or the imagePlanes attached to the cameras.
+        """
+        if mode == "Selection":
+            # The selected shapes, and the shapes under the selected transforms
+            if not selection:
+                return []
+            cameras = cmds.ls(selection, dag=True, type="camera", long=True) or []
+            imagePlanes = [] if kind == "camera" else cmds.ls(selection, dag=True, type="imagePlane", long=True) or []
+        else:
+            cameras = [camera for camera in cmds.ls(type="camera", long=True) or []
+                       if not cmds.camera(camera, query=True, startupCamera=True)]
+            if mode == "Cameras Matching" and cameras:
+                # Matched on the camera transforms, as named in the outliner
+                transforms = [transform for transform in cmds.listRelatives(cameras, parent=True, fullPath=True) or []
+                              if fnmatch.fnmatchcase(transform.split("|")[-1], pattern)]
+                cameras = (cmds.listRelatives(transforms, shapes=True, type="camera", fullPath=True) or []) if transforms else []
+            imagePlanes = []
+        if kind == "camera":
+            return cameras
+
+        # ImagePlanes are connected to the imagePlane attribute of their camera, wherever they sit in the outliner
+        connected = (cmds.listConnections(cameras, source=True, destination=False, type="imagePlane", shapes=True) or []) if cameras else []
+        if connected:
+            imagePlanes += cmds.ls(connected, long=True) or []
+
+        return sorted(set(imagePlanes))
+
+    def applyAttributes(self, values, kind="camera", mode=None, pattern=None):
+        """ Writes attribute values to the targets, in one undo step with the viewport refresh suspended.
+            Args:
+                values (list): (attribute, value) pairs.
+                kind (string): "camera" or "imagePlane".
+                mode (string): One of TARGET_MODES, read from the UI when None.
+                pattern (string): Camera name pattern of "Cameras Matching".
+            Returns:
+                count (int): Number of shapes written.
+        """
+        targets = self.resolveTargets(kind, mode, pattern)
+        cmds.undoInfo(openChunk=True, chunkName="CameraTools")
+        cmds.refresh(suspend=True)
+        try:
+            for each in targets:
+                for attribute, value in values:
+                    cmds.setAttr('{0}.{1}'.format(each, attribute), value)
+        finally:
+            cmds.refresh(suspend=False)
+            cmds.undoInfo(closeChunk=True)
+
+        cmds.text(self.targetReport, edit=True, label="%s set on %d %s" % (
+            ", ".join(attribute for attribute, value in values), len(targets), "imagePlanes" if kind == "imagePlane" else "cameras"))
+
+        return len(targets)
+
     #====================================================================#
     # Utility Functions
     #====================================================================#
@@ -179,7 +325,7 @@ class CameraTools(object):
         return self.shapeSel
 
     def setFieldValue(self, attributeType, attributeName=None, attributeValue=None):
-        """ Set the attribute value based on the field value from the UI.
+        """ Set the attribute value based on the field value from the UI, on the cameras or imagePlanes of the targets.
             Args:
                 attributeType (string): Type of attribute.
                 attributeName (string): Name of the attribute in the UI.
@@ -188,52 +334,71 @@ class CameraTools(object):
         if attributeValue == None:
             attributeValue = cmds.floatFieldGrp(attributeName, v1=True, q=True)
 
-        self.shapeSel = self.findShapeSel()
-        for each in self.shapeSel:
-               cmds.setAttr('{0}.{1}'.format(each, attributeType), attributeValue)
+        kind = "imagePlane" if attributeType in IMAGE_PLANE_ATTRIBUTES else "camera"
+        self.applyAttributes([(attributeType, attributeValue)], kind)
+
+    def applyField(self, attributeType, attributeName, *args):
+        """ Button command setting the value of a field.
+            Args:
+                attributeType (string): Type of attribute.
+                attributeName (string): Name of the attribute in the UI.
+                args: Ignored, passed by the button.
+        """
+        self.setFieldValue(attributeType, attributeName)
+
+    def applyValue(self, attributeType, attributeValue, *args):
+        """ Checkbox command setting a fixed value.
+            Args:
+                attributeType (string): Type of attribute.
+                attributeValue (float): Value to set.
+                args: Ignored, passed by the checkbox.
+        """
+        self.setFieldValue(attributeType, None, attributeValue)
+
+    def filmbackFunc(self, *args):
+        """ Sets both film apertures of the target cameras in one step.
+        """
+        self.applyAttributes([
+            ("horizontalFilmAperture", cmds.floatFieldGrp(self.horizAperture, v1=True, q=True)),
+            ("verticalFilmAperture", cmds.floatFieldGrp(self.vertAperture, v1=True, q=True)),
+        ])
 
     #----------------------------------------#
     # Image Plane Control Functions
     #----------------------------------------#
-    def selectImgPlaneFunc(self):
+    def selectImgPlaneFunc(self, *args):
         """ Selects all the imagePlanes in the scene.
         """
         selImgPlane = cmds.ls(type='imagePlane')
         cmds.select(selImgPlane)
 
-    def lookThrough(self):
+    def lookThrough(self, *args):
         """ Changes the imagePlane mode to "Look through Camera".
         """
-        shapeSel = self.findShapeSel()
-        for each in shapeSel:
-            cmds.imagePlane(each, e=True, showInAllViews=False)
-            cmds.select(cl=True)
+        self.applyAttributes([("displayOnlyIfCurrent", 1)], "imagePlane")
+        cmds.select(cl=True)
 
-    def allViews(self):
+    def allViews(self, *args):
         """ Changes the imagePlane mode to "In all views".
         """
-        shapeSel = self.findShapeSel()
-        for each in shapeSel:
-            cmds.imagePlane(each, e=True, showInAllViews=True)
-            cmds.select(cl=True)
+        self.applyAttributes([("displayOnlyIfCurrent", 0)], "imagePlane")
+        cmds.select(cl=True)
 
-    def sizeFunc(self):
+    def sizeFunc(self, *args):
         """ Sets the Size values of the ImagePlane.
         """
         self.sizeVal1 = cmds.floatFieldGrp(self.size, v1=True, q=True)
         self.sizeVal2 = cmds.floatFieldGrp(self.size, v2=True, q=True)
 
-        self.setFieldValue("sizeX", None, self.sizeVal1)
-        self.setFieldValue("sizeY", None, self.sizeVal2)
+        self.applyAttributes([("sizeX", self.sizeVal1), ("sizeY", self.sizeVal2)], "imagePlane")
 
-    def offsetFunc(self):
+    def offsetFunc(self, *args):
         """ Sets the Offset values of the ImagePlane.
         """
         self.offsetVal1 = cmds.floatFieldGrp(self.offset, v1=True, q=True)
         self.offsetVal2 = cmds.floatFieldGrp(self.offset, v2=True, q=True)
 
-        self.setFieldValue("sizeX", None, self.offsetVal1)
-        self.setFieldValue("sizeY", None, self.offsetVal2)
+        self.applyAttributes([("offsetX", self.offsetVal1), ("offsetY", self.offsetVal2)], "imagePlane")
 
 #================================================================#
 # Execution
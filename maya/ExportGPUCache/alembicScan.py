@@ -0,0 +1,381 @@
+""" Alembic Scan
+    Description:
+                 - Streaming discovery of the alembic files of a directory tree, with depth limits and
+                   include/exclude patterns.
+                 - Pre-scan of the alembic files before conversion, without a Maya import.
+                 - Estimates the conversion cost of each file from its size and, when the PyAlembic module
+                   is available, from its object count, sample count and bounds.
+                 - Orders the work largest first so one huge scan does not end up last in the queue.
+                 - Logs predicted against actual conversion times, and fits a new cost model from that log.
+
+    Usage:
+                 python alembicScan.py <directoryPath>
+                 python alembicScan.py --fit <directoryPath>/gpuCacheSchedule.jsonl > costModel.json
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import fnmatch
+import json
+import os
+import stat
+import sys
+import time
+
+try:
+    import alembic
+except ImportError:
+    alembic = None
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+SCHEDULE_LOG = "gpuCacheSchedule.jsonl"
+
+# Seconds = base + perMB * size + perObject * objects + perSample * samples
+DEFAULT_COST_MODEL = {
+    "base": 5.0,
+    "perMB": 0.05,
+    "perObject": 0.01,
+    "perSample": 0.001,
+}
+
+# Directory names never searched for alembics
+SKIPPED_DIRECTORIES = ("gpuCache", "gpuCacheLOD", "gpuCacheTiles")
+
+#=================================================================#
+# Discovery
+#=================================================================#
+def iterAlembicFiles(directoryPath, maxDepth=0, include=None, exclude=None, skipDirectories=SKIPPED_DIRECTORIES):
+    """ Yields the alembic files of a directory tree as they are found.
+        The files of a directory come in listing order, while it is still being listed, so a huge flat
+        directory on slow storage starts converting before its listing ends. Subdirectories go in name order.
+        Symlinked directories are followed once, loops are skipped.
+        Args:
+            directoryPath (string): Directory path with the alembic files.
+            maxDepth (int): Depth of subdirectories searched, 0 for the directory only, None for no limit.
+            include (list): Glob patterns the relative path or file name must match, defaults to *.abc.
+            exclude (list): Glob patterns of the relative paths or names to skip, files and directories.
+            skipDirectories (tuple): Directory names never searched, like the gpuCache output.
+        Yields:
+            abcFilePath (string): Path of an alembic file.
+    """
+    include = [pattern.lower() for pattern in (include or ["*.abc"])]
+    exclude = [pattern.lower() for pattern in (exclude or [])]
+
+    visited = set()
+    stack = [(directoryPath, 0)]
+    while stack:
+        currentPath, depth = stack.pop()
+        try:
+            directoryStat = os.stat(currentPath)
+        except OSError:
+            continue
+        if (directoryStat.st_dev, directoryStat.st_ino) in visited:
+            continue
+        visited.add((directoryStat.st_dev, directoryStat.st_ino))
+
+        subDirectories = []
+        for entry in _iterEntries(currentPath):
+            relativePath = os.path.relpath(entry.path, directoryPath).replace(os.sep, "/").lower()
+            if _matches(relativePath, exclude):
+                continue
+            try:
+                if entry.is_dir():
+                    if entry.name not in skipDirectories and (maxDepth is None or depth < maxDepth):
+                        subDirectories.append((entry.path, depth + 1))
+                elif entry.is_file() and _matches(relativePath, include):
+                    yield entry.path
+            except OSError:
+                continue
+
+        # Depth first, in name order
+        stack.extend(sorted(subDirectories, reverse=True))
+
+def isAlembicFile(directoryPath, filePath, maxDepth=0, include=None, exclude=None, skipDirectories=SKIPPED_DIRECTORIES):
+    """ Checks if iterAlembicFiles() would yield a path, without listing the directory.
+        Args:
+            directoryPath (string): Directory path with the alembic files.
+            filePath (string): Path of the file, inside directoryPath.
+            maxDepth, include, exclude, skipDirectories: Same as iterAlembicFiles().
+        Returns:
+            isAlembic (bool): True if the path is an alembic file of the directory tree.
+    """
+    relativePath = os.path.relpath(filePath, directoryPath).replace(os.sep, "/")
+    parts = relativePath.split("/")
+    if parts[0] == ".." or (maxDepth is not None and len(parts) - 1 > maxDepth):
+        return False
+    if any(part in skipDirectories for part in parts[:-1]):
+        return False
+    exclude = [pattern.lower() for pattern in (exclude or [])]
+    for depth in range(1, len(parts) + 1):
+        if _matches("/".join(parts[:depth]).lower(), exclude):
+            return False
+
+    return _matches(relativePath.lower(), [pattern.lower() for pattern in (include or ["*.abc"])])
+
+def addScanArguments(parser):
+    """ Adds the --recursive, --max-depth, --include and --exclude arguments read by scanOptions().
+        Args:
+            parser (argparse.ArgumentParser): Parser of the command line.
+    """
+    parser.add_argument("--recursive", "-r", action="store_true", help="Also search the subdirectories for alembic files.")
+    parser.add_argument("--max-depth", type=int, default=None, help="Depth of subdirectories searched, implies --recursive.")
+    parser.add_argument("--include", action="append", default=None, help="Glob pattern of the alembic files to convert, repeatable.")
+    parser.add_argument("--exclude", action="append", default=None, help="Glob pattern of the files or directories to skip, repeatable.")
+
+def scanOptions(args):
+    """ Builds the iterAlembicFiles() arguments from the command line.
+        Args:
+            args (argparse.Namespace): Parsed arguments, see addScanArguments().
+        Returns:
+            scanOptions (dict): maxDepth, include and exclude.
+    """
+    return {
+        "maxDepth": args.max_depth if args.max_depth is not None else (None if args.recursive else 0),
+        "include": args.include,
+        "exclude": args.exclude,
+    }
+
+def _matches(relativePath, patterns):
+    """ Checks a relative path, or its last component, against glob patterns.
+        Args:
+            relativePath (string): Lower case relative path with forward slashes.
+            patterns (list): Lower case glob patterns.
+        Returns:
+            matches (bool): True if any pattern matches.
+    """
+    name = relativePath.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        if fnmatch.fnmatchcase(relativePath, pattern) or fnmatch.fnmatchcase(name, pattern):
+            return True
+
+    return False
+
+def _iterEntries(directoryPath):
+    """ Lists a directory lazily with scandir, or with listdir when neither os.scandir nor the scandir module exist.
+        Args:
+            directoryPath (string): Directory to list.
+        Yields:
+            entry (os.DirEntry): Entry with name, path, is_dir() and is_file(), as the listing returns it.
+    """
+    try:
+        if scandir is not None:
+            entries = scandir(directoryPath)
+        else:
+            entries = (_ListdirEntry(directoryPath, name) for name in os.listdir(directoryPath))
+    except OSError as e:
+        print("Could not list %s: %s"%(directoryPath, e))
+        return
+    try:
+        for entry in entries:
+            yield entry
+    except OSError as e:
+        print("Could not list %s: %s"%(directoryPath, e))
+    finally:
+        # Releases the directory handle of os.scandir when the scan stops early
+        if hasattr(entries, "close"):
+            entries.close()
+
+class _ListdirEntry(object):
+    """ Minimal stand-in for os.DirEntry on python versions without scandir.
+    """
+    def __init__(self, directoryPath, name):
+        self.name = name
+        self.path = os.path.join(directoryPath, name)
+
+    def is_dir(self):
+        return stat.S_ISDIR(os.stat(self.path).st_mode)
+
+    def is_file(self):
+        return stat.S_ISREG(os.stat(self.path).st_mode)
+
+#=================================================================#
+# Scan
+#=================================================================#
+def readAlembicStats(abcFilePath):
+    """ Reads the cheap statistics of an alembic file.
+        Args:
+            abcFilePath (string): File path of the alembic file.
+        Returns:
+            stats (dict): size in bytes, and objects, samples and bounds (None without PyAlembic).
+    """
+    stats = {"size": os.path.getsize(abcFilePath), "objects": None, "samples": None, "bounds": None}
+    if alembic is None:
+        return stats
+
+    try:
+        archive = alembic.Abc.IArchive(abcFilePath)
+        stats["objects"] = _countObjects(archive.getTop())
+        stats["samples"] = max(
+            [archive.getMaxNumSamplesForTimeSamplingIndex(i) for i in range(archive.getNumTimeSamplings())] or [0])
+        bounds = alembic.AbcGeom.GetIArchiveBounds(archive).getValue()
+        stats["bounds"] = [list(bounds.min()), list(bounds.max())]
+    except Exception as e:
+        print("Could not read the header of %s: %s"%(abcFilePath, e))
+
+    return stats
+
+def _countObjects(alembicObject):
+    """ Counts the objects below an alembic object.
+        Args:
+            alembicObject (alembic.Abc.IObject): Object to start from.
+        Returns:
+            count (int): Number of descendant objects.
+    """
+    count = 0
+    stack = list(alembicObject.children)
+    while stack:
+        child = stack.pop()
+        count += 1
+        stack.extend(child.children)
+
+    return count
+
+def estimateCost(stats, costModel=None):
+    """ Estimates the conversion time of an alembic file.
+        Args:
+            stats (dict): Statistics from readAlembicStats().
+            costModel (dict): Cost coefficients, defaults to DEFAULT_COST_MODEL.
+        Returns:
+            seconds (float): Predicted conversion time.
+    """
+    costModel = costModel or DEFAULT_COST_MODEL
+    return (costModel["base"]
+            + costModel["perMB"] * stats["size"] / float(1 << 20)
+            + costModel["perObject"] * (stats["objects"] or 0)
+            + costModel["perSample"] * (stats["samples"] or 0))
+
+def rankByCost(abcFileList, costModel=None):
+    """ Pre-scans the alembic files and orders them largest first.
+        Args:
+            abcFileList (list): List of alembic file paths.
+            costModel (dict): Cost coefficients, defaults to DEFAULT_COST_MODEL.
+        Returns:
+            ranked (list): (abcFilePath, stats, predictedSeconds) tuples, most expensive first.
+    """
+    ranked = []
+    for abcFilePath in abcFileList:
+        stats = readAlembicStats(abcFilePath)
+        ranked.append((abcFilePath, stats, estimateCost(stats, costModel)))
+    ranked.sort(key=lambda item: item[2], reverse=True)
+
+    return ranked
+
+def loadCostModel(costModelPath):
+    """ Loads a cost model written by --fit.
+        Args:
+            costModelPath (string): Path of the json cost model, None for the default one.
+        Returns:
+            costModel (dict): Cost coefficients.
+    """
+    costModel = dict(DEFAULT_COST_MODEL)
+    if costModelPath:
+        with open(costModelPath) as costModelFile:
+            costModel.update(json.load(costModelFile))
+
+    return costModel
+
+#=================================================================#
+# Schedule Log
+#=================================================================#
+def logSchedule(directoryPath, scans, results):
+    """ Appends the predicted and actual conversion times to the schedule log of the directory.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            scans (dict): (stats, predictedSeconds) tuples keyed on alembic file path.
+            results (list): Result dictionaries of the conversion.
+    """
+    with open(os.path.join(directoryPath, SCHEDULE_LOG), "a") as logFile:
+        for result in results:
+            if result["source"] not in scans:
+                continue
+            stats, predicted = scans[result["source"]]
+            logFile.write(json.dumps({
+                "time": time.time(),
+                "source": result["source"],
+                "size": stats["size"],
+                "objects": stats["objects"],
+                "samples": stats["samples"],
+                "predicted": round(predicted, 3),
+                "actual": result.get("seconds"),
+                "status": result["status"],
+            }) + "\n")
+
+def fitCostModel(logPath):
+    """ Fits the cost coefficients to the successful conversions of a schedule log, by least squares.
+        Args:
+            logPath (string): Path of a schedule log.
+        Returns:
+            costModel (dict): Fitted cost coefficients.
+    """
+    rows = []
+    times = []
+    with open(logPath) as logFile:
+        for line in logFile:
+            entry = json.loads(line)
+            if entry["status"] != "ok" or entry.get("actual") is None:
+                continue
+            rows.append([1.0, entry["size"] / float(1 << 20), entry["objects"] or 0.0, entry["samples"] or 0.0])
+            times.append(entry["actual"])
+    if len(rows) < 4:
+        raise ValueError("Need at least 4 successful conversions in %s to fit a cost model"%logPath)
+
+    # Normal equations (X'X) c = X'y, with a small ridge so unused columns stay at 0
+    size = len(rows[0])
+    matrix = [[sum(row[i] * row[j] for row in rows) + (1e-9 if i == j else 0.0) for j in range(size)] for i in range(size)]
+    vector = [sum(row[i] * t for row, t in zip(rows, times)) for i in range(size)]
+    coefficients = _solve(matrix, vector)
+
+    return dict(zip(["base", "perMB", "perObject", "perSample"], coefficients))
+
+def _solve(matrix, vector):
+    """ Solves a small linear system by gaussian elimination with partial pivoting.
+        Args:
+            matrix (list): Square matrix as a list of rows.
+            vector (list): Right hand side.
+        Returns:
+            solution (list): Solution of the system.
+    """
+    size = len(vector)
+    augmented = [list(row) + [value] for row, value in zip(matrix, vector)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda r: abs(augmented[r][column]))
+        augmented[column], augmented[pivot] = augmented[pivot], augmented[column]
+        for r in range(column + 1, size):
+            factor = augmented[r][column] / augmented[column][column]
+            for c in range(column, size + 1):
+                augmented[r][c] -= factor * augmented[column][c]
+
+    solution = [0.0] * size
+    for r in reversed(range(size)):
+        solution[r] = (augmented[r][size] - sum(augmented[r][c] * solution[c] for c in range(r + 1, size))) / augmented[r][r]
+
+    return solution
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-scan alembic files, or fit a cost model from a schedule log.")
+    parser.add_argument("path", help="Directory of alembic files, or schedule log with --fit.")
+    parser.add_argument("--fit", action="store_true", help="Print a cost model fitted to the schedule log.")
+    parser.add_argument("--cost-model", default=None, help="Json cost model used to rank the files.")
+    parser.add_argument("--max-depth", type=int, default=None, help="Depth of subdirectories searched, all by default.")
+    args = parser.parse_args()
+
+    if args.fit:
+        print(json.dumps(fitCostModel(args.path), indent=1, sort_keys=True))
+        sys.exit(0)
+
+    abcFileList = list(iterAlembicFiles(args.path, maxDepth=args.max_depth))
+    for abcFilePath, stats, predicted in rankByCost(abcFileList, loadCostModel(args.cost_model)):
+        print("%8.1fs  %10.1f MB  %8s objects  %s"%(
+            predicted, stats["size"] / float(1 << 20), stats["objects"], os.path.basename(abcFilePath)))
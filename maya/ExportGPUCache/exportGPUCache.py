@@ -1,81 +1,618 @@
 """ Export GPU Cache
-    Description: 
+    Description:
                  - Command line tool, enabling the artist to easily visualise heavy scenes.
                  - Creates a light weight scene with gpu caches. Useful for quick visualization of large sets, create dailies etc
-                 - Import list of alembics from a directory, assign a shader and export GPUCache of all the geos. 
-				 - Import the exported GPUCaches into a mayaScene and save it for the artist to use
-	
-	Usecase: This script is useful for heavy scenes that slowdown/crash maya. Useful for heavy environments or photogrammetry assets. 
+                 - Import list of alembics from a directory, assign a shader and export GPUCache of all the geos.
+                 - Import the exported GPUCaches into a mayaScene and save it for the artist to use
 
-	Author: Rahul Nathan
+    Usecase: This script is useful for heavy scenes that slowdown/crash maya. Useful for heavy environments or photogrammetry assets.
+
+    Usage:
+                 mayapy exportGPUCache.py <directoryPath> [--jobs N] [--mayapy PATH] [--hash] [--force] [--fast-assembly]
+                                         [--schedule largest|discovery] [--cost-model FILE]
+                                         [--recursive] [--max-depth N] [--include GLOB] [--exclude GLOB]
+                                         [--scratch DIR] [--prefetch K] [--scratch-limit GB]
+                                         [--lods 25,5] [--tiles N] [--tile-min-polygons N] [--deferred]
+                                         [--max-rss GB] [--shading phong|keep|palette]
+                                         [--start F] [--end F] [--step F] [--substeps N] [--decimate N]
+                                         [--chunk-frames F] [--stitch] [--profile NAME] [--merged]
+                                         [--watch] [--watch-dir DIR] [--settle SECONDS] [--poll SECONDS] [--polling]
+                                         [--shard I/N]
+                 mayapy exportGPUCache.py <directoryPath> --merge-shards [--fast-assembly] [--deferred]
+
+    Author: Rahul Nathan
 """
 
 # Import Statements
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import argparse
+import json
 import os
 import sys
-import getpass
+import time
+import traceback
+import zlib
+
+import alembicScan
+import gpuCacheFrames
+import gpuCacheJournal
+import gpuCacheManifest
+import gpuCacheProfiles
+import gpuCacheRegions
+import gpuCacheReport
+import gpuCacheScene
+import gpuCacheStaging
+import gpuCacheWatch
+import gpuCacheWorkers
 
-# Initialize Maya in batch mode
-import maya.standalone
-maya.standalone.initialize()
+_mayaInitialized = False
 
-# Load Plugin
-cmds.loadPlugin("gpuCache.so", quiet=True)
-cmds.loadPlugin("AbcImport.so", quiet=True)
-cmds.loadPlugin("AbcExport.so", quiet=True)
+# Name of the cache of a merged directory, after the directory name
+MERGED_SUFFIX = "_merged"
 
-# Get Inputs
-directoryPath = sys.argv[1]
+# Colors of the palette shaders, each material of the alembics maps to one of them
+PREVIEW_PALETTE = [
+    (0.62, 0.62, 0.62),
+    (0.72, 0.45, 0.35),
+    (0.40, 0.58, 0.38),
+    (0.38, 0.50, 0.70),
+    (0.75, 0.68, 0.40),
+    (0.58, 0.42, 0.65),
+    (0.40, 0.66, 0.66),
+    (0.70, 0.52, 0.58),
+]
 
 #=================================================================#
 # Main Function
 #=================================================================#
-def exportImportGPUCache(directoryPath):
+def exportImportGPUCache(directoryPath, jobs=1, mayapy=None, useHash=False, force=False, abcFileList=None, fastAssembly=False,
+                         largestFirst=True, costModel=None, scanOptions=None, stagingOptions=None, options=None, deferred=False,
+                         maxRSS=None, merged=False, shard=None):
     """ This is the main function of the script.
-        Finds & imports alembic files and assigns a shader. 
+        Finds & imports alembic files and assigns a shader.
         Exports GPU Cache and clears the scene
         Imports the exported GPU cache and saves a mayaScene
-        
+        Alembic files unchanged since the last run, according to the manifest, are not converted again.
+        Every asset is converted in a new scene, with undo disabled, so the cost per asset stays flat over long runs.
+        Long frame ranges split in chunks are converted chunk by chunk, in parallel with several jobs.
+        Writes the timings, memory and byte counts of the run and of each asset to gpuCacheReport.json.
+        Each finished asset is appended to a journal, a run which crashed resumes from it on the next run.
+        A shard only converts its part of the files and leaves its results in its journal, see mergeShards().
+
         Args:
             directoryPath (string): Directory path with the list of alembic files.
+            jobs (int): Number of worker mayapy processes. 1 converts in this process.
+            mayapy (string): mayapy executable used to start the workers.
+            useHash (bool): Key the alembic files on a hash of their content as well as size and mtime.
+            force (bool): Convert every alembic file, even if its cache is up to date.
+            abcFileList (list): Alembic files to convert instead of all the files of the directory.
+            fastAssembly (bool): Write the gpu cache scene with gpuCacheScene instead of Maya.
+            largestFirst (bool): Convert the most expensive alembic files first, from a pre-scan.
+                                 Otherwise the files are converted while the directory is still being scanned.
+            costModel (dict): Cost coefficients of the pre-scan, defaults to alembicScan.DEFAULT_COST_MODEL.
+            scanOptions (dict): maxDepth, include and exclude arguments of alembicScan.iterAlembicFiles.
+            stagingOptions (dict): scratchDir, prefetch and limitBytes arguments of gpuCacheStaging.StagingArea.
+                                   Stages the alembics and caches on local scratch when given.
+            options (dict): Conversion options from conversionOptions(), defaults to conversionOptions().
+            deferred (bool): Save the scene with the caches unloaded, as bounding box placeholders.
+            maxRSS (int): Resident memory in bytes above which a worker is restarted before its next file.
+                          Converts in a worker process even with 1 job.
+            merged (bool): Export all the alembic files into one cache for the directory, see exportMergedGPUCache().
+            shard (tuple): (index, count) from gpuCacheJournal.parseShard(), converts only the files of that shard.
+        Returns:
+            results (list): Result dictionary for each converted alembic file.
     """
-	# Find Alembic files
-	abcFileList = findAlembicFiles(directoryPath)
-	# Create Phong Shader
-	phongShader, phongShaderSG = creatPhongShader()
-
-	importedAbc = None
-	gpuCacheDir = None
-	if len(abcFileList) == 0:
-		cmds.error("Empty List")
-	else:
-		for abcFilePath in abcFileList:
-			try:
-				# Import Alembic
-				abcFile = importAlembic(abcFilePath)
-				# Assign PhongShader
-				allGeos = cmds.listRelatives(cmds.ls(geometry=True), p=True, path=True)
-				cmds.select(allGeos, r=True)
-				for i in allGeos:
-					cmds.sets(i, e=True, forceElement=phongShaderSG)
-
-				#Export GPU Cache
-				gpuCacheDir = exportGPUCache(directoryPath, abcFile, allGeos)
-
-			except:
-				pass
-
-	if gpuCacheDir:
-		# Import GPU Cache
-		importGPUCache(gpuCacheDir)
-		
-		# Save Scene
-		saveScene(directoryPath)
+    startTime = time.time()
+    stages = {}
+
+    # Find Alembic files
+    if abcFileList is None:
+        abcFiles = alembicScan.iterAlembicFiles(directoryPath, **(scanOptions or {}))
+    else:
+        abcFiles = iter(abcFileList)
+
+    options = options or conversionOptions()
+    if merged:
+        if shard:
+            raise ValueError("A merged cache can not be split in shards")
+        return exportMergedGPUCache(directoryPath, list(abcFiles), options, fastAssembly=fastAssembly, deferred=deferred)
+
+    # Skip the unchanged alembics, and the ones converted before a crash
+    manifest = gpuCacheManifest.GPUCacheManifest(directoryPath, useHash=useHash)
+    journal = gpuCacheJournal.GPUCacheJournal(directoryPath, shard)
+    unchanged = []
+    resumed = []
+    sourceKeys = {}
+    def changedFiles():
+        shardFiles = gpuCacheJournal.iterShard(abcFiles, directoryPath, shard)
+        for abcFilePath, sourceKey in manifest.iterChanged(shardFiles, options, force=force, unchanged=unchanged):
+            sourceKeys[abcFilePath] = sourceKey
+            result = None if force else journal.completed(abcFilePath, sourceKey, options)
+            if result is not None:
+                resumed.append(result)
+                continue
+            yield abcFilePath
+
+    def recordResult(result):
+        journal.record(result, sourceKeys[result["source"]], options)
+
+    # Pre-scan and queue the most expensive files first
+    scans = {}
+    if largestFirst:
+        with gpuCacheReport.stage(stages, "scan"):
+            ranked = alembicScan.rankByCost(list(changedFiles()), costModel)
+        scans = dict((abcFilePath, (stats, predicted)) for abcFilePath, stats, predicted in ranked)
+        pendingFiles = [abcFilePath for abcFilePath, stats, predicted in ranked]
+        print("%d alembic files to convert, %d up to date, %d resumed"%(len(pendingFiles), len(unchanged), len(resumed)))
+    else:
+        pendingFiles = changedFiles()
+
+    gpuCacheDir = os.path.join(directoryPath, "gpuCache")
+    staging = None
+    if stagingOptions:
+        stagingOptions = dict(stagingOptions)
+        stagingOptions.setdefault("prefetch", jobs + 1)
+        staging = gpuCacheStaging.StagingArea(outputDir=directoryPath, **stagingOptions)
+
+    try:
+        with gpuCacheReport.stage(stages, "convert"):
+            if jobs > 1 or maxRSS:
+                # Convert in worker processes, Maya is only needed here for the assembly
+                results = gpuCacheWorkers.runWorkerPool(
+                    pendingFiles, directoryPath, jobs, os.path.abspath(__file__), mayapy=mayapy, staging=staging,
+                    workerArgs=["--options", json.dumps(options)], maxRSS=maxRSS,
+                    chunks=gpuCacheFrames.frameChunks(options), stitch=options["stitch"], onResult=recordResult)
+            else:
+                results = convertAlembicFiles(pendingFiles, directoryPath, staging=staging, options=options,
+                                              onResult=recordResult)
+    finally:
+        if staging:
+            with gpuCacheReport.stage(stages, "publish"):
+                staging.close()
+
+    if shard:
+        # The manifest and scene are shared by all the shards, mergeShards() writes them once every shard is done
+        index, count = shard
+        journal.finish()
+        printResults(results)
+        report = gpuCacheReport.buildReport(directoryPath, startTime, stages, results, unchanged + resumed,
+                                            options=options, jobs=jobs)
+        gpuCacheReport.printSummary(report)
+        print("Report saved to %s"%gpuCacheReport.writeReport(directoryPath, report,
+                                                              gpuCacheReport.SHARD_REPORT_FILE%(index, count)))
+        print("Shard %d/%d done, run --merge-shards once every shard is done"%(index, count))
+        return results
+
+    if not results and not unchanged and not resumed:
+        cmds.error("Empty List")
+
+    # Record the new caches, prune the caches of the deleted alembics
+    with gpuCacheReport.stage(stages, "manifest"):
+        for result in resumed + results:
+            if result["status"] == "ok":
+                if result.get("tiles"):
+                    result["tileIndex"] = gpuCacheRegions.writeTileIndex(result)
+                manifest.update(result["source"], sourceKeys[result["source"]], result, options)
+            else:
+                manifest.remove(result["source"])
+        for cacheFilePath in manifest.prune(list(sourceKeys) + unchanged):
+            print("Pruned %s"%cacheFilePath)
+        manifest.save()
+        # Everything in the journal is in the manifest now
+        journal.remove()
+        if scans:
+            alembicScan.logSchedule(directoryPath, scans, results)
+
+    if fastAssembly and (unchanged or resumed or any(result["status"] == "ok" for result in results)):
+        # Write the scene without Maya
+        with gpuCacheReport.stage(stages, "writeScene"):
+            gpuCacheScene.writeScene(gpuCacheScene.sceneFilePath(directoryPath), gpuCacheScene.collectCaches(directoryPath),
+                                     deferred=deferred)
+
+    elif unchanged or resumed or any(result["status"] == "ok" for result in results):
+        initializeMaya()
+        resetScene()
+        # Import GPU Cache
+        with gpuCacheReport.stage(stages, "importGPUCache"):
+            importGPUCache(gpuCacheDir, gpuCacheScene.collectCaches(directoryPath), deferred=deferred)
+
+        # Save Scene
+        with gpuCacheReport.stage(stages, "saveScene"):
+            saveScene(directoryPath)
+
+    printResults(results)
+
+    # Report the run
+    report = gpuCacheReport.buildReport(directoryPath, startTime, stages, results, unchanged + resumed, options=options, jobs=jobs)
+    gpuCacheReport.printSummary(report)
+    print("Report saved to %s"%gpuCacheReport.writeReport(directoryPath, report))
+
+    return results
+
+def mergeShards(directoryPath, fastAssembly=False, deferred=False, scanOptions=None):
+    """ Gathers the journals of the shards of a directory into its manifest and saves the gpu cache scene of all the shards.
+        The latest record of an asset wins, so a shard converted again on another node replaces the lost one.
+        The journals are deleted once every shard finished. While shards are still running, or were lost before
+        their end, what they converted is merged and the journals are kept: running the missing shards and merging
+        once more completes the scene.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            fastAssembly (bool): Write the gpu cache scene with gpuCacheScene instead of Maya.
+            deferred (bool): Save the scene with the caches unloaded, as bounding box placeholders.
+            scanOptions (dict): maxDepth, include and exclude arguments of alembicScan.iterAlembicFiles, used to prune
+                                the caches of the deleted alembics.
+        Returns:
+            results (list): Result dictionary of each asset recorded by the shards.
+    """
+    startTime = time.time()
+    stages = {}
+    journalPaths = gpuCacheJournal.shardJournals(directoryPath)
+    missing = gpuCacheJournal.missingShards(journalPaths)
+    for index, count in missing:
+        print("Shard %d/%d has not finished, its assets converted so far are merged, run it again"%(index, count))
+
+    manifest = gpuCacheManifest.GPUCacheManifest(directoryPath)
+    results = []
+    with gpuCacheReport.stage(stages, "manifest"):
+        records = gpuCacheJournal.mergedRecords(journalPaths)
+        for source in sorted(records):
+            record = records[source]
+            result = gpuCacheJournal.absoluteResult(directoryPath, record["result"])
+            if result["status"] == "ok":
+                if result.get("tiles"):
+                    result["tileIndex"] = gpuCacheRegions.writeTileIndex(result)
+                manifest.update(result["source"], record["sourceKey"], result, record["options"])
+            else:
+                manifest.remove(result["source"])
+            results.append(result)
+        for cacheFilePath in manifest.prune(list(alembicScan.iterAlembicFiles(directoryPath, **(scanOptions or {})))):
+            print("Pruned %s"%cacheFilePath)
+        manifest.save()
+    print("Merged %d assets from %d journals"%(len(results), len(journalPaths)))
+
+    if not manifest.entries:
+        cmds.error("Empty List")
+
+    if fastAssembly:
+        with gpuCacheReport.stage(stages, "writeScene"):
+            gpuCacheScene.writeScene(gpuCacheScene.sceneFilePath(directoryPath), gpuCacheScene.collectCaches(directoryPath),
+                                     deferred=deferred)
+    else:
+        initializeMaya()
+        resetScene()
+        with gpuCacheReport.stage(stages, "importGPUCache"):
+            importGPUCache(os.path.join(directoryPath, "gpuCache"), gpuCacheScene.collectCaches(directoryPath),
+                           deferred=deferred)
+        with gpuCacheReport.stage(stages, "saveScene"):
+            saveScene(directoryPath)
+
+    # Journals and reports of the finished runs are in the manifest and the merged report now
+    for journalPath in journalPaths:
+        shard = gpuCacheJournal.journalShard(journalPath)
+        if shard and any(count == shard[1] for index, count in missing):
+            continue
+        os.remove(journalPath)
+        reportPath = os.path.join(directoryPath, gpuCacheReport.SHARD_REPORT_FILE%shard) if shard else None
+        if reportPath and os.path.isfile(reportPath):
+            os.remove(reportPath)
+
+    printResults(results)
+
+    report = gpuCacheReport.buildReport(directoryPath, startTime, stages, results, [])
+    gpuCacheReport.printSummary(report)
+    print("Report saved to %s"%gpuCacheReport.writeReport(directoryPath, report))
+
+    return results
+
+def exportMergedGPUCache(directoryPath, abcFileList, options, fastAssembly=False, deferred=False):
+    """ Imports all the alembic files into one scene and exports them as a single cache, <directory>_merged.abc,
+        then saves the gpu cache scene with that one cache.
+        The merged cache is exported again on every run, in this process, and is not recorded in the manifest.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            abcFileList (list): Alembic files to merge.
+            options (dict): Conversion options from conversionOptions(), without levels of detail, tiles or chunks.
+            fastAssembly (bool): Write the gpu cache scene with gpuCacheScene instead of Maya.
+            deferred (bool): Save the scene with the cache unloaded, as a bounding box placeholder.
+        Returns:
+            results (list): Result dictionary of the merged cache.
+    """
+    if options["lods"] or options["tiles"] or options["chunkFrames"]:
+        raise ValueError("A merged cache can not have levels of detail, tiles or frame chunks")
+    if not abcFileList:
+        cmds.error("Empty List")
+
+    startTime = time.time()
+    stages = {}
+    initializeMaya()
+    with gpuCacheReport.stage(stages, "convert"):
+        result = convertMerged(abcFileList, directoryPath, options)
+    results = [result]
+
+    if result["status"] == "ok":
+        caches = [{"name": os.path.splitext(os.path.basename(result["cache"]))[0], "path": result["cache"],
+                   "bounds": result["bounds"]}]
+        if fastAssembly:
+            with gpuCacheReport.stage(stages, "writeScene"):
+                gpuCacheScene.writeScene(gpuCacheScene.sceneFilePath(directoryPath), caches, deferred=deferred)
+        else:
+            with gpuCacheReport.stage(stages, "importGPUCache"):
+                importGPUCache(os.path.dirname(result["cache"]), caches, deferred=deferred)
+            with gpuCacheReport.stage(stages, "saveScene"):
+                saveScene(directoryPath)
+
+    printResults(results)
+
+    # Report the run
+    report = gpuCacheReport.buildReport(directoryPath, startTime, stages, results, [], options=options)
+    gpuCacheReport.printSummary(report)
+    print("Report saved to %s"%gpuCacheReport.writeReport(directoryPath, report))
+
+    return results
+
+def convertMerged(abcFileList, directoryPath, options):
+    """ Imports the alembic files into the scene, assigns the preview shaders and exports them as one cache.
+        Expects an empty scene and leaves one, even when the conversion fails.
+        Args:
+            abcFileList (list): Alembic files to merge.
+            directoryPath (string): Directory path with the list of alembic files.
+            options (dict): Conversion options from conversionOptions().
+        Returns:
+            result (dict): Result of the conversion, like convertAlembic(), with the directory as the source.
+    """
+    result = {
+        "source": directoryPath,
+        "cache": None,
+        "status": "failed",
+        "error": None,
+        "traceback": None,
+        "failedStage": None,
+        "seconds": None,
+        "stages": {},
+        "inputBytes": gpuCacheReport.fileBytes(abcFileList),
+        "outputBytes": None,
+        "peakRSS": None,
+        "bounds": None,
+        "polygons": None,
+        "lods": [],
+        "tiles": [],
+    }
+    stages = result["stages"]
+    startTime = time.time()
+    mergedName = os.path.basename(os.path.normpath(directoryPath)) + MERGED_SUFFIX
+    try:
+        # Import every alembic, keeping them all in the scene
+        allGeos = []
+        with gpuCacheReport.stage(stages, "import"):
+            for abcFilePath in abcFileList:
+                abcFile, geos = importAlembic(abcFilePath)
+                allGeos.extend(geos)
+        if not allGeos:
+            raise RuntimeError("No geometry in %s"%directoryPath)
+        with gpuCacheReport.stage(stages, "shader"):
+            assignShaders(allGeos, options["shader"])
+            result["bounds"] = cmds.exactWorldBoundingBox(allGeos)
+            result["polygons"] = cmds.polyEvaluate(allGeos, face=True)
+        with gpuCacheReport.stage(stages, "export"):
+            gpuCacheDir = exportGPUCache(directoryPath, mergedName + ".abc", allGeos, options=options)
+        result["cache"] = os.path.join(gpuCacheDir, mergedName + ".abc")
+        result["status"] = "ok"
+
+    except Exception as e:
+        result["error"] = str(e)
+        result["traceback"] = traceback.format_exc()
+        failedStages = [name for name in stages if stages[name].get("failed")]
+        result["failedStage"] = failedStages[0] if failedStages else None
+
+    try:
+        with gpuCacheReport.stage(stages, "clear"):
+            resetScene()
+    except Exception as e:
+        print("Could not reset the scene after %s: %s"%(mergedName, e))
+
+    result["seconds"] = round(time.time() - startTime, 3)
+    result["outputBytes"] = gpuCacheReport.fileBytes([result["cache"]])
+    result["peakRSS"] = gpuCacheReport.peakRSS()
+
+    return result
+
+def convertAlembicFiles(abcFiles, directoryPath, staging=None, options=None, onResult=None):
+    """ Converts the alembic files one after the other in the current Maya session.
+        Maya is initialized when the first file comes in. Each file, or each chunk of its frame range, is converted in a new scene.
+        Args:
+            abcFiles (iterable): Alembic file paths, a list or a generator.
+            directoryPath (string): Directory path with the list of alembic files.
+            staging (gpuCacheStaging.StagingArea): Scratch area the files are converted from and to.
+            options (dict): Conversion options from conversionOptions().
+            onResult (function): Called with the result of each file as soon as it is done.
+        Returns:
+            results (list): Result dictionary for each alembic file.
+    """
+    if staging:
+        stagedFiles = staging.stage(abcFiles)
+    else:
+        stagedFiles = ((abcFilePath, abcFilePath) for abcFilePath in abcFiles)
+
+    options = options or conversionOptions()
+    chunks = gpuCacheFrames.frameChunks(options)
+    results = []
+    for abcFilePath, localPath in stagedFiles:
+        initializeMaya()
+        chunkResults = []
+        for chunk in chunks:
+            if staging:
+                chunkResults.append(convertAlembic(abcFilePath, directoryPath, localPath=localPath,
+                                                   outputRoot=staging.outputRoot, options=options, chunk=chunk))
+            else:
+                chunkResults.append(convertAlembic(abcFilePath, directoryPath, options=options, chunk=chunk))
+        result = chunkResults[0] if chunks == [None] else gpuCacheFrames.mergeChunks(chunkResults, options["stitch"])
+        if staging:
+            staging.release(localPath)
+            staging.outputWritten(result)
+        if onResult:
+            onResult(result)
+        results.append(result)
+
+    return results
+
+def conversionOptions(lodRatios=None, tiles=0, tileMinPolygons=1000000, shading="phong", startTime=1, endTime=None,
+                      step=1, substeps=1, decimate=1, chunkFrames=0, stitch=False, profile=gpuCacheProfiles.DEFAULT_PROFILE):
+    """ Options which change the exported caches, recorded in the manifest.
+        Caches exported with different options are converted again.
+        Args:
+            lodRatios (list): Percentages of the polygons kept in each decimated level of detail, e.g. [25, 5].
+            tiles (int): Number of tiles along the longest side of the split assets, 0 to not split.
+            tileMinPolygons (int): Polygon count above which an asset is split in tiles.
+            shading (string): "phong" assigns one preview phong to everything, "keep" keeps the materials of the alembic,
+                              "palette" maps each material of the alembic to one of a few preview phongs.
+            startTime (float): First frame of the caches.
+            endTime (float): Last frame of the caches, defaults to startTime.
+            step (float): Frames between two samples, below 1 for sub-frame samples.
+            substeps (int): Evaluations of the scene per frame.
+            decimate (int): Keep one sample in N, for preview quality caches.
+            chunkFrames (float): Split the frame range in chunks of this many frames, each exported on its own. 0 to not split.
+            stitch (bool): Join the chunks back into one cache with abcstitcher, instead of a sequence of caches.
+            profile (string): Output profile of the caches, a name of gpuCacheProfiles.PROFILES.
+        Returns:
+            options (dict): Conversion options.
+        Raises:
+            ValueError: On an unknown shading or profile, or frame options which can not be sampled.
+    """
+    if shading not in gpuCacheProfiles.SHADING_MODES:
+        raise ValueError("Unknown shading %s, expected one of %s"%(shading, ", ".join(gpuCacheProfiles.SHADING_MODES)))
+
+    options = {
+        "startTime": startTime,
+        "endTime": startTime if endTime is None else endTime,
+        "step": step,
+        "substeps": substeps,
+        "decimate": decimate,
+        "chunkFrames": chunkFrames,
+        "stitch": stitch,
+        "shader": shading,
+        "profile": profile,
+        "lods": sorted(set(lodRatios or []), reverse=True),
+        "tiles": tiles if tiles > 1 else 0,
+        "tileMinPolygons": tileMinPolygons,
+    }
+    gpuCacheFrames.checkOptions(options)
+    gpuCacheProfiles.profileFlags(profile)
+    if chunkFrames and (options["lods"] or options["tiles"]):
+        raise ValueError("Frame chunks can not be combined with levels of detail or tiles")
+
+    return options
+
+def convertAlembic(abcFilePath, directoryPath, localPath=None, outputRoot=None, options=None, chunk=None):
+    """ Imports an alembic, assigns the preview shader and exports its GPU cache.
+        Expects an empty scene and leaves one, even when the conversion fails.
+        Args:
+            abcFilePath (string): File path of the alembic file.
+            directoryPath (string): Directory path with the list of alembic files.
+            localPath (string): Staged copy of the alembic file to import instead of abcFilePath.
+            outputRoot (string): Directory the gpuCache directories are written to, defaults to directoryPath.
+            options (dict): Conversion options from conversionOptions().
+            chunk (list): Start and end frame of the chunk to export, the whole frame range when None.
+        Returns:
+            result (dict): Source path, cache path, status and error of the conversion,
+                           with the bounds, polygon count, levels of detail and tiles of the asset,
+                           and the timings, byte counts and peak memory of the conversion.
+    """
+    options = options or conversionOptions()
+    result = {
+        "source": abcFilePath,
+        "cache": None,
+        "status": "failed",
+        "error": None,
+        "traceback": None,
+        "failedStage": None,
+        "seconds": None,
+        "stages": {},
+        "inputBytes": gpuCacheReport.fileBytes([localPath or abcFilePath]),
+        "outputBytes": None,
+        "peakRSS": None,
+        "bounds": None,
+        "polygons": None,
+        "lods": [],
+        "tiles": [],
+        "chunk": chunk,
+    }
+    stages = result["stages"]
+    startTime = time.time()
+    try:
+        # Import Alembic
+        with gpuCacheReport.stage(stages, "import"):
+            abcFile, allGeos = importAlembic(localPath or abcFilePath)
+        if not allGeos:
+            raise RuntimeError("No geometry in %s"%abcFile)
+        # Assign the preview shaders
+        with gpuCacheReport.stage(stages, "shader"):
+            assignShaders(allGeos, options["shader"])
+            result["bounds"] = cmds.exactWorldBoundingBox(allGeos)
+            result["polygons"] = cmds.polyEvaluate(allGeos, face=True)
+
+        # Export the levels of detail and the GPU Cache, mirroring the subdirectory of the alembic
+        subDir = os.path.relpath(os.path.dirname(abcFilePath), directoryPath)
+        subDir = subDir if subDir != os.curdir else ""
+        if options["tiles"] and result["polygons"] >= options["tileMinPolygons"]:
+            with gpuCacheReport.stage(stages, "tiles"):
+                result["tiles"] = exportTileCaches(outputRoot or directoryPath, abcFile, allGeos, result["bounds"],
+                                                   options["tiles"], subDir=subDir, options=options)
+        if options["lods"]:
+            with gpuCacheReport.stage(stages, "lods"):
+                result["lods"] = exportLODCaches(outputRoot or directoryPath, abcFile, allGeos, options["lods"], subDir=subDir,
+                                                 options=options)
+        cacheName = gpuCacheFrames.chunkName(os.path.splitext(abcFile)[0], chunk)
+        with gpuCacheReport.stage(stages, "export"):
+            gpuCacheDir = exportGPUCache(outputRoot or directoryPath, abcFile, allGeos, subDir=subDir, options=options,
+                                         chunk=chunk)
+        result["cache"] = os.path.join(gpuCacheDir, cacheName + ".abc")
+        result["status"] = "ok"
+
+    except Exception as e:
+        result["error"] = str(e)
+        result["traceback"] = traceback.format_exc()
+        failedStages = [name for name in stages if stages[name].get("failed")]
+        result["failedStage"] = failedStages[0] if failedStages else None
+
+    # Clear scene, also after a failure so nothing leaks into the next asset
+    try:
+        with gpuCacheReport.stage(stages, "clear"):
+            resetScene()
+    except Exception as e:
+        print("Could not reset the scene after %s: %s"%(abcFilePath, e))
+
+    result["seconds"] = round(time.time() - startTime, 3)
+    result["outputBytes"] = gpuCacheReport.fileBytes(
+        [result["cache"]] + [output["cache"] for output in result["lods"] + result["tiles"]])
+    result["peakRSS"] = gpuCacheReport.peakRSS()
+
+    return result
 
 #=================================================================#
 # Utils
 #=================================================================#
+def initializeMaya():
+    """ Initializes Maya in batch mode with undo disabled, and loads the alembic and gpuCache plugins.
+        Does nothing if Maya was already initialized by this process.
+    """
+    global _mayaInitialized
+    if _mayaInitialized:
+        return
+    _mayaInitialized = True
+
+    # Initialize Maya in batch mode
+    import maya.standalone
+    maya.standalone.initialize()
+
+    # Nothing is undone in batch, the undo queue would only hold on to every deleted scene
+    cmds.undoInfo(state=False)
+
+    # Load Plugin
+    cmds.loadPlugin("gpuCache.so", quiet=True)
+    cmds.loadPlugin("AbcImport.so", quiet=True)
+    cmds.loadPlugin("AbcExport.so", quiet=True)
+
 def findAlembicFiles(directoryPath):
     """ Finds all alembic files from the provided directory
         Args:
@@ -83,30 +620,67 @@ def findAlembicFiles(directoryPath):
         Returns:
             abcFileList (list): List of alembic file paths from the provided directory.
     """
-	# Find Alembic files
-	abcFileList = []
-	# Check path and find alembic files
-	files = [f for f in os.listdir(directoryPath) if os.path.isfile(os.path.join(directoryPath, f))]
-	for abcFile in files:
-		if abcFile.lower().endswith('.abc'):
-			abcFileList.append(os.path.join(directoryPath, abcFile))
+    # Find Alembic files
+    abcFileList = list(alembicScan.iterAlembicFiles(directoryPath))
 
-	return abcFileList
+    return abcFileList
 
-def creatPhongShader():
+def creatPhongShader(name="phongShader", color=None):
     """ Creates a phongShader
+        Args:
+            name (string): Name of the shader, its shading group gets the SG suffix.
+            color (tuple): RGB color of the shader, Maya's default when None.
         Returns:
             phongShader (string): shadingNode
             phongShaderSG (string): shadingGroup
     """
-	# Create Phong Shader for preview
-	phongShader = cmds.shadingNode('phong', asShader=True, name='phongShader')
-	phongShaderSG = cmds.sets(name='phongShaderSG', empty=True, renderable=True, noSurfaceShader=True)
-	cmds.connectAttr('%s.outColor'%phongShader, '%s.surfaceShader'%phongShaderSG)
-	cmds.setAttr('%s.cosinePower'%phongShader, 50)
-	cmds.setAttr('%s.specularColor'%phongShader, 0.182, 0.182, 0.182, type="double3")
+    # Create Phong Shader for preview
+    phongShader = cmds.shadingNode('phong', asShader=True, name=name)
+    phongShaderSG = cmds.sets(name=name + 'SG', empty=True, renderable=True, noSurfaceShader=True)
+    cmds.connectAttr('%s.outColor'%phongShader, '%s.surfaceShader'%phongShaderSG)
+    cmds.setAttr('%s.cosinePower'%phongShader, 50)
+    cmds.setAttr('%s.specularColor'%phongShader, 0.182, 0.182, 0.182, type="double3")
+    if color:
+        cmds.setAttr('%s.color'%phongShader, color[0], color[1], color[2], type="double3")
+
+    return phongShader, phongShaderSG
+
+def assignShaders(allGeos, shading="phong"):
+    """ Assigns the preview shaders to the imported geos, with one sets call per shading group.
+        Args:
+            allGeos (list): Transforms of the imported geometry.
+            shading (string): "phong", "keep" or "palette", see conversionOptions().
+    """
+    if shading == "keep":
+        return
+
+    if shading == "phong":
+        phongShader, phongShaderSG = creatPhongShader()
+        cmds.sets(allGeos, e=True, forceElement=phongShaderSG)
+        return
+
+    # Palette: the members of each material go to the palette shader picked by its name
+    shapes = cmds.listRelatives(allGeos, shapes=True, fullPath=True) or []
+    paletteMembers = {}
+    for material in sorted(set(cmds.listConnections(shapes, type="shadingEngine") or [])):
+        members = cmds.sets(material, query=True)
+        if members:
+            paletteMembers.setdefault(paletteIndex(material), []).extend(members)
+
+    for index, members in sorted(paletteMembers.items()):
+        phongShader, phongShaderSG = creatPhongShader("previewShader%d"%index, PREVIEW_PALETTE[index])
+        cmds.sets(members, e=True, forceElement=phongShaderSG)
+
+def paletteIndex(material):
+    """ Picks the palette shader of a material, the same for every asset using the material name.
+        Args:
+            material (string): Name of the shading group.
+        Returns:
+            index (int): Index in PREVIEW_PALETTE.
+    """
+    name = material.rsplit(":", 1)[-1]
 
-	return phongShader, phongShaderSG
+    return (zlib.crc32(name.encode("utf-8")) & 0xffffffff) % len(PREVIEW_PALETTE)
 
 def importAlembic(abcFilePath):
     """ Imports the alembic into the scene.
@@ -115,82 +689,507 @@ def importAlembic(abcFilePath):
             abcFilePath (string): File path of the alembic file.
         Returns:
             abcFile (string): Name of the alembic file.
+            allGeos (list): Transforms of the imported geometry, only the nodes of this import.
     """
-	# Import Alembic
-	abcFile = os.path.basename(abcFilePath)
-	print("\nImporting %s"%abcFile)
-	importedAbc = cmds.file(abcFilePath, type="Alembic", i=True, rnn=True)
-	cmds.rename(cmds.ls(importedAbc, type="transform"), os.path.splitext(abcFile)[0])
+    # Import Alembic
+    abcFile = os.path.basename(abcFilePath)
+    print("\nImporting %s"%abcFile)
+    importedAbc = cmds.file(abcFilePath, type="Alembic", i=True, rnn=True)
 
-	return abcFile
+    # Track the imported shapes by uuid, the rename changes their paths
+    shapeIds = cmds.ls(importedAbc, geometry=True, uuid=True) or []
+    cmds.rename(cmds.ls(importedAbc, type="transform"), os.path.splitext(abcFile)[0])
 
-def exportGPUCache(dirPath, abcFile, allGeos):
+    allGeos = []
+    for transform in cmds.listRelatives(cmds.ls(shapeIds, long=True), parent=True, fullPath=True) if shapeIds else []:
+        if transform not in allGeos:
+            allGeos.append(transform)
+
+    return abcFile, allGeos
+
+def exportGPUCache(dirPath, abcFile, allGeos, subDir="", options=None, chunk=None):
     """ Exports GPU cache for the alembic file.
-        Deletes all geos in the scene.
         Args:
             dirPath (string): Directory path with the list of alembic files.
             abcFile (string): Name of the alembic file.
             allGeos (list): List of geometry objects in the scene.
+            subDir (string): Subdirectory of the alembic file, mirrored in the gpuCache directory.
+            options (dict): Conversion options with the frame range, sampling and profile, frame 1 only when None.
+            chunk (list): Start and end frame of the chunk to export, named after it, or None for the whole range.
         Returns:
             gpuCacheDir (string): Path of the GPU Cache directory.
     """
-	# Export GPU Cache + Clear scene
-	print("\nExporting GPU cache for %s"%abcFile)
-	gpuCacheDir = os.path.join(dirPath, "gpuCache")
-	if os.path.isdir(gpuCacheDir) == False:
-		os.mkdir(gpuCacheDir, 0775)
+    # Export GPU Cache + Clear scene
+    print("\nExporting GPU cache for %s"%abcFile)
+    gpuCacheDir = os.path.join(dirPath, "gpuCache", subDir)
+    makeDirectory(gpuCacheDir)
+
+    cacheName = gpuCacheFrames.chunkName(os.path.splitext(abcFile)[0], chunk)
+    cmds.gpuCache(allGeos, fileName=cacheName, directory=gpuCacheDir, **cacheFlags(options, chunk))
+
+    return gpuCacheDir
+
+def resetScene():
+    """ Replaces the scene with a new empty one.
+        Drops the imported nodes, the shader and anything else the last asset left behind.
+    """
+    cmds.file(new=True, force=True)
+    cmds.flushUndo()
+
+def cacheFlags(options=None, chunk=None):
+    """ Frame range, sampling and output profile flags of the gpuCache command.
+        Args:
+            options (dict): Conversion options with the frame range, sampling and profile, frame 1 only when None.
+            chunk (list): Start and end frame of a chunk, the whole range when None.
+        Returns:
+            flags (dict): gpuCache keyword arguments.
+    """
+    if options is None:
+        flags = {"startTime": 1, "endTime": 1}
+    else:
+        flags = gpuCacheFrames.sampleFlags(options, chunk)
+    flags.update(gpuCacheProfiles.profileFlags((options or {}).get("profile", gpuCacheProfiles.DEFAULT_PROFILE)))
+
+    return flags
+
+def exportLODCaches(dirPath, abcFile, allGeos, lodRatios, subDir="", options=None):
+    """ Exports decimated levels of detail of the geos to the gpuCacheLOD directory.
+        Args:
+            dirPath (string): Directory path with the list of alembic files.
+            abcFile (string): Name of the alembic file.
+            allGeos (list): List of geometry objects in the scene.
+            lodRatios (list): Percentages of the polygons kept in each level.
+            subDir (string): Subdirectory of the alembic file, mirrored in the gpuCacheLOD directory.
+            options (dict): Conversion options with the frame range, sampling and profile, frame 1 only when None.
+        Returns:
+            lods (list): Ratio, cache path and polygon count of each level.
+    """
+    lodDir = os.path.join(dirPath, gpuCacheScene.LOD_DIRECTORY, subDir)
+    makeDirectory(lodDir)
+
+    lods = []
+    for ratio in lodRatios:
+        lodName = "%s_lod%s"%(os.path.splitext(abcFile)[0], ratio)
+        lodGeos = cmds.duplicate(allGeos, rr=True)
+        for mesh in cmds.listRelatives(lodGeos, allDescendents=True, type="mesh", fullPath=True) or []:
+            cmds.polyReduce(mesh, version=1, percentage=100 - ratio, constructionHistory=False)
+        polygons = cmds.polyEvaluate(lodGeos, face=True)
+        print("Exporting %s%% level of detail for %s, %s polygons"%(ratio, abcFile, polygons))
+
+        cmds.gpuCache(lodGeos, fileName=lodName, directory=lodDir, **cacheFlags(options))
+        cmds.delete(lodGeos)
+        lods.append({"ratio": ratio, "cache": os.path.join(lodDir, lodName + ".abc"), "polygons": polygons})
+
+    return lods
+
+def exportTileCaches(dirPath, abcFile, allGeos, bounds, tiles, subDir="", options=None):
+    """ Splits the geos in a grid of cubic tiles and exports each tile to the gpuCacheTiles directory.
+        Each face goes to the tile holding its center, empty tiles are skipped.
+        Args:
+            dirPath (string): Directory path with the list of alembic files.
+            abcFile (string): Name of the alembic file.
+            allGeos (list): List of geometry objects in the scene.
+            bounds (list): World bounding box of the geos.
+            tiles (int): Number of tiles along the longest side of the bounds.
+            subDir (string): Subdirectory of the alembic file, mirrored in the gpuCacheTiles directory.
+            options (dict): Conversion options with the frame range, sampling and profile, frame 1 only when None.
+        Returns:
+            tiles (list): Cell, cache path, bounds and polygon count of each tile.
+    """
+    assetName = os.path.splitext(abcFile)[0]
+    tileDir = os.path.join(dirPath, gpuCacheRegions.TILE_DIRECTORY, subDir, assetName)
+    makeDirectory(tileDir)
+
+    # Bucket the faces of every mesh by tile, in one pass
+    origin, cellSize, counts = gpuCacheRegions.tileGrid(bounds, tiles)
+    cellFaces = {}
+    meshes = cmds.listRelatives(allGeos, allDescendents=True, type="mesh", fullPath=True) or []
+    for mesh in meshes:
+        if cmds.getAttr("%s.intermediateObject"%mesh):
+            continue
+        for faceId, center in enumerate(faceCenters(mesh)):
+            cell = gpuCacheRegions.tileCell(center, origin, cellSize, counts)
+            cellFaces.setdefault(cell, {}).setdefault(mesh, []).append(faceId)
 
-	cmds.gpuCache(allGeos, st=1, et=1, wm=True, fileName=os.path.splitext(abcFile)[0], directory=gpuCacheDir, smf=False)
+    tileList = []
+    for cell in sorted(cellFaces):
+        tileName = "%s_tile_%d_%d_%d"%((assetName,) + cell)
+        tileGeos = []
+        for mesh, faceIds in sorted(cellFaces[cell].items()):
+            transform = cmds.duplicate(cmds.listRelatives(mesh, parent=True, fullPath=True)[0], rr=True)[0]
+            tileMesh = cmds.listRelatives(transform, shapes=True, noIntermediate=True, type="mesh", fullPath=True)[0]
+            keep = set(faceIds)
+            removed = [i for i in range(cmds.polyEvaluate(tileMesh, face=True)) if i not in keep]
+            if removed:
+                cmds.delete(faceRanges(tileMesh, removed))
+            tileGeos.append(transform)
 
-	cmds.select(allGeos)
-	cmds.delete()
+        polygons = cmds.polyEvaluate(tileGeos, face=True)
+        tileBounds = cmds.exactWorldBoundingBox(tileGeos)
+        cmds.gpuCache(tileGeos, fileName=tileName, directory=tileDir, **cacheFlags(options))
+        cmds.delete(tileGeos)
+        tileList.append({"cell": list(cell), "cache": os.path.join(tileDir, tileName + ".abc"),
+                         "bounds": tileBounds, "polygons": polygons})
 
-	return gpuCacheDir
+    print("Exported %d tiles for %s"%(len(tileList), abcFile))
 
-def importGPUCache(gpuCacheDir):
+    return tileList
+
+def faceCenters(mesh):
+    """ Yields the world space center of each face of a mesh.
+        Args:
+            mesh (string): Mesh shape.
+        Yields:
+            center (tuple): x, y, z of the face center, in face index order.
+    """
+    selection = om.MSelectionList()
+    selection.add(mesh)
+    iterator = om.MItMeshPolygon(selection.getDagPath(0))
+    while not iterator.isDone():
+        center = iterator.center(om.MSpace.kWorld)
+        yield (center.x, center.y, center.z)
+        iterator.next()
+
+def faceRanges(mesh, faceIds):
+    """ Compacts sorted face indices into face range components.
+        Args:
+            mesh (string): Mesh shape.
+            faceIds (list): Sorted face indices.
+        Returns:
+            components (list): Components like mesh.f[0:99].
+    """
+    components = []
+    start = previous = faceIds[0]
+    for faceId in faceIds[1:]:
+        if faceId != previous + 1:
+            components.append("%s.f[%d:%d]"%(mesh, start, previous))
+            start = faceId
+        previous = faceId
+    components.append("%s.f[%d:%d]"%(mesh, start, previous))
+
+    return components
+
+def makeDirectory(directoryPath):
+    """ Creates a directory and its parents, if they do not exist yet.
+        Args:
+            directoryPath (string): Path of the directory.
+    """
+    if os.path.isdir(directoryPath) == False:
+        try:
+            os.makedirs(directoryPath, 0o775)
+        except OSError:
+            # Another worker created it first
+            if not os.path.isdir(directoryPath):
+                raise
+
+def importGPUCache(gpuCacheDir, caches=None, deferred=False):
     """ Imports GPU Caches from the provided directory.
+        Caches with levels of detail are imported as a lodGroup switching on the distance to the camera.
+        Tiled caches are imported as a group with one gpuCache per tile.
+        Caches exported in chunks are imported as a sequence, each chunk only visible during its frames.
+        Caches with bounds get a bounding box placeholder, shown while they are unloaded.
         Args:
             gpuCacheDir (string): Path of the GPU Cache directory.
+            caches (list): Cache dictionaries from gpuCacheScene.collectCaches(), instead of walking gpuCacheDir.
+            deferred (bool): Leave the caches with bounds unloaded, see gpuCacheRegions to load them.
     """
-	# Find all GPU Cache files
-	gpuCacheList = []
-	if os.path.isdir(gpuCacheDir):
-		try:
-			for root, dirs, files in os.walk(gpuCacheDir):
-				for abcFile in files:
-					if abcFile.lower().endswith('.abc'):
-						gpuCacheList.append(os.path.join(root, abcFile))
-					else:
-						print("No alembics found")
-
-		except:
-			print("Invalid Path")
-
-	print gpuCacheList
-	print "-"*30
-    
+    # Find all GPU Cache files
+    if caches is None:
+        gpuCacheList = []
+        if os.path.isdir(gpuCacheDir):
+            try:
+                for root, dirs, files in os.walk(gpuCacheDir):
+                    for abcFile in files:
+                        if abcFile.lower().endswith('.abc'):
+                            gpuCacheList.append(os.path.join(root, abcFile))
+                        else:
+                            print("No alembics found")
+
+            except:
+                print("Invalid Path")
+
+        caches = [{"name": os.path.splitext(os.path.basename(path))[0], "path": path} for path in gpuCacheList]
+
+    print([cache["path"] for cache in caches])
+    print("-"*30)
+
     # Import GPU Cache
-	for cacheFilePath in gpuCacheList:
-		cacheFile = os.path.basename(cacheFilePath)
-		print("Importing %s"%cacheFile)
-		cmds.createNode("gpuCache", n=os.path.splitext(cacheFile)[0])
-		cmds.setAttr("%s.cacheFileName"%os.path.splitext(cacheFile)[0], cacheFilePath, type="string")
+    qualityNode = None
+    for cache in caches:
+        print("Importing %s"%os.path.basename(cache["path"]))
+        if cache.get("lods"):
+            if qualityNode is None:
+                qualityNode = createLODQualityNode()
+            createLODGroup(cache, qualityNode, deferred)
+        else:
+            createFullResolution(cache, cmds.createNode("transform", n=cache["name"]), deferred)
+
+def createLODQualityNode():
+    """ Creates the node holding the global quality knob of the levels of detail.
+        Returns:
+            qualityNode (string): Name of the node, its quality attribute scales all the switch distances.
+    """
+    qualityNode = cmds.createNode("transform", n=gpuCacheScene.LOD_QUALITY_NODE)
+    cmds.addAttr(qualityNode, longName="quality", attributeType="double", defaultValue=1.0, minValue=0.0, keyable=True)
+
+    return qualityNode
+
+def createLODGroup(cache, qualityNode, deferred=False):
+    """ Creates a lodGroup with one gpuCache per level of detail, the full resolution first.
+        Args:
+            cache (dict): Cache dictionary with its levels of detail.
+            qualityNode (string): Node with the quality attribute scaling the switch distances.
+            deferred (bool): Leave the caches with bounds unloaded.
+        Returns:
+            lodGroup (string): Name of the lodGroup.
+    """
+    lodGroup = cmds.createNode("lodGroup", n=cache["name"])
+    for ratio, path in gpuCacheScene.lodLevels(cache):
+        transform = cmds.createNode("transform", n="%s_lod%s"%(cache["name"], ratio), p=lodGroup)
+        if ratio == 100:
+            createFullResolution(cache, transform, deferred)
+        else:
+            createGPUCacheNode(transform, path, cache.get("bounds"), deferred)
+
+    for index, distance in enumerate(gpuCacheScene.lodThresholds(cache)):
+        scaled = cmds.createNode("multDoubleLinear", n="%s_threshold%d"%(cache["name"], index))
+        cmds.setAttr("%s.input1"%scaled, distance)
+        cmds.connectAttr("%s.quality"%qualityNode, "%s.input2"%scaled)
+        cmds.connectAttr("%s.output"%scaled, "%s.threshold[%d]"%(lodGroup, index))
+
+    if cmds.objExists(gpuCacheScene.LOD_CAMERA):
+        cmds.connectAttr("%s.worldMatrix[0]"%gpuCacheScene.LOD_CAMERA, "%s.cameraMatrix"%lodGroup)
+
+    return lodGroup
+
+def createFullResolution(cache, transform, deferred=False):
+    """ Creates the full resolution of a cache, one gpuCache per tile for the tiled caches
+        and one per chunk, keyed visible during its frames, for the caches exported in chunks.
+        Args:
+            cache (dict): Cache dictionary.
+            transform (string): Transform the caches are parented to.
+            deferred (bool): Leave the caches with bounds unloaded.
+    """
+    if cache.get("chunks"):
+        for index, chunk in enumerate(cache["chunks"]):
+            chunkTransform = cmds.createNode("transform", n=chunk["name"], p=transform)
+            createGPUCacheNode(chunkTransform, chunk["path"], cache.get("bounds"), deferred)
+            for frame, visibility in gpuCacheFrames.visibilityKeys(cache["chunks"], index):
+                cmds.setKeyframe(chunkTransform, attribute="visibility", time=frame, value=visibility)
+            cmds.keyTangent(chunkTransform, attribute="visibility", outTangentType="step")
+        return
+
+    if not cache.get("tiles"):
+        createGPUCacheNode(transform, cache["path"], cache.get("bounds"), deferred)
+        return
+
+    for tile in cache["tiles"]:
+        tileTransform = cmds.createNode("transform", n=tile["name"], p=transform)
+        createGPUCacheNode(tileTransform, tile["path"], tile["bounds"], deferred)
+
+def createGPUCacheNode(transform, path, bounds=None, deferred=False):
+    """ Creates a gpuCache shape. With bounds, also records its path and bounds for gpuCacheRegions
+        and adds the bounding box placeholder shown while it is unloaded.
+        Args:
+            transform (string): Transform of the gpuCache.
+            path (string): Path of the cache.
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax of the cache, or None.
+            deferred (bool): Leave the cache unloaded.
+        Returns:
+            gpuCacheNode (string): Name of the gpuCache shape.
+    """
+    gpuCacheNode = cmds.createNode("gpuCache", n=transform + "Shape", p=transform)
+    if not bounds:
+        cmds.setAttr("%s.cacheFileName"%gpuCacheNode, path, type="string")
+        return gpuCacheNode
+
+    cmds.addAttr(gpuCacheNode, longName=gpuCacheRegions.TILE_ATTRIBUTE, dataType="string")
+    cmds.addAttr(gpuCacheNode, longName=gpuCacheRegions.BOUNDS_ATTRIBUTE, dataType="doubleArray")
+    cmds.setAttr("%s.%s"%(gpuCacheNode, gpuCacheRegions.TILE_ATTRIBUTE), path, type="string")
+    cmds.setAttr("%s.%s"%(gpuCacheNode, gpuCacheRegions.BOUNDS_ATTRIBUTE), bounds, type="doubleArray")
+    cmds.setAttr("%s.cacheFileName"%gpuCacheNode, "" if deferred else path, type="string")
+
+    center, size = gpuCacheRegions.boxCenterSize(bounds)
+    placeholder = cmds.createNode("transform", n=transform + gpuCacheRegions.PLACEHOLDER_SUFFIX, p=transform)
+    cmds.setAttr("%s.translate"%placeholder, *center)
+    cmds.setAttr("%s.visibility"%placeholder, deferred)
+    placeholderShape = cmds.createNode("implicitBox", n=placeholder + "Shape", p=placeholder)
+    cmds.setAttr("%s.size"%placeholderShape, *size)
+
+    return gpuCacheNode
 
 def saveScene(dirPath):
     """ Saves the maya scene.
         Args:
             dirPath (string): Directory path with the list of alembic files.
     """
-	# Save MayaScene
-	mayaFileName = "gpuCacheFile_" + getpass.getuser() + ".ma"
-	cmds.file(rename=os.path.join(dirPath, mayaFileName))
-	cmds.file(save=True, type="mayaAscii")
+    # Save MayaScene
+    mayaFilePath = gpuCacheScene.sceneFilePath(dirPath)
+    cmds.file(rename=mayaFilePath)
+    cmds.file(save=True, type="mayaAscii")
+
+    print("\nMaya Scene saved to below path")
+    print(mayaFilePath)
+    print("="*30)
+
+def printResults(results):
+    """ Prints the per file conversion results.
+        Args:
+            results (list): Result dictionary for each alembic file.
+    """
+    failed = [result for result in results if result["status"] != "ok"]
+    print("\nConverted %d of %d alembic files"%(len(results) - len(failed), len(results)))
+    for result in failed:
+        print("FAILED %s (%s): %s"%(result["source"], result.get("failedStage") or "-", result["error"]))
+    print("="*30)
+
+#=================================================================#
+# Worker
+#=================================================================#
+def runWorker(directoryPath, outputRoot=None, options=None):
+    """ Worker loop started by gpuCacheWorkers.
+        Reads one json line per alembic file or chunk from stdin, with its source, local path and chunk,
+        and writes one result line per file to stdout, with the resident memory of the worker after it.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            outputRoot (string): Directory the gpuCache directories are written to, defaults to directoryPath.
+            options (dict): Conversion options from conversionOptions().
+    """
+    initializeMaya()
 
-	print "\nMaya Scene saved to below path"
-	print os.path.join(dirPath, mayaFileName)
-	print "="*30
+    for line in iter(sys.stdin.readline, ''):
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        result = convertAlembic(request["source"], directoryPath, localPath=request["local"], outputRoot=outputRoot,
+                                options=options, chunk=request.get("chunk"))
+        result["workerRSS"] = gpuCacheReport.currentRSS()
+        sys.stdout.write(gpuCacheWorkers.RESULT_PREFIX + json.dumps(result) + "\n")
+        sys.stdout.flush()
 
 #=================================================================#
 # Execution
 #=================================================================#
-exportImportGPUCache(directoryPath)
+def parseArgs(argv):
+    """ Parses the command line arguments.
+        Args:
+            argv (list): Command line arguments without the script name.
+        Returns:
+            args (argparse.Namespace): Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Export GPU caches for a directory of alembic files.")
+    parser.add_argument("directoryPath", help="Directory path with the list of alembic files.")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of worker mayapy processes.")
+    parser.add_argument("--mayapy", default=None, help="mayapy executable for the workers. Defaults to the current interpreter.")
+    parser.add_argument("--hash", action="store_true", help="Also key the alembic files on a hash of their content.")
+    parser.add_argument("--force", action="store_true", help="Convert every alembic file, ignoring the manifest.")
+    parser.add_argument("--fast-assembly", action="store_true", help="Write the gpu cache scene without Maya.")
+    parser.add_argument("--schedule", choices=["largest", "discovery"], default="largest",
+                        help="Convert the most expensive files first, or in the order they are found.")
+    parser.add_argument("--cost-model", default=None, help="Json cost model written by alembicScan.py --fit.")
+    alembicScan.addScanArguments(parser)
+    gpuCacheStaging.addStagingArguments(parser)
+    parser.add_argument("--lods", default=None,
+                        help="Comma separated percentages of polygons kept in extra levels of detail, e.g. 25,5.")
+    parser.add_argument("--tiles", type=int, default=0,
+                        help="Split the heavy assets in a grid of N tiles along their longest side, each its own gpu cache.")
+    parser.add_argument("--tile-min-polygons", type=int, default=1000000,
+                        help="Polygon count above which an asset is split in tiles.")
+    parser.add_argument("--deferred", action="store_true",
+                        help="Save the scene with the caches unloaded, as bounding boxes loaded with gpuCacheRegions.")
+    parser.add_argument("--shading", choices=gpuCacheProfiles.SHADING_MODES, default="phong",
+                        help="One preview phong, keep the alembic materials, or map them to a palette of preview phongs.")
+    parser.add_argument("--max-rss", type=float, default=None,
+                        help="Restart a worker once its resident memory is over this many GB. Uses a worker even with 1 job.")
+    parser.add_argument("--start", type=float, default=1, help="First frame of the caches.")
+    parser.add_argument("--end", type=float, default=None, help="Last frame of the caches, defaults to the first one.")
+    parser.add_argument("--step", type=float, default=1, help="Frames between two samples, e.g. 0.5 with --substeps 2 for half frames.")
+    parser.add_argument("--substeps", type=int, default=1, help="Evaluations of the scene per frame, for sub-frame samples.")
+    parser.add_argument("--decimate", type=int, default=1, help="Keep one sample in N, for preview quality caches.")
+    parser.add_argument("--chunk-frames", type=float, default=0,
+                        help="Split the frame range in chunks of this many frames, converted by separate workers.")
+    parser.add_argument("--stitch", action="store_true",
+                        help="Join the chunks into one cache with abcstitcher, otherwise they are assembled as a sequence.")
+    parser.add_argument("--profile", choices=sorted(gpuCacheProfiles.PROFILES), default=gpuCacheProfiles.DEFAULT_PROFILE,
+                        help="Output profile: hierarchy optimization, materials, UVs and data format of the caches.")
+    parser.add_argument("--merged", action="store_true",
+                        help="Export all the alembics into one cache for the directory instead of one per alembic.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running, converting the alembics dropped in the directory and refreshing its scene.")
+    parser.add_argument("--watch-dir", action="append", default=[], help="Another directory to watch, repeatable.")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="Seconds the size and modification time of a dropped file must stay the same.")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between two checks of the watched directories.")
+    parser.add_argument("--polling", action="store_true", help="Poll the directories even where inotify is available.")
+    parser.add_argument("--shard", default=None,
+                        help="Convert only shard I of N of the alembic files, e.g. 3/50 on the third of 50 farm nodes.")
+    parser.add_argument("--merge-shards", action="store_true",
+                        help="Merge the journals of the finished shards into the manifest and save the scene of all of them.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output-root", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--options", default=None, help=argparse.SUPPRESS)
+
+    return parser.parse_args(argv)
+
+def parseRatios(text):
+    """ Parses a comma separated list of percentages.
+        Args:
+            text (string): Percentages, e.g. "25,5", or None.
+        Returns:
+            ratios (list): Percentages as numbers, ints when whole.
+    """
+    ratios = []
+    for value in (text or "").split(","):
+        if value.strip():
+            ratio = float(value)
+            if not 0 < ratio < 100:
+                raise ValueError("Level of detail percentages must be between 0 and 100, got %s"%value)
+            ratios.append(int(ratio) if ratio.is_integer() else ratio)
+
+    return ratios
+
+def frameOptions(args):
+    """ Builds the frame arguments of conversionOptions() from the command line.
+        Args:
+            args (argparse.Namespace): Parsed arguments.
+        Returns:
+            frameOptions (dict): startTime, endTime, step, substeps, decimate, chunkFrames and stitch.
+    """
+    return {
+        "startTime": args.start,
+        "endTime": args.end,
+        "step": args.step,
+        "substeps": args.substeps,
+        "decimate": args.decimate,
+        "chunkFrames": args.chunk_frames,
+        "stitch": args.stitch,
+    }
+
+if __name__ == "__main__":
+    args = parseArgs(sys.argv[1:])
+    if args.worker:
+        runWorker(args.directoryPath, args.output_root, json.loads(args.options) if args.options else None)
+    elif args.merge_shards:
+        mergeShards(args.directoryPath, fastAssembly=args.fast_assembly, deferred=args.deferred, scanOptions=alembicScan.scanOptions(args))
+    else:
+        runArgs = dict(jobs=args.jobs, mayapy=args.mayapy, useHash=args.hash, force=args.force,
+                       fastAssembly=args.fast_assembly, largestFirst=args.schedule == "largest",
+                       costModel=alembicScan.loadCostModel(args.cost_model), scanOptions=alembicScan.scanOptions(args),
+                       stagingOptions=gpuCacheStaging.stagingOptions(args),
+                       options=conversionOptions(parseRatios(args.lods), args.tiles, args.tile_min_polygons, args.shading,
+                                                 profile=args.profile, **frameOptions(args)),
+                       deferred=args.deferred, maxRSS=int(args.max_rss * (1 << 30)) if args.max_rss else None,
+                       merged=args.merged, shard=gpuCacheJournal.parseShard(args.shard))
+        if not args.watch:
+            exportImportGPUCache(args.directoryPath, **runArgs)
+        else:
+            if args.shard:
+                raise ValueError("Watch mode converts the whole directory, it can not run a shard")
+            if args.merged:
+                raise ValueError("Watch mode only converts the dropped files, it can not rebuild the merged cache of the directory")
+            # Only the dropped files are converted, the scene is written without Maya to refresh it in seconds
+            runArgs.update(fastAssembly=True, force=False, largestFirst=False)
+            gpuCacheWatch.watch([args.directoryPath] + args.watch_dir,
+                                lambda directoryPath, abcFileList: exportImportGPUCache(directoryPath, abcFileList=abcFileList, **runArgs),
+                                settleSeconds=args.settle, pollInterval=args.poll, scanOptions=alembicScan.scanOptions(args),
+                                polling=args.polling, deferred=args.deferred)
@@ -0,0 +1,177 @@
+""" GPU Cache Client
+    Description:
+                 - Command line client submitting conversion jobs to a running gpuCacheDaemon.py.
+                 - Runs with any python, no Maya needed, the daemon keeps Maya and the plugins loaded between jobs.
+
+    Usage:
+                 python gpuCacheClient.py <directoryPath> [--files FILE ...] [--socket PATH] [--hash] [--force] [--jobs N] [--fast-assembly]
+                                         [--schedule largest|discovery] [--cost-model FILE]
+                                         [--recursive] [--max-depth N] [--include GLOB] [--exclude GLOB]
+                                         [--scratch DIR] [--prefetch K] [--scratch-limit GB]
+                                         [--lods 25,5] [--tiles N] [--tile-min-polygons N] [--deferred] [--max-rss GB] [--shading MODE]
+                                         [--start F] [--end F] [--step F] [--substeps N] [--decimate N] [--chunk-frames F] [--stitch]
+                                         [--profile NAME] [--merged]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import getpass
+import json
+import os
+import socket
+import sys
+import time
+
+import alembicScan
+import gpuCacheProfiles
+import gpuCacheStaging
+
+DEFAULT_SOCKET = os.path.join("/tmp", "exportGPUCache-%s.sock"%getpass.getuser())
+
+#=================================================================#
+# Protocol
+#=================================================================#
+def sendMessage(connection, message):
+    """ Sends a message as one line of json.
+        Args:
+            connection (socket.socket): Connected socket.
+            message (dict): Message to send.
+    """
+    connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+def receiveMessage(connection):
+    """ Receives one line of json.
+        Args:
+            connection (socket.socket): Connected socket.
+        Returns:
+            message (dict): Received message, None if the connection closed first.
+    """
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(65536)
+        if not chunk:
+            return None
+        data += chunk
+
+    return json.loads(data.decode("utf-8"))
+
+#=================================================================#
+# Client
+#=================================================================#
+def submitJob(job, socketPath=DEFAULT_SOCKET, connectTimeout=30.0):
+    """ Sends a job to the daemon and waits for it to finish.
+        Retries the connection while the daemon is recycling itself.
+        Args:
+            job (dict): Job with the directory and optional file list and options.
+            socketPath (string): Unix socket of the daemon.
+            connectTimeout (float): Seconds to keep retrying the connection.
+        Returns:
+            response (dict): Status, results and scene path of the job.
+    """
+    deadline = time.time() + connectTimeout
+    while True:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(socketPath)
+            break
+        except socket.error:
+            connection.close()
+            if time.time() > deadline:
+                raise RuntimeError("No gpuCacheDaemon listening on %s"%socketPath)
+            time.sleep(0.5)
+
+    try:
+        sendMessage(connection, job)
+        response = receiveMessage(connection)
+    finally:
+        connection.close()
+
+    if response is None:
+        raise RuntimeError("gpuCacheDaemon closed the connection before answering")
+
+    return response
+
+#=================================================================#
+# Execution
+#=================================================================#
+def main(argv):
+    """ Submits the job described by the command line and prints its results.
+        Args:
+            argv (list): Command line arguments without the script name.
+        Returns:
+            exitCode (int): 0 if every alembic file was converted.
+    """
+    parser = argparse.ArgumentParser(description="Submit a gpu cache conversion job to gpuCacheDaemon.py.")
+    parser.add_argument("directoryPath", help="Directory path with the list of alembic files.")
+    parser.add_argument("--files", nargs="+", default=None, help="Only convert these alembic files.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket of the daemon.")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of worker mayapy processes.")
+    parser.add_argument("--hash", action="store_true", help="Also key the alembic files on a hash of their content.")
+    parser.add_argument("--force", action="store_true", help="Convert every alembic file, ignoring the manifest.")
+    parser.add_argument("--schedule", choices=["largest", "discovery"], default="largest",
+                        help="Convert the most expensive files first, or in the order they are found.")
+    parser.add_argument("--cost-model", default=None, help="Json cost model written by alembicScan.py --fit.")
+    alembicScan.addScanArguments(parser)
+    gpuCacheStaging.addStagingArguments(parser)
+    parser.add_argument("--fast-assembly", action="store_true", help="Write the gpu cache scene without Maya.")
+    parser.add_argument("--lods", default=None, help="Comma separated percentages of polygons kept in extra levels of detail.")
+    parser.add_argument("--tiles", type=int, default=0, help="Split the heavy assets in a grid of N tiles along their longest side.")
+    parser.add_argument("--tile-min-polygons", type=int, default=1000000, help="Polygon count above which an asset is split in tiles.")
+    parser.add_argument("--deferred", action="store_true", help="Save the scene with the caches unloaded, as bounding boxes.")
+    parser.add_argument("--max-rss", type=float, default=None,
+                        help="Restart a worker of the daemon once its resident memory is over this many GB.")
+    parser.add_argument("--shading", choices=gpuCacheProfiles.SHADING_MODES, default="phong",
+                        help="One preview phong, keep the alembic materials, or map them to a palette of preview phongs.")
+    parser.add_argument("--start", type=float, default=1, help="First frame of the caches.")
+    parser.add_argument("--end", type=float, default=None, help="Last frame of the caches, defaults to the first one.")
+    parser.add_argument("--step", type=float, default=1, help="Frames between two samples.")
+    parser.add_argument("--substeps", type=int, default=1, help="Evaluations of the scene per frame, for sub-frame samples.")
+    parser.add_argument("--decimate", type=int, default=1, help="Keep one sample in N, for preview quality caches.")
+    parser.add_argument("--chunk-frames", type=float, default=0, help="Split the frame range in chunks of this many frames.")
+    parser.add_argument("--stitch", action="store_true", help="Join the chunks into one cache with abcstitcher.")
+    parser.add_argument("--profile", choices=sorted(gpuCacheProfiles.PROFILES), default=gpuCacheProfiles.DEFAULT_PROFILE,
+                        help="Output profile of the caches, see gpuCacheProfiles.py --list.")
+    parser.add_argument("--merged", action="store_true", help="Export all the alembics into one cache for the directory.")
+    args = parser.parse_args(argv)
+
+    job = {
+        "directory": os.path.abspath(args.directoryPath),
+        "files": [os.path.abspath(f) for f in args.files] if args.files else None,
+        "jobs": args.jobs,
+        "hash": args.hash,
+        "force": args.force,
+        "fastAssembly": args.fast_assembly,
+        "schedule": args.schedule,
+        "costModel": os.path.abspath(args.cost_model) if args.cost_model else None,
+        "scan": alembicScan.scanOptions(args),
+        "staging": gpuCacheStaging.stagingOptions(args),
+        "lods": args.lods,
+        "tiles": args.tiles,
+        "tileMinPolygons": args.tile_min_polygons,
+        "deferred": args.deferred,
+        "maxRSS": int(args.max_rss * (1 << 30)) if args.max_rss else None,
+        "shading": args.shading,
+        "frames": {"startTime": args.start, "endTime": args.end, "step": args.step, "substeps": args.substeps,
+                   "decimate": args.decimate, "chunkFrames": args.chunk_frames, "stitch": args.stitch},
+        "profile": args.profile,
+        "merged": args.merged,
+    }
+    response = submitJob(job, args.socket)
+
+    if response["status"] != "ok":
+        print("Job failed: %s"%response["error"])
+        return 1
+
+    failed = [result for result in response["results"] if result["status"] != "ok"]
+    print("Converted %d of %d alembic files"%(len(response["results"]) - len(failed), len(response["results"])))
+    for result in failed:
+        print("FAILED %s: %s"%(result["source"], result["error"]))
+    if response.get("scene"):
+        print("Maya Scene: %s"%response["scene"])
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
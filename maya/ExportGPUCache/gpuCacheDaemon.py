@@ -0,0 +1,144 @@
+""" GPU Cache Daemon
+    Description:
+                 - Keeps a Maya session with the gpuCache and alembic plugins loaded, and converts the jobs
+                   sent by gpuCacheClient.py over a local unix socket.
+                 - Resets the scene between jobs and restarts itself after a number of jobs, or once its memory
+                   is over a ceiling, to release memory.
+
+    Usage:
+                 mayapy gpuCacheDaemon.py [--socket PATH] [--max-jobs N] [--max-rss GB]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import os
+import socket
+import sys
+
+import alembicScan
+import exportGPUCache
+import gpuCacheClient
+import gpuCacheProfiles
+import gpuCacheReport
+import gpuCacheScene
+
+#=================================================================#
+# Daemon
+#=================================================================#
+def serve(socketPath, maxJobs, maxRSS=None):
+    """ Converts the jobs received on the socket, one at a time.
+        Args:
+            socketPath (string): Unix socket to listen on.
+            maxJobs (int): Number of jobs after which the daemon restarts itself. 0 never restarts.
+            maxRSS (int): Resident memory in bytes above which the daemon restarts itself after a job.
+    """
+    exportGPUCache.initializeMaya()
+
+    server = bindSocket(socketPath)
+    print("gpuCacheDaemon listening on %s"%socketPath)
+
+    jobCount = 0
+    try:
+        while maxJobs <= 0 or jobCount < maxJobs:
+            connection, address = server.accept()
+            try:
+                job = gpuCacheClient.receiveMessage(connection)
+                if job is None:
+                    continue
+                gpuCacheClient.sendMessage(connection, runJob(job))
+            except socket.error as e:
+                print("Lost client: %s"%e)
+            finally:
+                connection.close()
+                exportGPUCache.resetScene()
+            jobCount += 1
+            rss = gpuCacheReport.currentRSS()
+            if maxRSS and rss and rss > maxRSS:
+                print("gpuCacheDaemon using %s, over the %s ceiling"%(gpuCacheReport.formatBytes(rss), gpuCacheReport.formatBytes(maxRSS)))
+                break
+    finally:
+        server.close()
+        os.remove(socketPath)
+
+    # Recycle: start over in a fresh process with the same arguments
+    print("gpuCacheDaemon restarting after %d jobs"%jobCount)
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+def bindSocket(socketPath):
+    """ Binds the listening socket, removing the socket file of a dead daemon.
+        Args:
+            socketPath (string): Unix socket to listen on.
+        Returns:
+            server (socket.socket): Listening socket.
+    """
+    if os.path.exists(socketPath):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socketPath)
+            raise RuntimeError("A gpuCacheDaemon is already listening on %s"%socketPath)
+        except socket.error:
+            os.remove(socketPath)
+        finally:
+            probe.close()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socketPath)
+    server.listen(16)
+
+    return server
+
+def runJob(job):
+    """ Runs one conversion job.
+        Args:
+            job (dict): Job sent by gpuCacheClient.
+        Returns:
+            response (dict): Status, results and scene path of the job.
+    """
+    directoryPath = job["directory"]
+    print("\nJob %s"%directoryPath)
+    try:
+        results = exportGPUCache.exportImportGPUCache(
+            directoryPath,
+            jobs=job.get("jobs", 1),
+            useHash=job.get("hash", False),
+            force=job.get("force", False),
+            abcFileList=job.get("files"),
+            fastAssembly=job.get("fastAssembly", False),
+            largestFirst=job.get("schedule", "largest") == "largest",
+            costModel=alembicScan.loadCostModel(job.get("costModel")),
+            scanOptions=job.get("scan"),
+            stagingOptions=job.get("staging"),
+            options=exportGPUCache.conversionOptions(exportGPUCache.parseRatios(job.get("lods")), job.get("tiles", 0),
+                                                    job.get("tileMinPolygons", 1000000),
+                                                    shading=job.get("shading", "phong"), profile=job.get("profile", gpuCacheProfiles.DEFAULT_PROFILE),
+                                                    **job.get("frames", {})),
+            deferred=job.get("deferred", False),
+            maxRSS=job.get("maxRSS"),
+            merged=job.get("merged", False),
+        )
+    except Exception as e:
+        return {"status": "error", "error": str(e), "results": [], "scene": None}
+
+    scenePath = gpuCacheScene.sceneFilePath(directoryPath)
+
+    return {
+        "status": "ok",
+        "error": None,
+        "results": results,
+        "scene": scenePath if os.path.isfile(scenePath) else None,
+    }
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve gpu cache conversion jobs from a warm Maya session.")
+    parser.add_argument("--socket", default=gpuCacheClient.DEFAULT_SOCKET, help="Unix socket to listen on.")
+    parser.add_argument("--max-jobs", type=int, default=50, help="Restart the daemon after this many jobs, 0 never restarts.")
+    parser.add_argument("--max-rss", type=float, default=None, help="Restart the daemon once its resident memory is over this many GB.")
+    args = parser.parse_args()
+
+    serve(args.socket, args.max_jobs, int(args.max_rss * (1 << 30)) if args.max_rss else None)
@@ -0,0 +1,253 @@
+""" GPU Cache Frames
+    Description:
+                 - Frame ranges of the animated gpu caches exported by exportGPUCache.py.
+                 - Turns the start, end, step, substeps and decimate options into gpuCache sampling flags.
+                 - Splits long ranges in chunks converted by separate workers, each chunk its own cache.
+                 - Joins the chunks back into one cache with abcstitcher when it is installed, otherwise they
+                   are assembled as a sequence: one gpuCache per chunk, each visible during its own frames.
+
+    Usage:
+                 python gpuCacheFrames.py --start 1 --end 2000 --chunk-frames 250 [--step 1] [--substeps 1] [--decimate 1]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import os
+import subprocess
+
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+# Alembic tool joining caches with the same hierarchy and consecutive samples
+STITCHER = "abcstitcher"
+
+# Out tangent type of the stepped visibility keys in Maya ASCII
+STEP_TANGENT = 5
+
+#=================================================================#
+# Sampling
+#=================================================================#
+def sampleInterval(options):
+    """ Frames between two samples written to the cache.
+        Args:
+            options (dict): Conversion options.
+        Returns:
+            interval (float): step times decimate.
+    """
+    return options["step"] * options["decimate"]
+
+def sampleFlags(options, chunk=None):
+    """ Sampling flags of the gpuCache command.
+        The scene is evaluated substeps times per frame and one evaluation in sampleMultiplier is written.
+        Args:
+            options (dict): Conversion options.
+            chunk (list): Start and end frame of a chunk, the whole range when None.
+        Returns:
+            flags (dict): startTime, endTime, simulationRate and sampleMultiplier.
+    """
+    start, end = chunk or (options["startTime"], options["endTime"])
+
+    return {
+        "startTime": start,
+        "endTime": end,
+        "simulationRate": 1.0 / options["substeps"],
+        "sampleMultiplier": int(round(sampleInterval(options) * options["substeps"])),
+    }
+
+def sampleCount(options, chunk=None):
+    """ Number of samples written to a cache.
+        Args:
+            options (dict): Conversion options.
+            chunk (list): Start and end frame of a chunk, the whole range when None.
+        Returns:
+            samples (int): Sample count.
+    """
+    start, end = chunk or (options["startTime"], options["endTime"])
+
+    return int((end - start) / sampleInterval(options) + 1e-6) + 1
+
+def checkOptions(options):
+    """ Validates the frame options.
+        Args:
+            options (dict): Conversion options.
+        Raises:
+            ValueError: When the options can not be sampled as asked.
+    """
+    if options["endTime"] < options["startTime"]:
+        raise ValueError("End frame %s is before start frame %s"%(options["endTime"], options["startTime"]))
+    if options["step"] <= 0 or options["substeps"] < 1 or options["decimate"] < 1:
+        raise ValueError("Step must be positive, substeps and decimate at least 1")
+    multiplier = sampleInterval(options) * options["substeps"]
+    if abs(multiplier - round(multiplier)) > 1e-6:
+        raise ValueError("Step %s does not fall on the %s substeps of a frame"%(options["step"], options["substeps"]))
+    chunkSamples = options["chunkFrames"] / sampleInterval(options)
+    if options["chunkFrames"] and abs(chunkSamples - round(chunkSamples)) > 1e-6:
+        raise ValueError("Chunks of %s frames do not hold a whole number of samples"%options["chunkFrames"])
+
+#=================================================================#
+# Chunks
+#=================================================================#
+def frameChunks(options):
+    """ Splits the frame range in chunks of chunkFrames frames.
+        Chunks do not share samples: each one ends a sample before the next one starts.
+        Args:
+            options (dict): Conversion options.
+        Returns:
+            chunks (list): [start, end] of each chunk, a single None when the range is not split.
+    """
+    start, end = options["startTime"], options["endTime"]
+    chunkFrames = options["chunkFrames"]
+    if not chunkFrames or end - start < chunkFrames:
+        return [None]
+
+    chunks = []
+    chunkStart = start
+    while chunkStart <= end + 1e-6:
+        chunkEnd = min(end, chunkStart + chunkFrames - sampleInterval(options))
+        chunks.append([chunkStart, chunkEnd])
+        chunkStart += chunkFrames
+
+    return chunks
+
+def chunkName(assetName, chunk):
+    """ Cache name of a chunk.
+        Args:
+            assetName (string): Name of the asset.
+            chunk (list): Start and end frame of the chunk, or None.
+        Returns:
+            name (string): e.g. asset_f0001_0250, the asset name when chunk is None.
+    """
+    if chunk is None:
+        return assetName
+
+    return "%s_f%s_%s"%(assetName, formatFrame(chunk[0]), formatFrame(chunk[1]))
+
+def formatFrame(frame):
+    """ Formats a frame for a file name.
+        Args:
+            frame (float): Frame number.
+        Returns:
+            text (string): Zero padded frame, with p for the decimal point of sub-frames, e.g. 0012 or 0012p5.
+    """
+    if float(frame).is_integer():
+        return "%04d"%frame
+
+    return ("%09.4f"%frame).rstrip("0").replace(".", "p")
+
+def mergeChunks(chunkResults, stitch=False):
+    """ Combines the results of the chunks of an alembic file into the result of the file.
+        Args:
+            chunkResults (list): Result of each chunk, in frame order.
+            stitch (bool): Join the chunk caches into one cache with abcstitcher, when it is installed.
+        Returns:
+            result (dict): Result of the file. Its cache is the stitched cache or the first chunk,
+                           and chunks lists the start, end and cache of every chunk.
+    """
+    result = dict(chunkResults[0])
+    result["chunk"] = None
+    result["seconds"] = round(sum(chunk.get("seconds") or 0 for chunk in chunkResults), 3)
+    result["outputBytes"] = sum(chunk.get("outputBytes") or 0 for chunk in chunkResults)
+    result["stages"] = {}
+    for chunk in chunkResults:
+        for name, timing in (chunk.get("stages") or {}).items():
+            stage = result["stages"].setdefault(name, {"seconds": 0.0, "peakRSS": None})
+            stage["seconds"] = round(stage["seconds"] + timing["seconds"], 3)
+            stage["peakRSS"] = max(stage["peakRSS"], timing.get("peakRSS")) if stage["peakRSS"] else timing.get("peakRSS")
+
+    failed = [chunk for chunk in chunkResults if chunk["status"] != "ok"]
+    if failed:
+        result.update({
+            "status": "failed",
+            "cache": None,
+            "chunks": [],
+            "error": "; ".join("frames %s-%s: %s"%(tuple(chunk["chunk"] or ["?", "?"]) + (chunk["error"],)) for chunk in failed),
+            "traceback": failed[0].get("traceback"),
+            "failedStage": failed[0].get("failedStage"),
+        })
+        return result
+
+    result["chunks"] = [{"start": chunk["chunk"][0], "end": chunk["chunk"][1], "cache": chunk["cache"]} for chunk in chunkResults]
+    bounds = [chunk["bounds"] for chunk in chunkResults if chunk.get("bounds")]
+    if bounds:
+        result["bounds"] = [min(box[i] for box in bounds) for i in range(3)] + [max(box[i] for box in bounds) for i in range(3, 6)]
+
+    if stitch:
+        assetName = os.path.splitext(os.path.basename(result["source"]))[0]
+        stitchedPath = os.path.join(os.path.dirname(result["cache"]), assetName + ".abc")
+        if stitchCaches([chunk["cache"] for chunk in result["chunks"]], stitchedPath):
+            for chunk in result["chunks"]:
+                os.remove(chunk["cache"])
+            result["cache"] = stitchedPath
+            result["chunks"] = []
+            result["outputBytes"] = os.path.getsize(stitchedPath)
+
+    return result
+
+def stitchCaches(cachePaths, outputPath):
+    """ Joins caches with consecutive samples into one, with abcstitcher.
+        Args:
+            cachePaths (list): Chunk caches, in frame order.
+            outputPath (string): Path of the joined cache.
+        Returns:
+            stitched (bool): False when abcstitcher is not installed or failed, the chunks are then kept.
+    """
+    stitcher = which(STITCHER)
+    if stitcher is None:
+        print("%s not found, keeping the chunks as a sequence"%STITCHER)
+        return False
+
+    tempPath = os.path.join(os.path.dirname(outputPath), ".stitching_" + os.path.basename(outputPath))
+    try:
+        subprocess.check_call([stitcher, tempPath] + list(cachePaths))
+    except (subprocess.CalledProcessError, OSError) as e:
+        print("Could not stitch %s: %s"%(outputPath, e))
+        if os.path.isfile(tempPath):
+            os.remove(tempPath)
+        return False
+    os.rename(tempPath, outputPath)
+
+    return True
+
+#=================================================================#
+# Sequence
+#=================================================================#
+def visibilityKeys(chunks, index):
+    """ Stepped visibility keys showing one chunk of a sequence during its own frames.
+        The first chunk also shows before the range and the last one after it.
+        Args:
+            chunks (list): Chunk dictionaries with start and end, in frame order.
+            index (int): Index of the chunk.
+        Returns:
+            keys (list): (frame, visibility) tuples.
+    """
+    keys = []
+    if index > 0:
+        keys.append((chunks[0]["start"], 0))
+    keys.append((chunks[index]["start"], 1))
+    if index < len(chunks) - 1:
+        keys.append((chunks[index + 1]["start"], 0))
+
+    return keys
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the chunks and sampling flags of a frame range.")
+    parser.add_argument("--start", type=float, default=1, help="First frame.")
+    parser.add_argument("--end", type=float, default=None, help="Last frame, defaults to the first one.")
+    parser.add_argument("--step", type=float, default=1, help="Frames between two samples, below 1 for sub-frame samples.")
+    parser.add_argument("--substeps", type=int, default=1, help="Evaluations per frame.")
+    parser.add_argument("--decimate", type=int, default=1, help="Keep one sample in N.")
+    parser.add_argument("--chunk-frames", type=float, default=0, help="Frames per chunk, 0 for a single chunk.")
+    args = parser.parse_args()
+
+    frameOptions = {"startTime": args.start, "endTime": args.start if args.end is None else args.end, "step": args.step,
+                    "substeps": args.substeps, "decimate": args.decimate, "chunkFrames": args.chunk_frames}
+    checkOptions(frameOptions)
+    for chunk in frameChunks(frameOptions):
+        print("%-24s %6d samples  %s"%(chunkName("asset", chunk), sampleCount(frameOptions, chunk), sampleFlags(frameOptions, chunk)))
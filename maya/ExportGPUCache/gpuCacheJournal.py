@@ -0,0 +1,356 @@
+""" GPU Cache Journal
+    Description:
+                 - Append-only journal of the assets converted by exportGPUCache.py, one json line per asset,
+                   written as soon as the asset is done. A run that crashes keeps every asset finished before
+                   the crash, and the next run resumes from the journal instead of converting them again.
+                 - Splits the alembic files of a directory in shards for farm nodes, --shard i/n. The shard of a file
+                   only depends on its path relative to the directory, so every node agrees on it whatever the
+                   order or mount point it lists the files in.
+                 - Each shard has its own journal in the output directory. --merge-shards reads them all into the
+                   manifest and assembles the single scene.
+
+    Usage:
+                 python gpuCacheJournal.py <directoryPath>            # Completed and failed assets of each journal
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+JOURNAL_FILE = "gpuCacheJournal.jsonl"
+SHARD_JOURNAL_FILE = "gpuCacheJournal.%dof%d.jsonl"
+
+#=================================================================#
+# Shards
+#=================================================================#
+def parseShard(text):
+    """ Parses a shard argument.
+        Args:
+            text (string): "i/n", i from 1 to n, or None.
+        Returns:
+            shard (tuple): (index, count), None when text is None.
+        Raises:
+            ValueError: When the text is not a valid shard.
+    """
+    if text is None:
+        return None
+    try:
+        index, count = [int(value) for value in text.split("/")]
+    except ValueError:
+        raise ValueError("Shards are written i/n, e.g. 3/50, got %s"%text)
+    if not 1 <= index <= count:
+        raise ValueError("Shard index must be between 1 and %d, got %d"%(count, index))
+
+    return index, count
+
+def shardOf(relativePath, count):
+    """ Shard of an alembic file.
+        Args:
+            relativePath (string): Path of the file relative to the directory, with forward slashes.
+            count (int): Number of shards.
+        Returns:
+            index (int): Shard from 1 to count.
+    """
+    digest = hashlib.md5(relativePath.encode("utf-8")).hexdigest()
+
+    return int(digest[:12], 16) % count + 1
+
+def iterShard(abcFiles, directoryPath, shard):
+    """ Yields the alembic files of a shard.
+        Args:
+            abcFiles (iterable): Alembic file paths, a list or a generator.
+            directoryPath (string): Directory path with the list of alembic files.
+            shard (tuple): (index, count), or None for every file.
+        Yields:
+            abcFilePath (string): Path of an alembic file of the shard.
+    """
+    for abcFilePath in abcFiles:
+        if shard is None or shardOf(relativePath(directoryPath, abcFilePath), shard[1]) == shard[0]:
+            yield abcFilePath
+
+#=================================================================#
+# Journal
+#=================================================================#
+class GPUCacheJournal(object):
+    """ Journal of the assets converted in a directory, or in one shard of it.
+    """
+    def __init__(self, directoryPath, shard=None):
+        """ Loads the records of the journal, if there is one.
+            Args:
+                directoryPath (string): Directory path with the list of alembic files.
+                shard (tuple): (index, count) of the shard, None for the whole directory.
+        """
+        self.directoryPath = directoryPath
+        self.shard = shard
+        fileName = SHARD_JOURNAL_FILE%shard if shard else JOURNAL_FILE
+        self.journalPath = os.path.join(directoryPath, fileName)
+        self.records = readJournal(self.journalPath)
+        self.lock = threading.Lock()
+
+    def record(self, result, sourceKey, options):
+        """ Appends the outcome of an asset, synced to disk before returning.
+            Args:
+                result (dict): Result of the conversion, with the final cache paths.
+                sourceKey (dict): Key of the alembic file taken before the conversion.
+                options (dict): Conversion options used.
+        """
+        record = {
+            "source": relativePath(self.directoryPath, result["source"]),
+            "sourceKey": sourceKey,
+            "options": options,
+            "status": result["status"],
+            "time": time.time(),
+            "result": relativeResult(self.directoryPath, result),
+        }
+        with self.lock:
+            self.append(record)
+            self.records[record["source"]] = record
+
+    def completed(self, abcFilePath, sourceKey, options):
+        """ Result of an asset already converted by an earlier run, from the same file with the same options.
+            Args:
+                abcFilePath (string): File path of the alembic file.
+                sourceKey (dict): Current key of the file.
+                options (dict): Conversion options of this run.
+            Returns:
+                result (dict): Result of the earlier conversion with absolute paths,
+                               None when the asset must be converted.
+        """
+        record = self.records.get(relativePath(self.directoryPath, abcFilePath))
+        if record is None or record["status"] != "ok" or record["options"] != options or record["sourceKey"] != sourceKey:
+            return None
+        result = absoluteResult(self.directoryPath, record["result"])
+        if not all(os.path.isfile(cachePath) for cachePath in resultCaches(result)):
+            return None
+
+        return result
+
+    def finish(self):
+        """ Marks the end of a shard run, so the merge step can tell it from a node lost mid-run.
+        """
+        with self.lock:
+            self.append({"finished": time.time()})
+
+    def append(self, entry):
+        """ Appends one line to the journal and syncs it to disk.
+            A line cut by a crash is ended first, so it does not swallow the new one.
+            Args:
+                entry (dict): Written as one json line.
+        """
+        with open(self.journalPath, "ab") as journalFile:
+            if journalFile.tell() and not _endsWithNewline(self.journalPath):
+                journalFile.write(b"\n")
+            journalFile.write((json.dumps(entry, sort_keys=True) + "\n").encode("utf-8"))
+            journalFile.flush()
+            os.fsync(journalFile.fileno())
+
+    def remove(self):
+        """ Deletes the journal once its records are in the manifest.
+        """
+        if os.path.isfile(self.journalPath):
+            os.remove(self.journalPath)
+        self.records = {}
+
+def readJournal(journalPath):
+    """ Reads the records of a journal, the last one of each asset.
+        A line cut by a crash is skipped.
+        Args:
+            journalPath (string): Path of the journal.
+        Returns:
+            records (dict): Relative source path -> record.
+    """
+    records = {}
+    if not os.path.isfile(journalPath):
+        return records
+    with open(journalPath) as journalFile:
+        for line in journalFile:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print("Skipping an incomplete line of %s"%journalPath)
+                continue
+            if "source" in record:
+                records[record["source"]] = record
+
+    return records
+
+def isFinished(journalPath):
+    """ Checks if the run writing a journal got to its end.
+        Args:
+            journalPath (string): Path of the journal.
+        Returns:
+            finished (bool): True when the last line is the end marker written by GPUCacheJournal.finish().
+    """
+    lastLine = ""
+    with open(journalPath) as journalFile:
+        for line in journalFile:
+            if line.strip():
+                lastLine = line
+    try:
+        return "finished" in json.loads(lastLine)
+    except ValueError:
+        return False
+
+def missingShards(journalPaths):
+    """ Lists the shards without a finished journal, from the shard counts found in the journal names.
+        Args:
+            journalPaths (list): Paths from shardJournals().
+        Returns:
+            missing (list): (index, count) of each shard which never ran, or stopped before its end.
+    """
+    finished = set()
+    counts = set()
+    for journalPath in journalPaths:
+        shard = journalShard(journalPath)
+        if shard is None:
+            continue
+        counts.add(shard[1])
+        if isFinished(journalPath):
+            finished.add(shard)
+
+    return [(index, count) for count in sorted(counts) for index in range(1, count + 1) if (index, count) not in finished]
+
+def journalShard(journalPath):
+    """ Shard of a journal, from its name.
+        Args:
+            journalPath (string): Path of the journal.
+        Returns:
+            shard (tuple): (index, count), None for the journal of an unsharded run.
+    """
+    parts = os.path.basename(journalPath).split(".")
+    if len(parts) != 3 or "of" not in parts[1]:
+        return None
+    try:
+        return tuple(int(value) for value in parts[1].split("of"))
+    except ValueError:
+        return None
+
+def shardJournals(directoryPath):
+    """ Lists the journals of the shards of a directory, and of an unsharded run.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+        Returns:
+            journalPaths (list): Paths of the journals.
+    """
+    if not os.path.isdir(directoryPath):
+        return []
+
+    return [os.path.join(directoryPath, name) for name in sorted(os.listdir(directoryPath))
+            if name.startswith("gpuCacheJournal") and name.endswith(".jsonl")]
+
+def mergedRecords(journalPaths):
+    """ Reads several journals, keeping the latest record of each asset.
+        Args:
+            journalPaths (list): Paths of the journals.
+        Returns:
+            records (dict): Relative source path -> record.
+    """
+    records = {}
+    for journalPath in journalPaths:
+        for source, record in readJournal(journalPath).items():
+            if source not in records or record["time"] > records[source]["time"]:
+                records[source] = record
+
+    return records
+
+#=================================================================#
+# Utils
+#=================================================================#
+def _endsWithNewline(filePath):
+    """ Checks the last byte of a file.
+        Args:
+            filePath (string): Path of a non empty file.
+        Returns:
+            endsWithNewline (bool): True when the file ends with a new line.
+    """
+    with open(filePath, "rb") as readFile:
+        readFile.seek(-1, os.SEEK_END)
+        return readFile.read(1) == b"\n"
+
+def relativePath(directoryPath, path):
+    """ Path relative to the directory, with forward slashes.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            path (string): Path inside the directory.
+        Returns:
+            relativePath (string): Relative path.
+    """
+    return os.path.relpath(path, directoryPath).replace(os.sep, "/")
+
+def resultCaches(result):
+    """ Cache paths of a result: its cache, levels of detail, tiles and frame chunks.
+        Args:
+            result (dict): Result of a conversion.
+        Returns:
+            cachePaths (list): Paths, as found in the result.
+    """
+    outputs = [result] + result.get("lods", []) + result.get("tiles", []) + result.get("chunks", [])
+
+    return [output["cache"] for output in outputs if output.get("cache")]
+
+def relativeResult(directoryPath, result):
+    """ Copy of a result with the paths relative to the directory, so nodes with other mount points can read it.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            result (dict): Result of a conversion.
+        Returns:
+            result (dict): Copy without the traceback.
+    """
+    return _mapPaths(result, lambda path: relativePath(directoryPath, path))
+
+def absoluteResult(directoryPath, result):
+    """ Copy of a journaled result with absolute paths.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            result (dict): Result from relativeResult().
+        Returns:
+            result (dict): Copy with the paths joined to the directory.
+    """
+    return _mapPaths(result, lambda path: os.path.join(directoryPath, *path.split("/")))
+
+def _mapPaths(result, mapPath):
+    """ Copies a result, mapping its source and cache paths.
+        Args:
+            result (dict): Result of a conversion.
+            mapPath (function): Maps one path.
+        Returns:
+            result (dict): Mapped copy, without the traceback.
+    """
+    mapped = dict(result)
+    mapped.pop("traceback", None)
+    mapped["source"] = mapPath(result["source"])
+    if result.get("cache"):
+        mapped["cache"] = mapPath(result["cache"])
+    for key in ("lods", "tiles", "chunks"):
+        mapped[key] = []
+        for output in result.get(key) or []:
+            output = dict(output)
+            output["cache"] = mapPath(output["cache"])
+            mapped[key].append(output)
+
+    return mapped
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the assets recorded in the journals of a directory.")
+    parser.add_argument("directoryPath", help="Directory path with the list of alembic files.")
+    args = parser.parse_args()
+
+    journalPaths = shardJournals(args.directoryPath)
+    for journalPath in journalPaths:
+        records = list(readJournal(journalPath).values())
+        failed = [record for record in records if record["status"] != "ok"]
+        print("%-32s %6d completed %6d failed%s"%(os.path.basename(journalPath), len(records) - len(failed), len(failed),
+                                                  "" if isFinished(journalPath) else "  (not finished)"))
+        for record in failed:
+            print("  FAILED %s: %s"%(record["source"], record["result"].get("error")))
+    for index, count in missingShards(journalPaths):
+        print("Shard %d/%d has not finished"%(index, count))
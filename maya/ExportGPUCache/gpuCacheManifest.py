@@ -0,0 +1,221 @@
+""" GPU Cache Manifest
+    Description:
+                 - Records which gpu cache was produced from which alembic file, and with which options.
+                 - Each source alembic is keyed on its size, mtime and optionally a content hash.
+                 - Lets exportGPUCache.py skip the alembics which did not change since the last run
+                   and prune the caches whose source alembic was deleted.
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = "gpuCacheManifest.json"
+MANIFEST_VERSION = 1
+
+class GPUCacheManifest(object):
+    """ Manifest stored next to the gpuCache directory.
+    """
+    def __init__(self, directoryPath, useHash=False):
+        """ Loads the manifest of the directory if there is one.
+            Args:
+                directoryPath (string): Directory path with the list of alembic files.
+                useHash (bool): Also key the sources on a hash of their content.
+        """
+        self.directoryPath = directoryPath
+        self.manifestPath = os.path.join(directoryPath, MANIFEST_FILE)
+        self.useHash = useHash
+        self.entries = {}
+
+        if os.path.isfile(self.manifestPath):
+            try:
+                with open(self.manifestPath) as manifestFile:
+                    data = json.load(manifestFile)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.entries = data.get("entries", {})
+            except ValueError:
+                print("Ignoring unreadable manifest %s"%self.manifestPath)
+
+    #----------------------------------------#
+    # Keys
+    #----------------------------------------#
+    def relativePath(self, abcFilePath):
+        """ Path relative to the directory, the manifest key of an alembic file.
+            Args:
+                abcFilePath (string): File path of the alembic or cache file.
+            Returns:
+                relativePath (string): Relative path with forward slashes.
+        """
+        return os.path.relpath(abcFilePath, self.directoryPath).replace(os.sep, "/")
+
+    def sourceKey(self, abcFilePath):
+        """ Builds the key of an alembic file.
+            Args:
+                abcFilePath (string): File path of the alembic file.
+            Returns:
+                sourceKey (dict): Size, mtime and hash (None unless useHash) of the file.
+        """
+        stat = os.stat(abcFilePath)
+        return {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": hashFile(abcFilePath) if self.useHash else None,
+        }
+
+    #----------------------------------------#
+    # Queries
+    #----------------------------------------#
+    def isUpToDate(self, abcFilePath, sourceKey, options):
+        """ Checks if the cache of an alembic file can be reused.
+            Args:
+                abcFilePath (string): File path of the alembic file.
+                sourceKey (dict): Current key of the file, from sourceKey().
+                options (dict): Conversion options of this run.
+            Returns:
+                upToDate (bool): True if the file, the options and the cache are unchanged.
+        """
+        entry = self.entries.get(self.relativePath(abcFilePath))
+        if entry is None or entry.get("options") != options:
+            return False
+        if entry["size"] != sourceKey["size"] or entry["mtime"] != sourceKey["mtime"]:
+            return False
+        # An entry written without hash cannot vouch for the content
+        if self.useHash and entry.get("hash") != sourceKey["hash"]:
+            return False
+
+        return all(os.path.isfile(cacheFilePath) for cacheFilePath in self.cachePaths(entry))
+
+    def iterChanged(self, abcFiles, options, force=False, unchanged=None):
+        """ Yields the alembic files to convert as they come, skipping the up to date ones.
+            Args:
+                abcFiles (iterable): Alembic file paths, a list or a generator.
+                options (dict): Conversion options of this run.
+                force (bool): Convert every file.
+                unchanged (list): Filled with the alembic file paths whose cache is up to date.
+            Yields:
+                abcFilePath (string): Path of an alembic file to convert.
+                sourceKey (dict): Key of that file, from sourceKey().
+        """
+        for abcFilePath in abcFiles:
+            sourceKey = self.sourceKey(abcFilePath)
+            if not force and self.isUpToDate(abcFilePath, sourceKey, options):
+                if unchanged is not None:
+                    unchanged.append(abcFilePath)
+            else:
+                yield abcFilePath, sourceKey
+
+    #----------------------------------------#
+    # Updates
+    #----------------------------------------#
+    def update(self, abcFilePath, sourceKey, result, options):
+        """ Records the caches produced for an alembic file.
+            Deletes the caches of its previous entry the new one no longer uses, e.g. the chunks of a stitched range.
+            Args:
+                abcFilePath (string): File path of the alembic file.
+                sourceKey (dict): Key of the file taken before the conversion.
+                result (dict): Result of the conversion, with the cache path, bounds, polygons, levels of detail,
+                               tiles and frame chunks.
+                options (dict): Conversion options used.
+        """
+        entry = dict(sourceKey)
+        entry["cache"] = self.relativePath(result["cache"])
+        entry["bounds"] = result.get("bounds")
+        entry["polygons"] = result.get("polygons")
+        entry["lods"] = []
+        for lod in result.get("lods", []):
+            lod = dict(lod)
+            lod["cache"] = self.relativePath(lod["cache"])
+            entry["lods"].append(lod)
+        entry["tiles"] = []
+        for tile in result.get("tiles", []):
+            tile = dict(tile)
+            tile["cache"] = self.relativePath(tile["cache"])
+            entry["tiles"].append(tile)
+        entry["chunks"] = []
+        for chunk in result.get("chunks", []):
+            chunk = dict(chunk)
+            chunk["cache"] = self.relativePath(chunk["cache"])
+            entry["chunks"].append(chunk)
+        entry["tileIndex"] = self.relativePath(result["tileIndex"]) if result.get("tileIndex") else None
+        entry["options"] = options
+
+        previous = self.entries.get(self.relativePath(abcFilePath))
+        if previous:
+            cachePaths = self.cachePaths(entry)
+            for cacheFilePath in self.cachePaths(previous):
+                if cacheFilePath not in cachePaths and os.path.isfile(cacheFilePath):
+                    os.remove(cacheFilePath)
+        self.entries[self.relativePath(abcFilePath)] = entry
+
+    def cachePaths(self, entry):
+        """ Paths of all the files written for an entry.
+            Args:
+                entry (dict): Manifest entry.
+            Returns:
+                cachePaths (list): Absolute paths of the cache, its levels of detail, its tiles and their index,
+                                   and its frame chunks.
+        """
+        cachePaths = []
+        for cache in [entry] + entry.get("lods", []) + entry.get("tiles", []) + entry.get("chunks", []):
+            cachePath = os.path.join(self.directoryPath, cache["cache"])
+            if cachePath not in cachePaths:
+                cachePaths.append(cachePath)
+        if entry.get("tileIndex"):
+            cachePaths.append(os.path.join(self.directoryPath, entry["tileIndex"]))
+
+        return cachePaths
+
+    def remove(self, abcFilePath):
+        """ Forgets an alembic file, so it is converted again on the next run.
+            Args:
+                abcFilePath (string): File path of the alembic file.
+        """
+        self.entries.pop(self.relativePath(abcFilePath), None)
+
+    def prune(self, abcFileList):
+        """ Deletes the caches whose source alembic is gone and drops their entries.
+            Args:
+                abcFileList (list): Alembic file paths found in this run.
+            Returns:
+                pruned (list): Paths of the deleted cache files.
+        """
+        found = set(self.relativePath(abcFilePath) for abcFilePath in abcFileList)
+        pruned = []
+        for relativePath in list(self.entries):
+            if relativePath in found or os.path.isfile(os.path.join(self.directoryPath, relativePath)):
+                continue
+            for cacheFilePath in self.cachePaths(self.entries.pop(relativePath)):
+                if os.path.isfile(cacheFilePath):
+                    os.remove(cacheFilePath)
+                    pruned.append(cacheFilePath)
+
+        return pruned
+
+    def save(self):
+        """ Writes the manifest, replacing the previous one in a single rename.
+        """
+        tempPath = self.manifestPath + ".tmp"
+        with open(tempPath, "w") as manifestFile:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, manifestFile, indent=1, sort_keys=True)
+        os.rename(tempPath, self.manifestPath)
+
+#=================================================================#
+# Utils
+#=================================================================#
+def hashFile(filePath, blockSize=1 << 20):
+    """ Hashes the content of a file.
+        Args:
+            filePath (string): Path of the file.
+            blockSize (int): Size of the blocks read at a time.
+        Returns:
+            digest (string): sha1 hex digest of the content.
+    """
+    sha1 = hashlib.sha1()
+    with open(filePath, "rb") as hashedFile:
+        for block in iter(lambda: hashedFile.read(blockSize), b""):
+            sha1.update(block)
+
+    return sha1.hexdigest()
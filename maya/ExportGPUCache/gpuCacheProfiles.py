@@ -0,0 +1,244 @@
+""" GPU Cache Profiles
+    Description:
+                 - Named output profiles of the gpu caches exported by exportGPUCache.py --profile.
+                 - Each profile sets the hierarchy optimization, optimization threshold, material and UV writing
+                   and data format flags of the gpuCache command, which drive the size of the caches
+                   and the cost of drawing them in the viewport.
+                 - Compares profiles on a sample of the alembics of a directory: file size, export time
+                   and load time of each profile.
+
+    Usage:
+                 python gpuCacheProfiles.py --list
+                 mayapy gpuCacheProfiles.py <directoryPath> [--profiles review-fast,layout,archival] [--sample N]
+                                            [--recursive] [--output FILE] [--keep]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import alembicScan
+import gpuCacheReport
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+DEFAULT_PROFILE = "standard"
+
+# Preview shading of the caches: one phong, the alembic materials, or a palette of phongs
+SHADING_MODES = ("phong", "keep", "palette")
+
+# gpuCache flags of each profile
+PROFILES = {
+    # The flags used before the profiles: materials, no hierarchy optimization
+    "standard": {
+        "writeMaterials": True,
+    },
+    # Smallest and fastest to draw: merged hierarchy, no materials or UVs
+    "review-fast": {
+        "optimize": True,
+        "optimizationThreshold": 40000,
+        "writeMaterials": False,
+        "writeUVs": False,
+        "dataFormat": "ogawa",
+    },
+    # Merged hierarchy with the preview shaders, for set dressing and layout
+    "layout": {
+        "optimize": True,
+        "optimizationThreshold": 10000,
+        "writeMaterials": True,
+        "writeUVs": False,
+        "dataFormat": "ogawa",
+    },
+    # Full hierarchy, materials and UVs
+    "archival": {
+        "optimize": False,
+        "writeMaterials": True,
+        "writeUVs": True,
+        "dataFormat": "ogawa",
+    },
+}
+
+#=================================================================#
+# Profiles
+#=================================================================#
+def profileFlags(profile):
+    """ gpuCache flags of a profile.
+        Args:
+            profile (string): Name of the profile.
+        Returns:
+            flags (dict): gpuCache keyword arguments, always writing a single file.
+        Raises:
+            ValueError: On an unknown profile.
+    """
+    if profile not in PROFILES:
+        raise ValueError("Unknown profile %s, expected one of %s"%(profile, ", ".join(sorted(PROFILES))))
+    flags = dict(PROFILES[profile])
+    flags["saveMultipleFiles"] = False
+
+    return flags
+
+def describeProfile(profile):
+    """ Describes the flags of a profile.
+        Args:
+            profile (string): Name of the profile.
+        Returns:
+            text (string): e.g. "optimize=True optimizationThreshold=40000 ...".
+    """
+    return " ".join("%s=%s"%(flag, value) for flag, value in sorted(PROFILES[profile].items()))
+
+#=================================================================#
+# Comparison
+#=================================================================#
+def sampleFiles(abcFiles, count):
+    """ Picks a sample of alembic files spread over the range of file sizes.
+        Args:
+            abcFiles (list): Alembic file paths.
+            count (int): Number of files to pick.
+        Returns:
+            sample (list): Picked files, smallest first.
+    """
+    bySize = sorted(abcFiles, key=os.path.getsize)
+    if len(bySize) <= count:
+        return bySize
+    if count == 1:
+        return [bySize[len(bySize) // 2]]
+
+    return [bySize[int(round(i * (len(bySize) - 1) / float(count - 1)))] for i in range(count)]
+
+def compareProfiles(directoryPath, abcFiles, profiles, workDir, options=None):
+    """ Exports the same alembic files with each profile, in this Maya session, and measures them.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            abcFiles (list): Alembic files to export.
+            profiles (list): Names of the compared profiles.
+            workDir (string): Directory the caches of each profile are written to, in a subdirectory per profile.
+            options (dict): Conversion options from exportGPUCache.conversionOptions(), the profile is replaced.
+        Returns:
+            rows (list): Per profile, the number of exported and failed files, the output bytes,
+                         and the export and load seconds summed over the files.
+    """
+    # Needs Maya, imported here so the profiles can be listed without it
+    import exportGPUCache
+
+    exportGPUCache.initializeMaya()
+    rows = []
+    for profile in profiles:
+        profileOptions = dict(options or exportGPUCache.conversionOptions())
+        profileOptions["profile"] = profile
+        row = {"profile": profile, "files": 0, "failed": 0, "outputBytes": 0, "exportSeconds": 0.0, "loadSeconds": 0.0}
+        for abcFilePath in abcFiles:
+            result = exportGPUCache.convertAlembic(abcFilePath, directoryPath, outputRoot=os.path.join(workDir, profile),
+                                                   options=profileOptions)
+            if result["status"] != "ok":
+                print("FAILED %s with %s: %s"%(abcFilePath, profile, result["error"]))
+                row["failed"] += 1
+                continue
+            row["files"] += 1
+            row["outputBytes"] += result["outputBytes"]
+            row["exportSeconds"] += result["stages"]["export"]["seconds"]
+            row["loadSeconds"] += measureLoad(result["cache"])
+        row["exportSeconds"] = round(row["exportSeconds"], 3)
+        row["loadSeconds"] = round(row["loadSeconds"], 3)
+        rows.append(row)
+
+    return rows
+
+def measureLoad(cachePath):
+    """ Times the loading of a cache by a gpuCache node, in a new scene.
+        Args:
+            cachePath (string): Path of the cache.
+        Returns:
+            seconds (float): Time until the cache is read.
+    """
+    cmds.file(new=True, force=True)
+    transform = cmds.createNode("transform", n="profileLoad")
+    gpuCacheNode = cmds.createNode("gpuCache", n="profileLoadShape", p=transform)
+
+    startTime = time.time()
+    cmds.setAttr("%s.cacheFileName"%gpuCacheNode, cachePath, type="string")
+    cmds.gpuCache(gpuCacheNode, edit=True, refresh=True)
+    cmds.gpuCache(waitForBackgroundReading=True)
+    seconds = time.time() - startTime
+
+    cmds.file(new=True, force=True)
+
+    return seconds
+
+def printComparison(rows):
+    """ Prints the measures of each profile, relative to the first one.
+        Args:
+            rows (list): Rows from compareProfiles().
+    """
+    print("\n%-12s %6s %12s %10s %10s"%("profile", "files", "output", "export", "load"))
+    base = rows[0] if rows else None
+    for row in rows:
+        print("%-12s %6d %12s %9.2fs %9.2fs   %s"%(
+            row["profile"], row["files"], gpuCacheReport.formatBytes(row["outputBytes"]), row["exportSeconds"],
+            row["loadSeconds"], relativeText(base, row) if row is not base else ""))
+    print("="*30)
+
+def relativeText(base, row):
+    """ Describes a row relative to the base row.
+        Args:
+            base (dict): Row of the first profile.
+            row (dict): Row of the same files with another profile.
+        Returns:
+            text (string): Size, export and load ratios, e.g. "size 0.62x export 1.10x load 0.55x".
+    """
+    ratios = []
+    for label, key in (("size", "outputBytes"), ("export", "exportSeconds"), ("load", "loadSeconds")):
+        ratios.append("%s %s"%(label, "%.2fx"%(row[key] / float(base[key])) if base[key] else "-"))
+
+    return " ".join(ratios)
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the gpu cache output profiles, or compare them on a sample of alembics.")
+    parser.add_argument("directoryPath", nargs="?", default=None, help="Directory path with the list of alembic files.")
+    parser.add_argument("--list", action="store_true", help="Print the flags of each profile.")
+    parser.add_argument("--profiles", default=None,
+                        help="Comma separated profiles to compare, the first one is the reference. All of them by default.")
+    parser.add_argument("--sample", type=int, default=5, help="Number of alembic files compared, spread over the file sizes.")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Also search the subdirectories for alembic files.")
+    parser.add_argument("--output", default=None, help="Json file the comparison is written to.")
+    parser.add_argument("--keep", action="store_true", help="Keep the exported caches, printing where they are.")
+    args = parser.parse_args()
+
+    if args.list or not args.directoryPath:
+        for name in sorted(PROFILES):
+            print("%-12s %s%s"%(name, describeProfile(name), " (default)" if name == DEFAULT_PROFILE else ""))
+    else:
+        # The default profile first, the others are measured against it
+        profiles = args.profiles.split(",") if args.profiles else [DEFAULT_PROFILE] + sorted(set(PROFILES) - set([DEFAULT_PROFILE]))
+        for profile in profiles:
+            profileFlags(profile)
+        sample = sampleFiles(list(alembicScan.iterAlembicFiles(args.directoryPath, maxDepth=None if args.recursive else 0)),
+                             args.sample)
+        if not sample:
+            parser.error("No alembic files in %s"%args.directoryPath)
+
+        workDir = tempfile.mkdtemp(prefix="gpuCacheProfiles")
+        try:
+            rows = compareProfiles(args.directoryPath, sample, profiles, workDir)
+        finally:
+            if args.keep:
+                print("Caches kept in %s"%workDir)
+            else:
+                shutil.rmtree(workDir)
+
+        print("\nSample of %d alembic files"%len(sample))
+        printComparison(rows)
+        if args.output:
+            with open(args.output, "w") as outputFile:
+                json.dump({"directory": args.directoryPath, "sample": sample, "profiles": rows}, outputFile, indent=1, sort_keys=True)
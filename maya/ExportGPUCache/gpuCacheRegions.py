@@ -0,0 +1,440 @@
+""" GPU Cache Regions
+    Description:
+                 - Spatial tiles of the assets split by exportGPUCache.py --tiles, each tile its own gpu cache.
+                 - Writes the bounding box index of the tiles of an asset next to them.
+                 - In Maya, loads only the tiles inside a region or the frustum of a camera: the cache path of each
+                   tile is kept in its tileCacheFileName attribute and only copied to cacheFileName when the tile is active.
+                 - Whole assets assembled with their bounds are handled as a single tile. While unloaded, each tile
+                   shows a bounding box placeholder, so a --deferred scene opens without loading any cache.
+
+    Usage:
+                 import gpuCacheRegions
+                 gpuCacheRegions.activateFrustum()                       # Tiles seen by the camera of the focused panel
+                 gpuCacheRegions.activateFrustum("shotCam", maxDistance=5000)
+                 gpuCacheRegions.activateRegion((-100, 0, -100), (100, 50, 100))
+                 gpuCacheRegions.loadSelected() / gpuCacheRegions.unloadSelected()
+                 gpuCacheRegions.loadAll() / gpuCacheRegions.unloadAll()
+                 gpuCacheRegions.GPUCacheRegionsWindow()                 # Buttons for all of the above
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import json
+import math
+import os
+from functools import partial
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+# Directory of the tile caches, next to the gpuCache directory
+TILE_DIRECTORY = "gpuCacheTiles"
+# Attributes added to the gpuCache shape of each tile
+TILE_ATTRIBUTE = "tileCacheFileName"
+BOUNDS_ATTRIBUTE = "tileBounds"
+# Suffix of the transform of the implicitBox placeholder, child of the transform of the gpuCache
+PLACEHOLDER_SUFFIX = "_bbox"
+
+_selectionJob = None
+
+#=================================================================#
+# Grid
+#=================================================================#
+def tileGrid(bounds, tiles):
+    """ Splits the bounds of an asset in cubic cells, tiles cells along its longest side.
+        Args:
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax of the asset.
+            tiles (int): Number of cells along the longest side.
+        Returns:
+            origin (list): Minimum corner of the grid.
+            cellSize (float): Side of a cell.
+            counts (list): Number of cells along x, y and z.
+    """
+    sizes = [bounds[i + 3] - bounds[i] for i in range(3)]
+    cellSize = max(max(sizes) / float(max(tiles, 1)), 1e-6)
+    counts = [max(1, int(math.ceil(size / cellSize - 1e-9))) for size in sizes]
+
+    return list(bounds[:3]), cellSize, counts
+
+def tileCell(point, origin, cellSize, counts):
+    """ Cell of the grid holding a point, points on the border belong to the last cell.
+        Args:
+            point (tuple): x, y, z of the point.
+            origin (list): Minimum corner of the grid.
+            cellSize (float): Side of a cell.
+            counts (list): Number of cells along x, y and z.
+        Returns:
+            cell (tuple): Integer coordinates of the cell.
+    """
+    return tuple(min(max(int((point[i] - origin[i]) / cellSize), 0), counts[i] - 1) for i in range(3))
+
+#=================================================================#
+# Index
+#=================================================================#
+def writeTileIndex(result):
+    """ Writes the bounding box index of the tiles of a converted asset, next to its tile directory.
+        Args:
+            result (dict): Result of the conversion, with its bounds and tiles.
+        Returns:
+            indexPath (string): Path of the written index.
+    """
+    tileDir = os.path.dirname(result["tiles"][0]["cache"])
+    indexPath = tileDir + ".json"
+    index = {
+        "source": result["source"],
+        "bounds": result["bounds"],
+        "tiles": [],
+    }
+    for tile in result["tiles"]:
+        index["tiles"].append({
+            "cell": tile["cell"],
+            "cache": os.path.relpath(tile["cache"], os.path.dirname(indexPath)).replace(os.sep, "/"),
+            "bounds": tile["bounds"],
+            "polygons": tile["polygons"],
+        })
+
+    tempPath = indexPath + ".tmp"
+    with open(tempPath, "w") as indexFile:
+        json.dump(index, indexFile, indent=1, sort_keys=True)
+    os.rename(tempPath, indexPath)
+
+    return indexPath
+
+def loadTileIndex(indexPath):
+    """ Loads a tile index, with absolute cache paths.
+        Args:
+            indexPath (string): Path of the index.
+        Returns:
+            index (dict): Source, bounds and tiles of the asset.
+    """
+    with open(indexPath) as indexFile:
+        index = json.load(indexFile)
+    for tile in index["tiles"]:
+        tile["cache"] = os.path.join(os.path.dirname(indexPath), tile["cache"])
+
+    return index
+
+#=================================================================#
+# Culling
+#=================================================================#
+def boxesOverlap(boundsA, boundsB):
+    """ Checks if two bounding boxes overlap.
+        Args:
+            boundsA (list): xmin, ymin, zmin, xmax, ymax, zmax.
+            boundsB (list): xmin, ymin, zmin, xmax, ymax, zmax.
+        Returns:
+            overlap (bool): True if they share any point.
+    """
+    return all(boundsA[i] <= boundsB[i + 3] and boundsB[i] <= boundsA[i + 3] for i in range(3))
+
+def boxCenterSize(bounds):
+    """ Center and size of a bounding box.
+        Args:
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax.
+        Returns:
+            center (list): x, y, z of the center.
+            size (list): Size along x, y and z.
+    """
+    center = [(bounds[i] + bounds[i + 3]) * 0.5 for i in range(3)]
+    size = [bounds[i + 3] - bounds[i] for i in range(3)]
+
+    return center, size
+
+def transformBounds(bounds, matrix):
+    """ World bounding box of a box placed by a matrix.
+        Args:
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax in object space.
+            matrix (list): 16 values of a Maya world matrix, rows are the axes then the translation.
+        Returns:
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax in world space.
+    """
+    corners = []
+    for x in (bounds[0], bounds[3]):
+        for y in (bounds[1], bounds[4]):
+            for z in (bounds[2], bounds[5]):
+                corners.append([x * matrix[i] + y * matrix[4 + i] + z * matrix[8 + i] + matrix[12 + i] for i in range(3)])
+
+    return [min(c[i] for c in corners) for i in range(3)] + [max(c[i] for c in corners) for i in range(3)]
+
+def frustumPlanes(matrix, horizontalFov, verticalFov, near, far):
+    """ Planes of a camera frustum in world space.
+        Args:
+            matrix (list): 16 values of the camera world matrix, the camera looking down its -z axis.
+            horizontalFov (float): Horizontal field of view in degrees.
+            verticalFov (float): Vertical field of view in degrees.
+            near (float): Near clip distance.
+            far (float): Far clip distance.
+        Returns:
+            planes (list): (normal, offset) tuples, a point p is inside when dot(normal, p) + offset >= 0 for all.
+    """
+    axes = []
+    for row in range(3):
+        axis = matrix[row * 4:row * 4 + 3]
+        length = math.sqrt(sum(value * value for value in axis)) or 1.0
+        axes.append([value / length for value in axis])
+    position = matrix[12:15]
+
+    tanH = math.tan(math.radians(horizontalFov) / 2.0)
+    tanV = math.tan(math.radians(verticalFov) / 2.0)
+    localPlanes = [
+        ((0.0, 0.0, -1.0), -near),
+        ((0.0, 0.0, 1.0), far),
+        ((1.0, 0.0, -tanH), 0.0),
+        ((-1.0, 0.0, -tanH), 0.0),
+        ((0.0, 1.0, -tanV), 0.0),
+        ((0.0, -1.0, -tanV), 0.0),
+    ]
+
+    planes = []
+    for localNormal, offset in localPlanes:
+        normal = [sum(localNormal[a] * axes[a][i] for a in range(3)) for i in range(3)]
+        length = math.sqrt(sum(value * value for value in normal))
+        normal = [value / length for value in normal]
+        offset = offset / length - sum(normal[i] * position[i] for i in range(3))
+        planes.append((normal, offset))
+
+    return planes
+
+def boxInFrustum(bounds, planes, padding=0.0):
+    """ Checks if a bounding box is at least partly inside a frustum.
+        Conservative: a few boxes just outside a corner of the frustum are reported inside.
+        Args:
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax.
+            planes (list): Planes from frustumPlanes().
+            padding (float): Distance the frustum is grown by.
+        Returns:
+            inside (bool): True unless the box is fully outside a plane.
+    """
+    for normal, offset in planes:
+        # Corner of the box furthest along the normal
+        corner = [bounds[i + 3] if normal[i] >= 0 else bounds[i] for i in range(3)]
+        if sum(normal[i] * corner[i] for i in range(3)) + offset < -padding:
+            return False
+
+    return True
+
+#=================================================================#
+# Maya
+#=================================================================#
+def listTiles():
+    """ Lists the tiles of the scene.
+        Returns:
+            tiles (list): gpuCache shapes with a tileCacheFileName attribute.
+    """
+    return [shape for shape in cmds.ls(type="gpuCache", long=True) or []
+            if cmds.attributeQuery(TILE_ATTRIBUTE, node=shape, exists=True)]
+
+def tileWorldBounds(shape):
+    """ World bounding box of a tile, from its recorded bounds and the current placement of the asset.
+        Args:
+            shape (string): gpuCache shape of the tile.
+        Returns:
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax in world space.
+    """
+    bounds = cmds.getAttr("%s.%s"%(shape, BOUNDS_ATTRIBUTE))
+    parent = cmds.listRelatives(shape, parent=True, fullPath=True)[0]
+
+    return transformBounds(bounds, cmds.getAttr("%s.worldMatrix[0]"%parent))
+
+def placeholders(shape):
+    """ Bounding box placeholders of a tile.
+        Args:
+            shape (string): gpuCache shape of the tile.
+        Returns:
+            placeholders (list): Transforms of the implicitBox shapes next to the tile.
+    """
+    parent = cmds.listRelatives(shape, parent=True, fullPath=True)[0]
+
+    return [child for child in cmds.listRelatives(parent, children=True, type="transform", fullPath=True) or []
+            if cmds.listRelatives(child, shapes=True, type="implicitBox")]
+
+def setTilesLoaded(shapes, loaded):
+    """ Loads or unloads tiles, leaving the ones already in that state untouched.
+        The placeholder of a tile is only visible while it is unloaded.
+        Args:
+            shapes (list): gpuCache shapes of the tiles.
+            loaded (bool): True to load.
+    """
+    for shape in shapes:
+        path = cmds.getAttr("%s.%s"%(shape, TILE_ATTRIBUTE)) if loaded else ""
+        if (cmds.getAttr("%s.cacheFileName"%shape) or "") != path:
+            cmds.setAttr("%s.cacheFileName"%shape, path, type="string")
+            for placeholder in placeholders(shape):
+                cmds.setAttr("%s.visibility"%placeholder, not loaded)
+
+def activateTiles(isActive):
+    """ Loads the tiles passing a test and unloads the others.
+        Args:
+            isActive (function): Called with the world bounds of each tile, returns True to load it.
+        Returns:
+            loaded (int): Number of loaded tiles.
+    """
+    active = []
+    inactive = []
+    for shape in listTiles():
+        (active if isActive(tileWorldBounds(shape)) else inactive).append(shape)
+
+    cmds.undoInfo(openChunk=True)
+    try:
+        setTilesLoaded(inactive, False)
+        setTilesLoaded(active, True)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+    print("Loaded %d of %d tiles"%(len(active), len(active) + len(inactive)))
+
+    return len(active)
+
+def selectedTiles():
+    """ Tiles of the selection: the selected tiles, the tiles below the selected groups and the tiles
+        of the selected placeholders.
+        Returns:
+            tiles (list): gpuCache shapes of the tiles.
+    """
+    roots = []
+    for node in cmds.ls(selection=True, long=True) or []:
+        if cmds.listRelatives(node, shapes=True, type="implicitBox"):
+            node = cmds.listRelatives(node, parent=True, fullPath=True)[0]
+        roots.append(node)
+    if not roots:
+        return []
+    tiles = set(listTiles())
+
+    return [shape for shape in cmds.ls(roots, dag=True, type="gpuCache", long=True) or [] if shape in tiles]
+
+def loadSelected():
+    """ Loads the tiles of the selection, keeping the other loaded tiles.
+        Returns:
+            loaded (int): Number of tiles of the selection.
+    """
+    shapes = selectedTiles()
+    setTilesLoaded(shapes, True)
+
+    return len(shapes)
+
+def unloadSelected():
+    """ Unloads the tiles of the selection.
+        Returns:
+            unloaded (int): Number of tiles of the selection.
+    """
+    shapes = selectedTiles()
+    setTilesLoaded(shapes, False)
+
+    return len(shapes)
+
+def trackSelection(enabled=True):
+    """ Loads the tiles of the selection every time it changes.
+        Args:
+            enabled (bool): Start tracking, or stop it.
+    """
+    global _selectionJob
+    if _selectionJob is not None and cmds.scriptJob(exists=_selectionJob):
+        cmds.scriptJob(kill=_selectionJob, force=True)
+    _selectionJob = None
+    if enabled:
+        _selectionJob = cmds.scriptJob(event=["SelectionChanged", loadSelected], protected=True)
+
+def activateRegion(minPoint, maxPoint):
+    """ Loads the tiles overlapping a box and unloads the others.
+        Args:
+            minPoint (tuple): Minimum corner of the region in world space.
+            maxPoint (tuple): Maximum corner of the region in world space.
+        Returns:
+            loaded (int): Number of loaded tiles.
+    """
+    region = list(minPoint) + list(maxPoint)
+
+    return activateTiles(lambda bounds: boxesOverlap(bounds, region))
+
+def activateFrustum(camera=None, maxDistance=None, padding=0.0):
+    """ Loads the tiles seen by a camera and unloads the others.
+        Args:
+            camera (string): Camera transform, defaults to the camera of the focused panel.
+            maxDistance (float): Distance beyond which tiles are unloaded, defaults to the far clip plane.
+            padding (float): Distance the frustum is grown by, so tiles load a bit before they enter the view.
+        Returns:
+            loaded (int): Number of loaded tiles.
+    """
+    camera = camera or activeCamera()
+    planes = frustumPlanes(
+        cmds.getAttr("%s.worldMatrix[0]"%camera),
+        cmds.camera(camera, query=True, horizontalFieldOfView=True),
+        cmds.camera(camera, query=True, verticalFieldOfView=True),
+        cmds.camera(camera, query=True, nearClipPlane=True),
+        maxDistance or cmds.camera(camera, query=True, farClipPlane=True),
+    )
+
+    return activateTiles(lambda bounds: boxInFrustum(bounds, planes, padding))
+
+def activeCamera():
+    """ Camera of the focused model panel.
+        Returns:
+            camera (string): Camera transform, persp when no model panel has the focus.
+    """
+    panel = cmds.getPanel(withFocus=True)
+    if panel and cmds.getPanel(typeOf=panel) == "modelPanel":
+        camera = cmds.modelPanel(panel, query=True, camera=True)
+        if cmds.nodeType(camera) == "camera":
+            camera = cmds.listRelatives(camera, parent=True)[0]
+        return camera
+
+    return "persp"
+
+def loadAll():
+    """ Loads every tile.
+    """
+    return activateTiles(lambda bounds: True)
+
+def unloadAll():
+    """ Unloads every tile.
+    """
+    return activateTiles(lambda bounds: False)
+
+#=================================================================#
+# UI
+#=================================================================#
+class GPUCacheRegionsWindow(object):
+    """ Window loading and unloading the tiles of the scene.
+    """
+    def __init__(self):
+        """ Initializes the UI, deletes window if it already exists.
+        """
+        self.regionsWindow = "gpuCacheRegionsWindow"
+        if cmds.window(self.regionsWindow, exists=True):
+            cmds.deleteUI(self.regionsWindow)
+
+        self.regionsWindow = cmds.window(self.regionsWindow, title="GPU Cache Regions", width=240, sizeable=False)
+        self.createLayout()
+        cmds.showWindow(self.regionsWindow)
+
+    def createLayout(self):
+        """ Create the layout for the UI window.
+        """
+        cmds.columnLayout(adjustableColumn=True, rowSpacing=4, columnAttach=["both", 5])
+        cmds.separator(style="none")
+        cmds.button(label="Load Selected", command=partial(self.run, loadSelected))
+        cmds.button(label="Unload Selected", command=partial(self.run, unloadSelected))
+        cmds.checkBox(label="Load on Selection", value=_selectionJob is not None,
+                      changeCommand=lambda value: trackSelection(value))
+        cmds.separator()
+        self.padding = cmds.floatFieldGrp(label="Padding", cw2=[80, 80], v1=0.0)
+        cmds.button(label="Load In View", command=partial(self.run, self.loadInView))
+        cmds.separator()
+        cmds.button(label="Load All", command=partial(self.run, loadAll))
+        cmds.button(label="Unload All", command=partial(self.run, unloadAll))
+        cmds.separator(style="none")
+
+    def loadInView(self):
+        """ Loads the tiles seen by the camera of the last focused panel.
+        """
+        return activateFrustum(padding=cmds.floatFieldGrp(self.padding, query=True, v1=True))
+
+    def run(self, function, *args):
+        """ Runs a button command.
+            Args:
+                function (function): Function to run.
+                args: Arguments passed by the button, ignored.
+        """
+        function()
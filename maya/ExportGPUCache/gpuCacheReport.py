@@ -0,0 +1,203 @@
+""" GPU Cache Report
+    Description:
+                 - Instrumentation of exportGPUCache.py: wall time and peak memory of each stage, per run and per asset.
+                 - Writes gpuCacheReport.json in the directory after each run, with the stages of the run and the
+                   stages, byte counts, polygon counts and errors of every asset.
+                 - Prints the slowest and largest assets of a run, or of a saved report.
+
+    Usage:
+                 python gpuCacheReport.py <directoryPath>/gpuCacheReport.json [--top N]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+REPORT_FILE = "gpuCacheReport.json"
+SHARD_REPORT_FILE = "gpuCacheReport.%dof%d.json"
+REPORT_VERSION = 1
+
+#=================================================================#
+# Measures
+#=================================================================#
+def peakRSS():
+    """ Peak resident memory of the current process.
+        Returns:
+            peakRSS (int): Bytes, None where the resource module is missing (Windows).
+    """
+    if resource is None:
+        return None
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Kilobytes on Linux, bytes on macOS
+    return maxRSS if sys.platform == "darwin" else maxRSS * 1024
+
+def currentRSS():
+    """ Resident memory of the current process, now.
+        Returns:
+            rss (int): Bytes. The peak RSS where /proc is missing (macOS), None on Windows.
+    """
+    try:
+        with open("/proc/self/statm") as statmFile:
+            return int(statmFile.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError, AttributeError):
+        return peakRSS()
+
+def fileBytes(filePaths):
+    """ Total size of files, skipping the missing ones.
+        Args:
+            filePaths (list): File paths.
+        Returns:
+            size (int): Bytes.
+    """
+    size = 0
+    for filePath in filePaths:
+        if filePath and os.path.isfile(filePath):
+            size += os.path.getsize(filePath)
+
+    return size
+
+@contextlib.contextmanager
+def stage(stages, name):
+    """ Times a stage, recording it even when it raises.
+        Args:
+            stages (dict): Filled with the seconds and peak RSS of the stage, keyed on its name.
+                           A stage which raised is marked failed.
+            name (string): Name of the stage.
+    """
+    startTime = time.time()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        stages[name] = {"seconds": round(time.time() - startTime, 3), "peakRSS": peakRSS()}
+        if failed:
+            stages[name]["failed"] = True
+
+#=================================================================#
+# Report
+#=================================================================#
+def buildReport(directoryPath, startTime, stages, results, unchanged, options=None, jobs=1):
+    """ Builds the report of a run.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            startTime (float): Start of the run, from time.time().
+            stages (dict): Stages of the run, from stage().
+            results (list): Result dictionaries of the converted alembic files.
+            unchanged (list): Alembic files whose cache was up to date.
+            options (dict): Conversion options of the run.
+            jobs (int): Number of worker processes.
+        Returns:
+            report (dict): Json serializable report.
+    """
+    return {
+        "version": REPORT_VERSION,
+        "directory": directoryPath,
+        "started": startTime,
+        "seconds": round(time.time() - startTime, 3),
+        "jobs": jobs,
+        "options": options,
+        "peakRSS": peakRSS(),
+        "stages": stages,
+        "converted": len([result for result in results if result["status"] == "ok"]),
+        "failed": len([result for result in results if result["status"] != "ok"]),
+        "unchanged": len(unchanged),
+        "assets": [dict((key, result.get(key)) for key in (
+            "source", "status", "seconds", "inputBytes", "outputBytes", "polygons", "stages",
+            "peakRSS", "workerRSS", "failedStage", "error", "traceback")) for result in results],
+    }
+
+def writeReport(directoryPath, report, fileName=REPORT_FILE):
+    """ Writes the report in the directory, replacing the one of the previous run.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            report (dict): Report from buildReport().
+            fileName (string): Name of the report file, each shard of a farm run writes its own.
+        Returns:
+            reportPath (string): Path of the written report.
+    """
+    reportPath = os.path.join(directoryPath, fileName)
+    tempPath = reportPath + ".tmp"
+    with open(tempPath, "w") as reportFile:
+        json.dump(report, reportFile, indent=1, sort_keys=True)
+    os.rename(tempPath, reportPath)
+
+    return reportPath
+
+def printSummary(report, top=5):
+    """ Prints the stages of a run and its slowest and largest assets.
+        Args:
+            report (dict): Report from buildReport().
+            top (int): Number of assets listed in each table.
+    """
+    print("\nRun: %.1fs, %d converted, %d failed, %d up to date, peak memory %s"%(
+        report["seconds"], report["converted"], report["failed"], report["unchanged"], formatBytes(report["peakRSS"])))
+    for name, timing in sorted(report["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        print("  %-16s %8.1fs"%(name, timing["seconds"]))
+
+    assets = report["assets"]
+    if not assets:
+        return
+
+    print("\nSlowest assets")
+    for asset in sorted(assets, key=lambda asset: -(asset.get("seconds") or 0))[:top]:
+        print("  %8.1fs  %-24s %s"%(asset.get("seconds") or 0, slowestStage(asset), os.path.basename(asset["source"])))
+
+    print("\nLargest assets")
+    print("  %10s %10s %12s"%("input", "output", "polygons"))
+    for asset in sorted(assets, key=lambda asset: -(asset.get("inputBytes") or 0))[:top]:
+        print("  %10s %10s %12s  %s"%(formatBytes(asset.get("inputBytes")), formatBytes(asset.get("outputBytes")),
+                                      asset.get("polygons") or "-", os.path.basename(asset["source"])))
+    print("="*30)
+
+def slowestStage(asset):
+    """ Describes the slowest stage of an asset.
+        Args:
+            asset (dict): Asset of a report.
+        Returns:
+            text (string): Name and seconds of the stage, "-" without stages.
+    """
+    stages = asset.get("stages") or {}
+    if not stages:
+        return "-"
+    name = max(stages, key=lambda name: stages[name]["seconds"])
+
+    return "%s %.1fs"%(name, stages[name]["seconds"])
+
+def formatBytes(size):
+    """ Formats a byte count.
+        Args:
+            size (int): Bytes, or None.
+        Returns:
+            text (string): Size in KB, MB or GB.
+    """
+    if size is None:
+        return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return "%.1f %s"%(size, unit) if unit != "B" else "%d B"%size
+        size /= 1024.0
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the summary of a gpu cache run report.")
+    parser.add_argument("reportPath", help="Path of a gpuCacheReport.json.")
+    parser.add_argument("--top", type=int, default=10, help="Number of assets listed in each table.")
+    args = parser.parse_args()
+
+    with open(args.reportPath) as reportFile:
+        printSummary(json.load(reportFile), args.top)
@@ -0,0 +1,443 @@
+""" GPU Cache Scene
+    Description:
+                 - Writes the gpuCacheFile_<user>.ma scene directly as Maya ASCII, without a Maya session or license.
+                 - Creates one gpuCache node per cache, with optional transforms, grouping and relative cache paths.
+                 - Caches with levels of detail get a lodGroup switching on the distance to the camera, the switch
+                   distances all scaled by the quality attribute of the gpuCacheLOD node.
+                 - Tiled caches get one gpuCache per tile, with the attributes gpuCacheRegions.py loads them by.
+                 - Caches exported in frame chunks get one gpuCache per chunk, with stepped visibility keys
+                   showing each chunk during its own frames.
+                 - Caches with recorded bounds get a bounding box placeholder, shown while they are unloaded.
+                   With --deferred they all start unloaded, so the scene opens in seconds whatever the set size.
+                 - Can be run on its own to re-assemble the scene of a directory after a partial rebuild.
+
+    Usage:
+                 python gpuCacheScene.py <directoryPath> [--group NAME] [--relative] [--root-variable NAME] [--transforms FILE] [--deferred]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import argparse
+import getpass
+import json
+import os
+import re
+import sys
+
+import gpuCacheFrames
+import gpuCacheManifest
+import gpuCacheRegions
+
+MAYA_VERSION = "2020"
+
+# Directory of the reduced caches, next to the gpuCache directory
+LOD_DIRECTORY = "gpuCacheLOD"
+# Node whose quality attribute scales the switch distances of every lodGroup
+LOD_QUALITY_NODE = "gpuCacheLOD"
+# Camera the lodGroups measure their distance to
+LOD_CAMERA = "persp"
+
+#=================================================================#
+# Caches
+#=================================================================#
+def sceneFilePath(dirPath):
+    """ Path of the gpu cache scene saved for the artist.
+        Args:
+            dirPath (string): Directory path with the list of alembic files.
+        Returns:
+            mayaFilePath (string): Path of the maya scene.
+    """
+    mayaFileName = "gpuCacheFile_" + getpass.getuser() + ".ma"
+
+    return os.path.join(dirPath, mayaFileName)
+
+def collectCaches(directoryPath):
+    """ Lists the caches of a directory, from its manifest or else from the gpuCache directory.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+        Returns:
+            caches (list): Cache dictionaries with the node name and the cache path,
+                           plus the bounds, levels of detail, tiles and frame chunks recorded in the manifest.
+    """
+    entries = []
+    manifest = gpuCacheManifest.GPUCacheManifest(directoryPath)
+    if manifest.entries:
+        for relativePath, entry in manifest.entries.items():
+            entries.append({
+                "path": os.path.join(directoryPath, entry["cache"]),
+                "bounds": entry.get("bounds"),
+                "lods": [{"ratio": lod["ratio"], "path": os.path.join(directoryPath, lod["cache"])}
+                         for lod in entry.get("lods", [])],
+                "tiles": [{"name": os.path.splitext(os.path.basename(tile["cache"]))[0],
+                           "path": os.path.join(directoryPath, tile["cache"]), "bounds": tile["bounds"]}
+                          for tile in entry.get("tiles", [])],
+                "chunks": [{"name": os.path.splitext(os.path.basename(chunk["cache"]))[0],
+                            "path": os.path.join(directoryPath, chunk["cache"]), "start": chunk["start"], "end": chunk["end"]}
+                           for chunk in entry.get("chunks", [])],
+            })
+            if entries[-1]["chunks"]:
+                # The cache of a sequence is its first chunk, name it after the alembic
+                entries[-1]["name"] = os.path.splitext(os.path.basename(relativePath))[0]
+    else:
+        for root, dirs, files in os.walk(os.path.join(directoryPath, "gpuCache")):
+            for cacheFile in files:
+                if cacheFile.lower().endswith('.abc'):
+                    entries.append({"path": os.path.join(root, cacheFile)})
+
+    caches = []
+    for entry in sorted(entries, key=lambda entry: entry["path"]):
+        if os.path.isfile(entry["path"]):
+            entry.setdefault("name", os.path.splitext(os.path.basename(entry["path"]))[0])
+            entry["lods"] = [lod for lod in entry.get("lods", []) if os.path.isfile(lod["path"])]
+            entry["tiles"] = [tile for tile in entry.get("tiles", []) if os.path.isfile(tile["path"])]
+            entry["chunks"] = [chunk for chunk in entry.get("chunks", []) if os.path.isfile(chunk["path"])]
+            caches.append(entry)
+
+    return caches
+
+def lodLevels(cache):
+    """ Levels of detail of a cache, the full resolution first.
+        Args:
+            cache (dict): Cache dictionary from collectCaches().
+        Returns:
+            levels (list): (percentage, cachePath) tuples.
+    """
+    return [(100, cache["path"])] + [(lod["ratio"], lod["path"]) for lod in cache.get("lods", [])]
+
+def lodThresholds(cache):
+    """ Camera distances where a cache switches to its next level of detail, before the quality scaling.
+        The first switch happens at 4 times the radius of the bounds, each next one 3 times further.
+        Args:
+            cache (dict): Cache dictionary from collectCaches().
+        Returns:
+            thresholds (list): One distance per switch, in scene units.
+    """
+    radius = 25.0
+    bounds = cache.get("bounds")
+    if bounds:
+        radius = max(0.5 * sum((bounds[i + 3] - bounds[i]) ** 2 for i in range(3)) ** 0.5, 1.0)
+
+    return [radius * 4 * 3 ** index for index in range(len(lodLevels(cache)) - 1)]
+
+#=================================================================#
+# Writer
+#=================================================================#
+def writeScene(scenePath, caches, group=None, relative=False, rootVariable=None, deferred=False):
+    """ Writes a Maya ASCII scene with a gpuCache node for each cache.
+        Args:
+            scenePath (string): Path of the .ma file to write.
+            caches (list): Cache dictionaries with "name" and "path", and optionally
+                           "group", "translate", "rotate" and "scale".
+            group (string): Name of a group holding all the caches.
+            relative (bool): Write the cache paths relative to the scene directory.
+            rootVariable (string): Environment variable prefixed to the relative paths, e.g. SET_ROOT.
+            deferred (bool): Leave the caches with bounds unloaded, showing their bounding box placeholder.
+        Returns:
+            scenePath (string): Path of the written scene.
+    """
+    sceneDir = os.path.dirname(os.path.abspath(scenePath))
+    formatPath = lambda path: cachePath(path, sceneDir, relative, rootVariable)
+    writer = MayaAsciiWriter()
+
+    qualityNode = None
+    if any(cache.get("lods") for cache in caches):
+        writer.sharedCamera(LOD_CAMERA)
+        qualityNode = writer.createNode("transform", LOD_QUALITY_NODE)
+        writer.addAttr("quality", attributeType="double", defaultValue=1.0, minValue=0.0, keyable=True)
+
+    topGroup = writer.createNode("transform", group) if group else None
+    subGroups = {}
+    for cache in caches:
+        parent = topGroup
+        if cache.get("group"):
+            if cache["group"] not in subGroups:
+                subGroups[cache["group"]] = writer.createNode("transform", cache["group"], parent=topGroup)
+            parent = subGroups[cache["group"]]
+
+        transform = writer.createNode("lodGroup" if cache.get("lods") else "transform", cache["name"], parent=parent)
+        for attribute, key in ((".t", "translate"), (".r", "rotate"), (".s", "scale")):
+            if cache.get(key) is not None:
+                writer.setAttr(attribute, "double3", *cache[key])
+
+        if not cache.get("lods"):
+            writeFullResolution(writer, cache, transform, formatPath, deferred)
+            continue
+
+        for ratio, path in lodLevels(cache):
+            level = writer.createNode("transform", "%s_lod%s"%(cache["name"], ratio), parent=transform)
+            if ratio == 100:
+                writeFullResolution(writer, cache, level, formatPath, deferred)
+            else:
+                writeGPUCache(writer, level, formatPath(path), cache.get("bounds"), deferred)
+        for index, distance in enumerate(lodThresholds(cache)):
+            scaled = writer.createNode("multDoubleLinear", "%s_threshold%d"%(cache["name"], index))
+            writer.setAttr(".i1", None, distance)
+            writer.connectAttr("%s.quality"%qualityNode, "%s.i2"%scaled)
+            writer.connectAttr("%s.o"%scaled, "%s.th[%d]"%(transform, index))
+        writer.connectAttr("%s.wm[0]"%LOD_CAMERA, "%s.cam"%transform)
+
+    tempPath = scenePath + ".tmp"
+    with open(tempPath, "w") as sceneFile:
+        sceneFile.write(writer.text(os.path.basename(scenePath)))
+    os.rename(tempPath, scenePath)
+
+    print("\nMaya Scene saved to below path")
+    print(scenePath)
+    print("="*30)
+
+    return scenePath
+
+def writeFullResolution(writer, cache, transform, formatPath, deferred):
+    """ Writes the full resolution of a cache, one gpuCache per tile for the tiled caches
+        and one per chunk, keyed visible during its frames, for the caches exported in chunks.
+        Args:
+            writer (MayaAsciiWriter): Scene being written.
+            cache (dict): Cache dictionary.
+            transform (string): Transform the caches are parented to.
+            formatPath (function): Formats a cache path for the scene.
+            deferred (bool): Leave the caches with bounds unloaded.
+    """
+    if cache.get("chunks"):
+        for index, chunk in enumerate(cache["chunks"]):
+            chunkTransform = writer.createNode("transform", chunk["name"], parent=transform)
+            writeGPUCache(writer, chunkTransform, formatPath(chunk["path"]), cache.get("bounds"), deferred)
+            writer.steppedCurve(chunkTransform + "_visibility", gpuCacheFrames.visibilityKeys(cache["chunks"], index),
+                                "%s.v"%chunkTransform)
+        return
+
+    if not cache.get("tiles"):
+        writeGPUCache(writer, transform, formatPath(cache["path"]), cache.get("bounds"), deferred)
+        return
+
+    for tile in cache["tiles"]:
+        tileTransform = writer.createNode("transform", tile["name"], parent=transform)
+        writeGPUCache(writer, tileTransform, formatPath(tile["path"]), tile["bounds"], deferred)
+
+def writeGPUCache(writer, transform, path, bounds=None, deferred=False):
+    """ Writes a gpuCache shape. With bounds, also records its path and bounds for gpuCacheRegions
+        and adds the bounding box placeholder shown while it is unloaded.
+        Args:
+            writer (MayaAsciiWriter): Scene being written.
+            transform (string): Transform of the gpuCache.
+            path (string): Formatted cache path.
+            bounds (list): xmin, ymin, zmin, xmax, ymax, zmax of the cache, or None.
+            deferred (bool): Leave the cache unloaded.
+    """
+    writer.createNode("gpuCache", transform + "Shape", parent=transform)
+    if not bounds:
+        writer.setAttr(".cfn", "string", path)
+        return
+
+    writer.addAttr(gpuCacheRegions.TILE_ATTRIBUTE, dataType="string")
+    writer.addAttr(gpuCacheRegions.BOUNDS_ATTRIBUTE, dataType="doubleArray")
+    writer.setAttr(".cfn", "string", "" if deferred else path)
+    writer.setAttr("." + gpuCacheRegions.TILE_ATTRIBUTE, "string", path)
+    writer.setAttr("." + gpuCacheRegions.BOUNDS_ATTRIBUTE, "doubleArray", *bounds)
+
+    center, size = gpuCacheRegions.boxCenterSize(bounds)
+    placeholder = writer.createNode("transform", transform + gpuCacheRegions.PLACEHOLDER_SUFFIX, parent=transform)
+    writer.setAttr(".t", "double3", *center)
+    if not deferred:
+        writer.setAttr(".v", "bool", False)
+    writer.createNode("implicitBox", placeholder + "Shape", parent=placeholder)
+    writer.setAttr(".sz", "double3", *size)
+
+def cachePath(path, sceneDir, relative, rootVariable):
+    """ Formats the cacheFileName of a gpuCache node.
+        Args:
+            path (string): Path of the cache file.
+            sceneDir (string): Directory of the scene.
+            relative (bool): Make the path relative to the scene directory.
+            rootVariable (string): Environment variable prefixed to the relative path.
+        Returns:
+            cachePath (string): Path with forward slashes.
+    """
+    path = os.path.abspath(path)
+    if relative or rootVariable:
+        path = os.path.relpath(path, sceneDir)
+        if rootVariable:
+            path = os.path.join("$" + rootVariable, path)
+
+    return path.replace(os.sep, "/")
+
+class MayaAsciiWriter(object):
+    """ Collects the commands of a Maya ASCII file.
+    """
+    def __init__(self):
+        """ Starts an empty scene.
+        """
+        self.lines = []
+        self.connections = []
+        self.nodeNames = set()
+
+    def createNode(self, nodeType, name, parent=None):
+        """ Adds a createNode command.
+            Args:
+                nodeType (string): Type of the node.
+                name (string): Wanted name, made valid and unique.
+                parent (string): Parent dag node.
+            Returns:
+                name (string): Name given to the node.
+        """
+        name = self.uniqueName(name)
+        command = 'createNode %s -n "%s"'%(nodeType, name)
+        if parent:
+            command += ' -p "%s"'%parent
+        self.lines.append(command + ";")
+
+        return name
+
+    def sharedCamera(self, name):
+        """ Adds a default camera, shared with the one of the scene it is opened in.
+            Args:
+                name (string): Name of the camera transform, e.g. "persp".
+        """
+        self.nodeNames.add(name)
+        self.lines.append('createNode transform -s -n "%s";'%name)
+        self.lines.append('createNode camera -s -n "%sShape" -p "%s";'%(name, name))
+
+    def addAttr(self, name, attributeType=None, dataType=None, defaultValue=None, minValue=None, keyable=False):
+        """ Adds a dynamic attribute to the last created node.
+            Args:
+                name (string): Long and short name of the attribute.
+                attributeType (string): Numeric type of the attribute, e.g. "double".
+                dataType (string): Data type of the attribute instead, e.g. "string" or "doubleArray".
+                defaultValue (float): Default value of a numeric attribute.
+                minValue (float): Minimum value of a numeric attribute.
+                keyable (bool): Show the attribute in the channel box.
+        """
+        command = '\taddAttr -ci true -sn "%s" -ln "%s"'%(name, name)
+        if keyable:
+            command += " -k true"
+        if defaultValue is not None:
+            command += " -dv %r"%float(defaultValue)
+        if minValue is not None:
+            command += " -min %r"%float(minValue)
+        if dataType:
+            command += ' -dt "%s"'%dataType
+        else:
+            command += ' -at "%s"'%attributeType
+        self.lines.append(command + ";")
+
+    def connectAttr(self, source, destination):
+        """ Adds a connection, written after all the nodes.
+            Args:
+                source (string): Source plug, e.g. "persp.wm[0]".
+                destination (string): Destination plug.
+        """
+        self.connections.append('connectAttr "%s" "%s";'%(source, destination))
+
+    def setAttr(self, attribute, attributeType, *values):
+        """ Adds a setAttr command on the last created node.
+            Args:
+                attribute (string): Short attribute name starting with a dot, e.g. ".cfn".
+                attributeType (string): "string", "double3", "doubleArray", "bool" or None for plain values.
+                values: Values of the attribute.
+        """
+        if attributeType == "bool":
+            self.lines.append('\tsetAttr "%s" %s;'%(attribute, "yes" if values[0] else "no"))
+            return
+        if attributeType == "string":
+            valueText = '"%s"'%quote(values[0])
+        elif attributeType == "doubleArray":
+            valueText = "%d %s"%(len(values), " ".join(repr(float(value)) for value in values))
+        else:
+            valueText = " ".join(repr(float(value)) for value in values)
+        if attributeType:
+            self.lines.append('\tsetAttr "%s" -type "%s" %s;'%(attribute, attributeType, valueText))
+        else:
+            self.lines.append('\tsetAttr "%s" %s;'%(attribute, valueText))
+
+    def steppedCurve(self, name, keys, destination):
+        """ Adds an animation curve with stepped keys, connected to an attribute.
+            Args:
+                name (string): Wanted name of the curve.
+                keys (list): (frame, value) tuples, in frame order.
+                destination (string): Keyed plug, e.g. "chunk1.v".
+            Returns:
+                name (string): Name given to the curve.
+        """
+        name = self.createNode("animCurveTU", name)
+        last = len(keys) - 1
+        self.lines.append('\tsetAttr ".tan" %d;'%gpuCacheFrames.STEP_TANGENT)
+        self.lines.append('\tsetAttr ".wgt" no;')
+        self.lines.append('\tsetAttr -s %d ".ktv[0:%d]" %s;'%(
+            len(keys), last, " ".join("%r %r"%(float(frame), float(value)) for frame, value in keys)))
+        self.lines.append('\tsetAttr -s %d ".kot[0:%d]" %s;'%(len(keys), last, " ".join(["%d"%gpuCacheFrames.STEP_TANGENT] * len(keys))))
+        self.connectAttr("%s.o"%name, destination)
+
+        return name
+
+    def uniqueName(self, name):
+        """ Makes a valid Maya node name which is not used yet in the scene.
+            Args:
+                name (string): Wanted name.
+            Returns:
+                name (string): Valid unique name.
+        """
+        name = re.sub(r"[^A-Za-z0-9_]", "_", name)
+        if not name or name[0].isdigit():
+            name = "_" + name
+        uniqueName = name
+        index = 1
+        while uniqueName in self.nodeNames:
+            uniqueName = "%s%d"%(name, index)
+            index += 1
+        self.nodeNames.add(uniqueName)
+
+        return uniqueName
+
+    def text(self, fileName):
+        """ Text of the Maya ASCII file.
+            Args:
+                fileName (string): Name of the file, written in the header.
+            Returns:
+                text (string): Content of the scene file.
+        """
+        header = [
+            "//Maya ASCII %s scene"%MAYA_VERSION,
+            "//Name: %s"%fileName,
+            "//Codeset: UTF-8",
+            'requires maya "%s";'%MAYA_VERSION,
+            'requires -nodeType "gpuCache" "gpuCache" "1.0";',
+            "currentUnit -l centimeter -a degree -t film;",
+            'fileInfo "application" "maya";',
+        ]
+
+        return "\n".join(header + self.lines + self.connections + ["// End of %s"%fileName, ""])
+
+def quote(text):
+    """ Escapes a string for a Maya ASCII file.
+        Args:
+            text (string): Text to escape.
+        Returns:
+            text (string): Escaped text.
+    """
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+#=================================================================#
+# Execution
+#=================================================================#
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the gpu cache scene of a directory without Maya.")
+    parser.add_argument("directoryPath", help="Directory path with the list of alembic files.")
+    parser.add_argument("--group", default=None, help="Group holding all the gpuCache nodes.")
+    parser.add_argument("--relative", action="store_true", help="Write the cache paths relative to the scene.")
+    parser.add_argument("--root-variable", default=None, help="Environment variable prefixed to the relative cache paths.")
+    parser.add_argument("--transforms", default=None, help="Json file of translate/rotate/scale/group per cache name.")
+    parser.add_argument("--deferred", action="store_true", help="Open the scene with the caches unloaded, as bounding boxes.")
+    args = parser.parse_args()
+
+    caches = collectCaches(args.directoryPath)
+    if args.transforms:
+        with open(args.transforms) as transformsFile:
+            transforms = json.load(transformsFile)
+        for cache in caches:
+            cache.update(transforms.get(cache["name"], {}))
+    if not caches:
+        print("No gpu caches found in %s"%args.directoryPath)
+        sys.exit(1)
+
+    writeScene(sceneFilePath(args.directoryPath), caches, group=args.group, relative=args.relative, rootVariable=args.root_variable,
+               deferred=args.deferred)
@@ -0,0 +1,240 @@
+""" GPU Cache Staging
+    Description:
+                 - Stages network hosted alembic files on a local scratch disk before they are converted.
+                 - A background thread copies the next files while the current ones convert.
+                 - The gpu caches are written to scratch too, then moved into the final gpuCache directory in
+                   batches, each file replaced in a single rename.
+                 - Staged inputs and unpublished outputs never use more than the scratch limit.
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import os
+import shutil
+import tempfile
+import threading
+
+class StagingArea(object):
+    """ Scratch directory holding the staged alembic files and the caches waiting to be published.
+    """
+    def __init__(self, scratchDir, outputDir, prefetch=2, limitBytes=20 << 30):
+        """ Creates a private directory on the scratch disk.
+            Args:
+                scratchDir (string): Local scratch directory.
+                outputDir (string): Directory holding the final gpuCache directories, the caches are published there.
+                prefetch (int): Maximum number of staged alembic files, including the ones converting.
+                limitBytes (int): Maximum scratch disk use in bytes.
+        """
+        if not os.path.isdir(scratchDir):
+            os.makedirs(scratchDir)
+        self.rootDir = tempfile.mkdtemp(prefix="exportGPUCache-", dir=scratchDir)
+        self.inputDir = os.path.join(self.rootDir, "in")
+        self.outputRoot = os.path.join(self.rootDir, "out")
+        self.outputDir = outputDir
+        self.prefetch = max(1, prefetch)
+        self.limitBytes = limitBytes
+
+        self.condition = threading.Condition()
+        self.staged = {}
+        self.stagedBytes = 0
+        self.pendingOutputs = []
+        self.pendingBytes = 0
+        self.stopped = False
+
+    #----------------------------------------#
+    # Inputs
+    #----------------------------------------#
+    def stage(self, abcFiles):
+        """ Copies the alembic files to scratch ahead of their conversion.
+            Files which do not fit in the scratch limit, or fail to copy, are not staged.
+            Args:
+                abcFiles (iterable): Alembic file paths, a list or a generator.
+            Yields:
+                abcFilePath (string): Original path of the alembic file.
+                localPath (string): Path to convert from, the scratch copy or the original path.
+        """
+        stagedFiles = []
+        copier = threading.Thread(target=self._copyFiles, args=(abcFiles, stagedFiles))
+        copier.daemon = True
+        copier.start()
+
+        while True:
+            with self.condition:
+                while not stagedFiles:
+                    self.condition.wait(1.0)
+                item = stagedFiles.pop(0)
+            if item is None:
+                break
+            yield item
+
+    def _copyFiles(self, abcFiles, stagedFiles):
+        """ Copier thread of stage().
+            Args:
+                abcFiles (iterable): Alembic file paths.
+                stagedFiles (list): Filled with (abcFilePath, localPath) tuples, then None at the end.
+        """
+        try:
+            for index, abcFilePath in enumerate(abcFiles):
+                if self.stopped:
+                    break
+                localPath = self._copyFile(index, abcFilePath)
+                with self.condition:
+                    stagedFiles.append((abcFilePath, localPath))
+                    self.condition.notify_all()
+        finally:
+            with self.condition:
+                stagedFiles.append(None)
+                self.condition.notify_all()
+
+    def _copyFile(self, index, abcFilePath):
+        """ Waits for room on scratch and copies one file.
+            Args:
+                index (int): Index of the file, keeps files with the same name apart.
+                abcFilePath (string): File path of the alembic file.
+            Returns:
+                localPath (string): Scratch copy, or abcFilePath if it was not staged.
+        """
+        try:
+            size = os.path.getsize(abcFilePath)
+        except OSError:
+            # Left to the conversion to report
+            return abcFilePath
+        if size > self.limitBytes:
+            print("Not staging %s, larger than the scratch limit"%abcFilePath)
+            return abcFilePath
+
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return abcFilePath
+                if len(self.staged) < self.prefetch and self.stagedBytes + self.pendingBytes + size <= self.limitBytes:
+                    localDir = os.path.join(self.inputDir, str(index))
+                    localPath = os.path.join(localDir, os.path.basename(abcFilePath))
+                    self.staged[localPath] = size
+                    self.stagedBytes += size
+                    break
+                # Nothing converting will free room, only publishing the waiting caches can
+                mustPublish = not self.staged and self.pendingOutputs
+                if not mustPublish:
+                    self.condition.wait(1.0)
+            if mustPublish:
+                self.publish()
+
+        try:
+            os.makedirs(localDir)
+            shutil.copyfile(abcFilePath, localPath)
+        except (IOError, OSError) as e:
+            print("Could not stage %s: %s"%(abcFilePath, e))
+            self.release(localPath)
+            return abcFilePath
+
+        return localPath
+
+    def release(self, localPath):
+        """ Deletes a staged file once it is converted. Does nothing for files which were not staged.
+            Args:
+                localPath (string): Path returned by stage().
+        """
+        with self.condition:
+            size = self.staged.pop(localPath, None)
+            if size is None:
+                return
+            self.stagedBytes -= size
+            self.condition.notify_all()
+        shutil.rmtree(os.path.dirname(localPath), ignore_errors=True)
+
+    #----------------------------------------#
+    # Outputs
+    #----------------------------------------#
+    def outputWritten(self, result):
+        """ Queues the caches of a conversion for publishing and points the result at their final paths.
+            Publishes the queued caches when scratch is full.
+            Args:
+                result (dict): Result of the conversion, with the caches written under self.outputRoot.
+        """
+        if result["status"] != "ok":
+            return
+        outputs = [result] + result.get("lods", []) + result.get("tiles", []) + result.get("chunks", [])
+
+        with self.condition:
+            finalPaths = {}
+            for output in outputs:
+                scratchPath = output["cache"]
+                if scratchPath in finalPaths:
+                    # A sequence result points at its first chunk
+                    output["cache"] = finalPaths[scratchPath]
+                    continue
+                finalPaths[scratchPath] = os.path.join(self.outputDir, os.path.relpath(scratchPath, self.outputRoot))
+                output["cache"] = finalPaths[scratchPath]
+                self.pendingOutputs.append((scratchPath, output["cache"]))
+                self.pendingBytes += os.path.getsize(scratchPath)
+            full = self.stagedBytes + self.pendingBytes > self.limitBytes
+        if full:
+            self.publish()
+
+    def publish(self):
+        """ Moves the queued caches into the final gpuCache directory.
+            Each cache is copied next to its final path and renamed over it, so readers never see a partial file.
+        """
+        with self.condition:
+            outputs = self.pendingOutputs
+            self.pendingOutputs = []
+
+        for scratchPath, finalPath in outputs:
+            finalDir = os.path.dirname(finalPath)
+            if not os.path.isdir(finalDir):
+                try:
+                    os.makedirs(finalDir)
+                except OSError:
+                    if not os.path.isdir(finalDir):
+                        raise
+            tempPath = os.path.join(finalDir, ".%s.staging"%os.path.basename(finalPath))
+            shutil.copyfile(scratchPath, tempPath)
+            os.rename(tempPath, finalPath)
+            size = os.path.getsize(scratchPath)
+            os.remove(scratchPath)
+            with self.condition:
+                self.pendingBytes -= size
+                self.condition.notify_all()
+
+        if outputs:
+            print("Published %d gpu caches to %s"%(len(outputs), self.outputDir))
+
+    def close(self):
+        """ Publishes the remaining caches and deletes the scratch directory.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        try:
+            self.publish()
+        finally:
+            shutil.rmtree(self.rootDir, ignore_errors=True)
+
+#=================================================================#
+# Command Line
+#=================================================================#
+def addStagingArguments(parser):
+    """ Adds the --scratch, --prefetch and --scratch-limit arguments read by stagingOptions().
+        Args:
+            parser (argparse.ArgumentParser): Parser of the command line.
+    """
+    parser.add_argument("--scratch", default=None, help="Local scratch directory to stage the alembics and caches on.")
+    parser.add_argument("--prefetch", type=int, default=None, help="Alembics staged on scratch at once, defaults to jobs + 1.")
+    parser.add_argument("--scratch-limit", type=float, default=20, help="Maximum scratch disk use in GB.")
+
+def stagingOptions(args):
+    """ Builds the StagingArea arguments from the command line.
+        Args:
+            args (argparse.Namespace): Parsed arguments, see addStagingArguments().
+        Returns:
+            stagingOptions (dict): scratchDir, prefetch and limitBytes, None without --scratch.
+    """
+    if not args.scratch:
+        return None
+    stagingOptions = {"scratchDir": os.path.abspath(args.scratch), "limitBytes": int(args.scratch_limit * (1 << 30))}
+    if args.prefetch:
+        stagingOptions["prefetch"] = args.prefetch
+
+    return stagingOptions
@@ -0,0 +1,277 @@
+""" GPU Cache Watch
+    Description:
+                 - Watch mode of exportGPUCache.py: converts the alembic files dropped in one or more directories
+                   as they arrive, without rescanning the directories.
+                 - Uses inotify, through the inotify_simple module, where it is available. Otherwise polls the
+                   sizes and modification times of the directories.
+                 - Waits for the size and modification time of a file to settle before converting it, so files
+                   still being copied are not picked up half written.
+                 - Only the new and changed files go through the conversion, then the gpu cache scene of their
+                   directory is written again in place. Deleted alembics drop their caches from the scene.
+
+    Usage:
+                 mayapy exportGPUCache.py <directoryPath> --watch [--watch-dir DIR ...] [--settle SECONDS] [--poll SECONDS]
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import os
+import sys
+import time
+import traceback
+
+import alembicScan
+import gpuCacheManifest
+import gpuCacheScene
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+#=================================================================#
+# Watcher
+#=================================================================#
+class AlembicWatcher(object):
+    """ Tracks the alembic files of directories, reporting the ones which changed once they settled.
+    """
+    def __init__(self, directories, settleSeconds=2.0, scanOptions=None, polling=False):
+        """ Records the files already in the directories, they are not reported.
+            Args:
+                directories (list): Watched directory paths.
+                settleSeconds (float): Time the size and modification time of a file must stay the same.
+                scanOptions (dict): maxDepth, include and exclude arguments of alembicScan.iterAlembicFiles.
+                polling (bool): Poll the directories even where inotify is available.
+        """
+        self.directories = [os.path.abspath(directoryPath) for directoryPath in directories]
+        self.settleSeconds = settleSeconds
+        self.scanOptions = scanOptions or {}
+        # Last reported (size, mtime) of each file, and the files waiting to settle: path -> [size, mtime, since]
+        self.known = {}
+        self.pending = {}
+        self.inotify = None
+        self.watchedDirectories = {}
+
+        if inotify_simple is not None and not polling:
+            try:
+                self.inotify = inotify_simple.INotify()
+            except (OSError, IOError) as e:
+                print("inotify unavailable, polling instead: %s"%e)
+        for directoryPath in self.directories:
+            if self.inotify is not None:
+                self.watchTree(directoryPath, directoryPath)
+            for abcFilePath in alembicScan.iterAlembicFiles(directoryPath, **self.scanOptions):
+                self.known[abcFilePath] = fileState(abcFilePath)
+
+    @property
+    def mode(self):
+        """ Name of the change detection in use, "inotify" or "polling".
+        """
+        return "polling" if self.inotify is None else "inotify"
+
+    def close(self):
+        """ Stops watching.
+        """
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    #----------------------------------------#
+    # Changes
+    #----------------------------------------#
+    def poll(self, timeout):
+        """ Waits for changes, at most timeout seconds, and reports the files which settled.
+            Args:
+                timeout (float): Seconds to wait for a change.
+            Returns:
+                ready (dict): Watched directory -> new or changed alembic files which settled.
+                deleted (dict): Watched directory -> alembic files which were removed.
+        """
+        if self.inotify is None:
+            time.sleep(timeout)
+            candidates = set(self.pending)
+            for directoryPath in self.directories:
+                candidates.update(alembicScan.iterAlembicFiles(directoryPath, **self.scanOptions))
+            candidates.update(path for path in self.known if not os.path.isfile(path))
+        else:
+            candidates = set(self.pending) | self.readEvents(timeout)
+
+        ready = {}
+        deleted = {}
+        now = time.time()
+        for path in candidates:
+            state = fileState(path)
+            if state is None:
+                self.pending.pop(path, None)
+                if self.known.pop(path, None) is not None:
+                    deleted.setdefault(self.rootOf(path), []).append(path)
+                continue
+            if state == self.known.get(path):
+                self.pending.pop(path, None)
+                continue
+
+            waiting = self.pending.get(path)
+            if waiting is None or (waiting[0], waiting[1]) != state:
+                # New or still growing, wait for it to settle
+                self.pending[path] = [state[0], state[1], now]
+            elif now - waiting[2] >= self.settleSeconds:
+                del self.pending[path]
+                self.known[path] = state
+                ready.setdefault(self.rootOf(path), []).append(path)
+
+        return ready, deleted
+
+    def readEvents(self, timeout):
+        """ Reads the inotify events, watching the new subdirectories.
+            Args:
+                timeout (float): Seconds to wait for an event.
+            Returns:
+                paths (set): Alembic files created, written, moved or deleted.
+        """
+        flags = inotify_simple.flags
+        paths = set()
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            if event.mask & flags.Q_OVERFLOW:
+                # Events were lost, compare every file once
+                for directoryPath in self.directories:
+                    paths.update(alembicScan.iterAlembicFiles(directoryPath, **self.scanOptions))
+                paths.update(self.known)
+                continue
+            watched = self.watchedDirectories.get(event.wd)
+            if watched is None or not event.name:
+                continue
+            path = os.path.join(watched[1], event.name)
+            if event.mask & flags.ISDIR:
+                if event.mask & (flags.CREATE | flags.MOVED_TO):
+                    # Files copied in before the watch was added are only found by listing the directory
+                    self.watchTree(watched[0], path)
+                    paths.update(abcFilePath for abcFilePath in alembicScan.iterAlembicFiles(path, maxDepth=None)
+                                 if self.isWatchedFile(watched[0], abcFilePath))
+                elif event.mask & (flags.DELETE | flags.MOVED_FROM):
+                    paths.update(known for known in self.known if known.startswith(path + os.sep))
+            elif self.isWatchedFile(watched[0], path):
+                paths.add(path)
+
+        return paths
+
+    def watchTree(self, directoryPath, subDirectory):
+        """ Adds an inotify watch on a directory and the subdirectories searched by the scan.
+            Args:
+                directoryPath (string): Watched directory the subdirectory belongs to.
+                subDirectory (string): Directory to watch, directoryPath itself or one of its subdirectories.
+        """
+        flags = inotify_simple.flags
+        mask = flags.CREATE | flags.CLOSE_WRITE | flags.MODIFY | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+        maxDepth = self.scanOptions.get("maxDepth", 0)
+        for root, dirs, files in os.walk(subDirectory):
+            depth = 0 if root == directoryPath else len(os.path.relpath(root, directoryPath).split(os.sep))
+            try:
+                self.watchedDirectories[self.inotify.add_watch(root, mask)] = (directoryPath, root)
+            except OSError as e:
+                print("Could not watch %s: %s"%(root, e))
+            dirs[:] = [name for name in dirs if name not in alembicScan.SKIPPED_DIRECTORIES
+                       and (maxDepth is None or depth < maxDepth)]
+
+    def isWatchedFile(self, directoryPath, path):
+        """ Checks if a path is an alembic file of a watched directory.
+            Args:
+                directoryPath (string): Watched directory.
+                path (string): Path of the file.
+            Returns:
+                isWatched (bool): True if the scan of the directory would list the file.
+        """
+        return alembicScan.isAlembicFile(directoryPath, path, self.scanOptions.get("maxDepth", 0),
+                                         self.scanOptions.get("include"), self.scanOptions.get("exclude"))
+
+    def rootOf(self, path):
+        """ Watched directory holding a file.
+            Args:
+                path (string): Path of the file.
+            Returns:
+                directoryPath (string): Deepest watched directory containing it.
+        """
+        return max([directoryPath for directoryPath in self.directories if path.startswith(directoryPath + os.sep)], key=len)
+
+#=================================================================#
+# Service
+#=================================================================#
+def watch(directories, convert, settleSeconds=2.0, pollInterval=1.0, scanOptions=None, polling=False, deferred=False,
+          catchUp=True):
+    """ Converts the alembic files dropped in the directories until interrupted.
+        Args:
+            directories (list): Watched directory paths, each with its own manifest and scene.
+            convert (function): Called with a directory and the list of its new or changed alembic files,
+                                converts them and writes the scene of the directory.
+                                A list of None converts every file of the directory the manifest finds changed.
+            settleSeconds (float): Time the size and modification time of a file must stay the same.
+            pollInterval (float): Seconds between two checks of the pending files, or two polls of the directories.
+            scanOptions (dict): maxDepth, include and exclude arguments of alembicScan.iterAlembicFiles.
+            polling (bool): Poll the directories even where inotify is available.
+            deferred (bool): Write the scene with the caches unloaded, after a deletion.
+            catchUp (bool): First convert the files which changed while nothing was watching.
+    """
+    watcher = AlembicWatcher(directories, settleSeconds, scanOptions, polling)
+    print("Watching %s (%s, %d alembic files)"%(", ".join(watcher.directories), watcher.mode, len(watcher.known)))
+    try:
+        if catchUp:
+            for directoryPath in watcher.directories:
+                if any(path.startswith(directoryPath + os.sep) for path in watcher.known):
+                    try:
+                        convert(directoryPath, None)
+                    except Exception:
+                        traceback.print_exc()
+        while True:
+            ready, deleted = watcher.poll(pollInterval)
+            for directoryPath in watcher.directories:
+                abcFileList = sorted(ready.get(directoryPath, []))
+                removed = deleted.get(directoryPath, [])
+                if not abcFileList and not removed:
+                    continue
+                startTime = time.time()
+                try:
+                    if abcFileList:
+                        print("\n%d new or changed alembic files in %s"%(len(abcFileList), directoryPath))
+                        convert(directoryPath, abcFileList)
+                    else:
+                        print("\n%d alembic files removed from %s"%(len(removed), directoryPath))
+                        refreshScene(directoryPath, deferred)
+                except Exception:
+                    # Keep watching, the files are picked up again when they change
+                    traceback.print_exc()
+                print("Scene of %s refreshed in %.1fs"%(directoryPath, time.time() - startTime))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+
+def refreshScene(directoryPath, deferred=False):
+    """ Drops the caches of the deleted alembics and writes the scene again, without Maya.
+        Args:
+            directoryPath (string): Directory path with the list of alembic files.
+            deferred (bool): Write the scene with the caches unloaded.
+    """
+    manifest = gpuCacheManifest.GPUCacheManifest(directoryPath)
+    for cacheFilePath in manifest.prune([]):
+        print("Pruned %s"%cacheFilePath)
+    manifest.save()
+    gpuCacheScene.writeScene(gpuCacheScene.sceneFilePath(directoryPath), gpuCacheScene.collectCaches(directoryPath),
+                             deferred=deferred)
+
+#=================================================================#
+# Utils
+#=================================================================#
+def fileState(path):
+    """ Size and modification time of a file.
+        Args:
+            path (string): Path of the file.
+        Returns:
+            state (tuple): (size, mtime), None when the file is missing.
+    """
+    try:
+        fileStat = os.stat(path)
+    except OSError:
+        return None
+
+    return (fileStat.st_size, fileStat.st_mtime)
@@ -0,0 +1,297 @@
+""" GPU Cache Workers
+    Description:
+                 - Pool of worker mayapy processes used by exportGPUCache.py --jobs N.
+                 - Each worker keeps one Maya session open and converts the alembic files it is sent over stdin,
+                   one json line per file.
+                 - A crashed worker only fails the file it was converting, a new worker is started for the rest.
+                   Errors of the pool itself, like a worker which can not start, also fail only the file at hand.
+                 - A worker whose memory grew over the ceiling is stopped between two files and replaced.
+                 - Files whose frame range is split in chunks have each chunk sent to the next free worker,
+                   their results are merged once the last chunk of the file is done.
+
+    Author: Rahul Nathan
+"""
+
+# Import Statements
+import json
+import subprocess
+import sys
+import threading
+import traceback
+
+import gpuCacheFrames
+import gpuCacheReport
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Marks the result lines in the worker output, everything else is Maya/script logging
+RESULT_PREFIX = "GPUCACHE_RESULT "
+
+#=================================================================#
+# Pool
+#=================================================================#
+def runWorkerPool(abcFiles, directoryPath, jobs, scriptPath, mayapy=None, staging=None, workerArgs=None, maxRSS=None,
+                  chunks=None, stitch=False, onResult=None):
+    """ Converts the alembic files in a pool of worker mayapy processes.
+        Files are handed out as they come, so a generator can still be scanning while the first ones convert.
+        Args:
+            abcFiles (iterable): Alembic file paths, a list or a generator.
+            directoryPath (string): Directory path with the list of alembic files.
+            jobs (int): Number of worker processes.
+            scriptPath (string): Path of exportGPUCache.py, started in worker mode.
+            mayapy (string): mayapy executable. Defaults to the current interpreter.
+            staging (gpuCacheStaging.StagingArea): Scratch area the files are converted from and to.
+            workerArgs (list): Extra command line arguments of the workers.
+            maxRSS (int): Resident memory in bytes above which a worker is restarted before its next file.
+            chunks (list): Frame chunks from gpuCacheFrames.frameChunks(), each converted separately. None for whole files.
+            stitch (bool): Join the chunk caches of each file with abcstitcher.
+            onResult (function): Called with the result of each file as soon as it is done, from the worker threads.
+        Returns:
+            results (list): Result dictionary for each alembic file, in the order they finished.
+    """
+    command = [mayapy or sys.executable, scriptPath, directoryPath, "--worker"] + list(workerArgs or [])
+    if staging:
+        command += ["--output-root", staging.outputRoot]
+        stagedFiles = staging.stage(abcFiles)
+    else:
+        stagedFiles = ((abcFilePath, abcFilePath) for abcFilePath in abcFiles)
+
+    # Bounded so the scan does not run far ahead of the workers
+    fileQueue = queue.Queue(maxsize=jobs * 2)
+    collector = ResultCollector(staging, len(chunks or [None]), stitch, onResult)
+    threads = []
+    for workerId in range(jobs):
+        thread = threading.Thread(target=_workerThread, args=(workerId, command, fileQueue, collector, maxRSS))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    try:
+        for abcFilePath, localPath in stagedFiles:
+            for chunk in chunks or [None]:
+                if not _queueFile(fileQueue, (abcFilePath, localPath, chunk), threads):
+                    raise RuntimeError("Every worker exited, %s and the files after it were not converted"%abcFilePath)
+    finally:
+        # One stop marker per worker
+        for thread in threads:
+            if not _queueFile(fileQueue, None, threads):
+                break
+
+    for thread in threads:
+        thread.join()
+
+    return collector.results
+
+def _queueFile(fileQueue, item, threads, timeout=1.0):
+    """ Puts an item on the bounded queue, waiting for a free slot only while a worker is still taking items.
+        Args:
+            fileQueue (queue.Queue): Queue of the workers.
+            item (tuple): (abcFilePath, localPath, chunk) to convert, or None to stop a worker.
+            threads (list): Worker threads reading the queue.
+            timeout (float): Seconds between two checks of the workers.
+        Returns:
+            queued (bool): False if every worker thread exited first.
+    """
+    while any(thread.is_alive() for thread in threads):
+        try:
+            fileQueue.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            pass
+
+    return False
+
+class ResultCollector(object):
+    """ Gathers the results of the workers, merging the chunks of each file.
+    """
+    def __init__(self, staging=None, chunkCount=1, stitch=False, onResult=None):
+        """ Starts with no results.
+            Args:
+                staging (gpuCacheStaging.StagingArea): Scratch area of the files, or None.
+                chunkCount (int): Number of chunks each file is converted in.
+                stitch (bool): Join the chunk caches of each file with abcstitcher.
+                onResult (function): Called with the result of each file once it is complete.
+        """
+        self.staging = staging
+        self.chunkCount = chunkCount
+        self.stitch = stitch
+        self.onResult = onResult
+        self.results = []
+        self.pendingChunks = {}
+        self.lock = threading.Lock()
+
+    def add(self, result, localPath):
+        """ Adds the result of a file or chunk. The file is released once all its chunks are in.
+            Args:
+                result (dict): Result of the conversion.
+                localPath (string): Path the worker imported.
+        """
+        if self.chunkCount > 1:
+            with self.lock:
+                chunkResults = self.pendingChunks.setdefault(result["source"], [])
+                chunkResults.append(result)
+                if len(chunkResults) < self.chunkCount:
+                    return
+                del self.pendingChunks[result["source"]]
+            chunkResults.sort(key=lambda chunk: chunk["chunk"][0])
+            result = gpuCacheFrames.mergeChunks(chunkResults, self.stitch)
+
+        if self.staging:
+            self.staging.release(localPath)
+            self.staging.outputWritten(result)
+        if self.onResult:
+            self.onResult(result)
+        with self.lock:
+            self.results.append(result)
+
+    def addFailure(self, result, localPath):
+        """ Adds the failed result of a file whose own result could not be added, e.g. when publishing its caches failed.
+            Args:
+                result (dict): Failed result of the whole file.
+                localPath (string): Path the worker imported.
+        """
+        if self.staging:
+            self.staging.release(localPath)
+        if self.onResult:
+            self.onResult(result)
+        with self.lock:
+            self.results.append(result)
+
+def _workerThread(workerId, command, fileQueue, collector, maxRSS=None):
+    """ Feeds files from the queue to one worker process, restarting it when it dies or uses too much memory.
+        Args:
+            workerId (int): Index of the worker, used in the log.
+            command (list): Command line starting a worker.
+            fileQueue (queue.Queue): (abcFilePath, localPath, chunk) tuples to convert, None stops the worker.
+            collector (ResultCollector): Gathers the results.
+            maxRSS (int): Resident memory in bytes above which the worker is restarted, None for no ceiling.
+    """
+    process = None
+    while True:
+        stagedFile = fileQueue.get()
+        if stagedFile is None:
+            break
+        abcFilePath, localPath, chunk = stagedFile
+
+        try:
+            if process is None:
+                process = _startWorker(command)
+
+            result = _convertInWorker(workerId, process, abcFilePath, localPath, chunk)
+            if result is None:
+                result = _failedResult(abcFilePath, localPath, chunk, "worker %d exited with code %s"%(workerId, process.wait()))
+                print("[worker %d] crashed on %s, restarting"%(workerId, abcFilePath))
+                process = None
+            elif maxRSS and (result.get("workerRSS") or 0) > maxRSS:
+                print("[worker %d] using %s after %s, over the %s ceiling, restarting"%(
+                    workerId, gpuCacheReport.formatBytes(result["workerRSS"]), abcFilePath, gpuCacheReport.formatBytes(maxRSS)))
+                _stopWorker(process)
+                process = None
+        except Exception as e:
+            # The worker could not start, or its answer could not be read: it is not trusted with the next file
+            result = _failedResult(abcFilePath, localPath, chunk, "worker %d failed: %s"%(workerId, e), traceback.format_exc())
+            print("[worker %d] failed on %s: %s"%(workerId, abcFilePath, e))
+            if process is not None:
+                _killWorker(process)
+                process = None
+
+        try:
+            collector.add(result, localPath)
+        except Exception as e:
+            print("[worker %d] could not collect %s: %s"%(workerId, abcFilePath, e))
+            try:
+                collector.addFailure(_failedResult(abcFilePath, localPath, None, "collecting the result failed: %s"%e,
+                                                   traceback.format_exc(), "collect"), localPath)
+            except Exception:
+                # Keep the thread taking files, the others must still get their results
+                traceback.print_exc()
+
+    if process is not None:
+        _stopWorker(process)
+
+def _failedResult(abcFilePath, localPath, chunk, error, tracebackText=None, failedStage="worker"):
+    """ Builds the result of a file the pool could not convert.
+        Args:
+            abcFilePath (string): File path of the alembic file.
+            localPath (string): Path the worker imported.
+            chunk (list): Start and end frame of the chunk, None for the whole file.
+            error (string): Reason of the failure.
+            tracebackText (string): Formatted traceback, None when there is no exception.
+            failedStage (string): Stage of the failure in the report.
+        Returns:
+            result (dict): Failed result.
+    """
+    return {
+        "source": abcFilePath,
+        "cache": None,
+        "status": "failed",
+        "error": error,
+        "traceback": tracebackText,
+        "failedStage": failedStage,
+        "seconds": None,
+        "inputBytes": gpuCacheReport.fileBytes([localPath]),
+        "chunk": chunk,
+    }
+
+def _startWorker(command):
+    """ Starts a worker process.
+        Args:
+            command (list): Command line starting a worker.
+        Returns:
+            process (subprocess.Popen): Worker process with piped stdin/stdout.
+    """
+    return subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        bufsize=1,
+    )
+
+def _stopWorker(process):
+    """ Stops a worker between two files, closing its stdin ends its loop.
+        Args:
+            process (subprocess.Popen): Worker process.
+    """
+    process.stdin.close()
+    process.wait()
+
+def _killWorker(process):
+    """ Kills a worker in an unknown state, without waiting for the file it may still be converting.
+        Args:
+            process (subprocess.Popen): Worker process.
+    """
+    try:
+        process.kill()
+        process.wait()
+    except OSError:
+        pass
+
+def _convertInWorker(workerId, process, abcFilePath, localPath, chunk=None):
+    """ Sends one file to a worker and waits for its result line.
+        Args:
+            workerId (int): Index of the worker, used in the log.
+            process (subprocess.Popen): Worker process.
+            abcFilePath (string): File path of the alembic file.
+            localPath (string): Path the worker imports, a staged copy or abcFilePath.
+            chunk (list): Start and end frame of the chunk to convert, None for the whole range.
+        Returns:
+            result (dict): Result of the conversion, None if the worker died.
+    """
+    try:
+        process.stdin.write(json.dumps({"source": abcFilePath, "local": localPath, "chunk": chunk}) + "\n")
+        process.stdin.flush()
+    except (IOError, OSError):
+        return None
+
+    for line in iter(process.stdout.readline, ''):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+        # Forward the worker logging
+        sys.stdout.write("[worker %d] %s"%(workerId, line))
+
+    return None
@@ -4,14 +4,22 @@
 """
 
 import maya.cmds as cmds
+import os
+import time
+
+import litAfCore
+from litAfCore import (ARNOLD_LIGHT_TYPES, MAYA_LIGHT_TYPES, LightIndex, attributeValue, captureSnapshot, diffSnapshots,
+                       loadSnapshot, parseRanges, readLightValues, sameValue, saveSnapshot, supportsAttribute, writeLightAttributes,
+                       writeWithoutUndo)
 
 window_name = 'lightEditorWindow'
 window_title = 'LIT AF v1.3'
 window_width = 300
-window_height = 605
+window_height = 790
 
 if (cmds.window(window_name, exists=True)):
     cmds.deleteUI(window_name, window=True)
+litAfCore.clearCaches()
 
 lightEditorWindow = cmds.window(title = window_title, widthHeight = (window_width, window_height), sizeable=False)
 cmds.columnLayout(adj=True)
@@ -62,17 +70,23 @@ cmds.rowColumnLayout( numberOfColumns=3, columnAlign=(1, 'right'), columnAttach=
 
 #Color UI#
 cmds.text(label= '  Color  ', align='right')
-lightColor=cmds.colorSliderGrp(rgb=(1, 1, 1),cal=(1,"right"),adj=True)
+lightColor=cmds.colorSliderGrp(rgb=(1, 1, 1),cal=(1,"right"),adj=True,
+                               dragCommand='dragAttribute("color", lightColor, "color")',
+                               changeCommand='endDragAttribute("color", lightColor, "color")')
 cmds.button(label = 'Apply', command = 'lightColorAtrribute(lightColor)')
 
 #Intensity UI#
 cmds.text(label= 'Intensity  ', align='right')
-intensityInputField= cmds.floatField(value=1, precision=3)
+intensityInputField= cmds.floatSliderGrp(field=True, minValue=0, maxValue=10, fieldMaxValue=1000000, value=1, precision=3, columnWidth2=(55, 95), adj=2,
+                                         dragCommand='dragAttribute("intensity", intensityInputField, "slider")',
+                                         changeCommand='endDragAttribute("intensity", intensityInputField, "slider")')
 cmds.button(label = 'Apply', command = 'intensityAttribute(intensityInputField)')
 
 #Exposure UI#
 cmds.text(label= '  Exposure  ', align='right')
-exposureInputField= cmds.floatField(value=0, precision=3)
+exposureInputField= cmds.floatSliderGrp(field=True, minValue=-5, maxValue=10, fieldMinValue=-100, fieldMaxValue=100, value=0, precision=3, columnWidth2=(55, 95), adj=2,
+                                        dragCommand='dragAttribute("aiExposure", exposureInputField, "slider")',
+                                        changeCommand='endDragAttribute("aiExposure", exposureInputField, "slider")')
 cmds.button(label = 'Apply', command = 'exposureAttribute(exposureInputField)')
 
 #Spread UI#
@@ -102,12 +116,16 @@ cmds.separator( height=10, style='none' )
 
 #Shadow Density UI#
 cmds.text(label= '  Shadow Density  ', align='right')
-shadowDensityInputField= cmds.floatField(minValue=0, maxValue=1,value=1, precision=3)
+shadowDensityInputField= cmds.floatSliderGrp(field=True, minValue=0, maxValue=1, value=1, precision=3, columnWidth2=(55, 95), adj=2,
+                                             dragCommand='dragAttribute("aiShadowDensity", shadowDensityInputField, "slider")',
+                                             changeCommand='endDragAttribute("aiShadowDensity", shadowDensityInputField, "slider")')
 cmds.button(label = 'Apply', command = 'shadowDensityAttribute(shadowDensityInputField)')
 
 #Shadow Color UI#
 cmds.text(label= '  Shadow Color  ', align='right')
-shadowColor=cmds.colorSliderGrp(rgb=(0, 0, 0),cal=(1,"left"),adj=True)
+shadowColor=cmds.colorSliderGrp(rgb=(0, 0, 0),cal=(1,"left"),adj=True,
+                                dragCommand='dragAttribute("aiShadowColor", shadowColor, "color")',
+                                changeCommand='endDragAttribute("aiShadowColor", shadowColor, "color")')
 cmds.button(label = 'Apply', command = 'shadowColorAtrribute(shadowColor)')
 
 cmds.setParent('..')
@@ -147,6 +165,48 @@ volumeInputField = cmds.floatField(minValue=0, maxValue=1, value=1, precision=3)
 cmds.button(label = 'Apply', command = 'volumeVisibility(volumeInputField)')
 cmds.setParent('..')
 
+#//////////Find Lights Header//////////#
+cmds.separator( height=10, style='double' )
+cmds.frameLayout(label="Find Lights", w=150)
+cmds.separator( height=10, style='none' )
+cmds.setParent('..')
+
+#Find Lights UI#
+cmds.rowColumnLayout( numberOfColumns=2, columnAlign=(1, 'right'), columnAttach=(2, 'both', 0), columnWidth=[(1, 80),(2, 210)] )
+cmds.text(label= '  Type  ', align='right')
+findTypeMenu = cmds.optionMenu()
+cmds.menuItem(label='All')
+for each in MAYA_LIGHT_TYPES + ARNOLD_LIGHT_TYPES:
+    cmds.menuItem(label=each)
+cmds.text(label= '  Name  ', align='right')
+findNameField = cmds.textField(annotation='Pattern of the light names, e.g. KEY_*')
+cmds.text(label= '  Group  ', align='right')
+findGroupField = cmds.textField(annotation='Pattern of a group above the lights, e.g. *_RIG')
+cmds.text(label= '  Where  ', align='right')
+findRangeField = cmds.textField(annotation='Attribute ranges, e.g. intensity > 10, aiSamples > 2')
+cmds.setParent('..')
+cmds.rowColumnLayout( numberOfColumns=2, columnWidth=[(1, 150),(2, 150)] )
+cmds.button(label = 'Select', command = 'selectFoundLights(False)', annotation='Select the lights matching every filter')
+cmds.button(label = 'Add To Selection', command = 'selectFoundLights(True)')
+cmds.setParent('..')
+findReport = cmds.text(label='', align='center')
+
+#Apply All UI#
+cmds.separator( height=10, style='double' )
+cmds.rowColumnLayout( numberOfColumns=2, columnWidth=[(1, 150),(2, 150)] )
+cmds.button(label = 'Apply All', command = 'applyAllAttributes(False)', annotation='Write every attribute of the panel to the selected lights')
+cmds.button(label = 'Apply Changed', command = 'applyAllAttributes(True)', annotation='Write only the attributes that differ from the panel')
+cmds.setParent('..')
+applyReport = cmds.text(label='', align='center')
+
+#Snapshots UI#
+cmds.separator( height=10, style='double' )
+cmds.rowColumnLayout( numberOfColumns=3, columnWidth=[(1, 100),(2, 100),(3, 100)] )
+cmds.button(label = 'Save Snapshot', command = 'saveSnapshotDialog()', annotation='Save the attributes of every light of the scene')
+cmds.button(label = 'Restore', command = 'restoreSnapshotDialog()', annotation='Write back the values of a snapshot that differ in the scene')
+cmds.button(label = 'Compare', command = 'compareSnapshotsDialog()', annotation='Compare two snapshots, or one snapshot with the scene')
+cmds.setParent('..')
+
 #End UI#
 cmds.separator( height=10, style='none' )
 cmds.button(label="Close", c="cmds.deleteUI(lightEditorWindow)")
@@ -154,124 +214,295 @@ cmds.button(label="Close", c="cmds.deleteUI(lightEditorWindow)")
 
 
 cmds.showWindow(lightEditorWindow)
+cmds.scriptJob(uiDeleted=[lightEditorWindow, 'stopLightIndex()'])
 
 #////////////////////END OF UI////////////////////#
 
 
+#Panel Attributes: light attribute, panel control and kind of value#
+PANEL_ATTRIBUTES = [
+    ('color', lightColor, 'color'),
+    ('intensity', intensityInputField, 'slider'),
+    ('aiExposure', exposureInputField, 'slider'),
+    ('aiSpread', spreadInputField, 'float'),
+    ('aiRoundness', roundnessInputField, 'float'),
+    ('aiSoftEdge', softEdgeInputField, 'float'),
+    ('aiSamples', samplesInputField, 'int'),
+    ('aiCastShadows', castShadowCheckBox, 'bool'),
+    ('aiShadowDensity', shadowDensityInputField, 'slider'),
+    ('aiShadowColor', shadowColor, 'color'),
+    ('aiDiffuse', diffuseInputField, 'float'),
+    ('aiSpecular', specularInputField, 'float'),
+    ('aiSss', sssInputField, 'float'),
+    ('aiIndirect', indirectInputField, 'float'),
+    ('aiVolume', volumeInputField, 'float'),
+]
+
+#Resolve Selection Function#
+def resolveLights():
+    # Selected lights, and the lights under the selected groups and transforms
+    return litAfCore.resolveLights(cmds.ls (sl = 1, long = True))
+
+#Panel Value Function#
+def queryPanelValue(control, kind):
+    if kind == 'color':
+        return tuple(cmds.colorSliderGrp(control, query=True, rgbValue=True))
+    if kind == 'int':
+        return cmds.intField(control, query=True, value=True)
+    if kind == 'bool':
+        return int(cmds.checkBox(control, query=True, value=True))
+    if kind == 'slider':
+        return cmds.floatSliderGrp(control, query=True, value=True)
+    return cmds.floatField(control, query=True, value=True)
+
+#Drag Preview#
+#Slider drags write at most DRAG_RATE times a second with undo off, the values in between are skipped.
+#Releasing the slider puts the values from before the drag back and writes the last one as a single undo step.
+#The values from before the drag are kept until the release, however long the slider is held still.
+DRAG_RATE = 30.0
+dragState = {}
+
+#Drag Start Function#
+def startDrag(attribute):
+    # The selection is resolved once per drag, not on every move of the slider
+    plugs = [light + '.' + attribute for light, nodeType in resolveLights() if supportsAttribute(light, nodeType, attribute)]
+    dragState.clear()
+    dragState.update(attribute=attribute, plugs=plugs, original=[attributeValue(cmds.getAttr(plug)) for plug in plugs],
+                     value=None, written=0.0, scheduled=False)
+
+#Drag Function#
+def dragAttribute(attribute, control, kind):
+    if dragState.get('attribute') != attribute:
+        startDrag(attribute)
+    dragState['value'] = queryPanelValue(control, kind)
+    if time.time() - dragState['written'] >= 1.0 / DRAG_RATE:
+        flushDrag()
+    elif not dragState['scheduled']:
+        # Written once Maya is idle again, with the latest value by then
+        dragState['scheduled'] = True
+        cmds.evalDeferred(flushDrag, lowestPriority=True)
+
+#Drag Write Function#
+def flushDrag():
+    if not dragState:
+        return
+    dragState['scheduled'] = False
+    value = dragState['value']
+    if value is None:
+        return
+    dragState['value'] = None
+    writeWithoutUndo([(plug, value) for plug in dragState['plugs']])
+    dragState['written'] = time.time()
+
+#Drag End Function#
+def endDragAttribute(attribute, control, kind):
+    # Also called when a value is typed in the field, without a drag
+    value = queryPanelValue(control, kind)
+    if dragState.get('attribute') != attribute:
+        startDrag(attribute)
+    writeWithoutUndo(list(zip(dragState['plugs'], dragState['original'])))
+    writeLightAttributes([(plug, value) for plug in dragState['plugs']])
+    dragState.clear()
+
+#Report Function#
+def reportApply(report):
+    cmds.text(applyReport, edit=True, label=report)
+    print('LIT_AF: ' + report)
+
+#Apply Attribute Function#
+def applyAttribute(attribute, value):
+    lights = resolveLights()
+    writes = [(light + '.' + attribute, value) for light, nodeType in lights if supportsAttribute(light, nodeType, attribute)]
+    writeLightAttributes(writes)
+    if len(writes) < len(lights):
+        reportApply('%s set on %d of %d lights, the others do not have it' % (attribute, len(writes), len(lights)))
+
+#Apply All Function#
+def applyAllAttributes(changedOnly):
+    lights = resolveLights()
+    values = [(attribute, queryPanelValue(control, kind)) for attribute, control, kind in PANEL_ATTRIBUTES]
+    # The current values of all the lights read in one pass, instead of a getAttr per attribute and light
+    if changedOnly:
+        currentValues = readLightValues([light for light, nodeType in lights], [attribute for attribute, value in values])
+    else:
+        currentValues = [[None] * len(values)] * len(lights)
+    writes = []
+    changedLights = 0
+    for (light, nodeType), lightValues in zip(lights, currentValues):
+        lightWrites = [(light + '.' + attribute, value) for (attribute, value), current in zip(values, lightValues)
+                       if supportsAttribute(light, nodeType, attribute) and (current is None or not sameValue(current, value))]
+        if lightWrites:
+            changedLights += 1
+            writes.extend(lightWrites)
+    if writes:
+        writeLightAttributes(writes)
+
+    reportApply('%d attributes changed on %d of %d lights' % (len(writes), changedLights, len(lights)))
+
+
 #Color Attribute Function#
 def lightColorAtrribute(lightColor):
-    sel = cmds.ls (sl = 1)
-    queryLightColor= cmds.colorSliderGrp(lightColor, query=True, rgbValue= True)
-    for each in sel:
-         cmds.setAttr ( each + ('.colorR'),queryLightColor[0] )
-         cmds.setAttr ( each + ('.colorG'),queryLightColor[1] )
-         cmds.setAttr ( each + ('.colorB'),queryLightColor[2] )
+    applyAttribute('color', queryPanelValue(lightColor, 'color'))
 
 #Intensity Attribute Function#
 def intensityAttribute(intensityInputField):
-    sel = cmds.ls (sl = 1)
-    queryIntensityInputField= cmds.floatField(intensityInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.intensity'), queryIntensityInputField)
-         
+    applyAttribute('intensity', queryPanelValue(intensityInputField, 'slider'))
+
 #Exposure Attribute Function#
 def exposureAttribute(exposureInputField):
-    sel = cmds.ls (sl = 1)
-    queryExposureInputField= cmds.floatField(exposureInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiExposure'), queryExposureInputField)         
-         
+    applyAttribute('aiExposure', queryPanelValue(exposureInputField, 'slider'))
+
 #Spread Attribute Function#
 def spreadAttribute(spreadInputField):
-    sel = cmds.ls (sl = 1)
-    querySpreadInputField= cmds.floatField(spreadInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiSpread'), querySpreadInputField)  
-            
+    applyAttribute('aiSpread', queryPanelValue(spreadInputField, 'float'))
+
 #Roundness Attribute Function#
 def roundnessAttribute(roundnessInputField):
-    sel = cmds.ls (sl = 1)
-    queryRoundnessInputField= cmds.floatField(roundnessInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiRoundness'), queryRoundnessInputField)  
-         
+    applyAttribute('aiRoundness', queryPanelValue(roundnessInputField, 'float'))
+
 #Soft Edge Attribute Function#
 def softEdgeAttribute(softEdgeInputField):
-    sel = cmds.ls (sl = 1)
-    querySoftEdgeInputField= cmds.floatField(softEdgeInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiSoftEdge'), querySoftEdgeInputField)  
-         
+    applyAttribute('aiSoftEdge', queryPanelValue(softEdgeInputField, 'float'))
+
 #Samples Attribute Function#
 def samplesAttribute(samplesInputField):
-    sel = cmds.ls (sl = 1)
-    querySamplesInputField= cmds.intField(samplesInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiSamples'), querySamplesInputField)  
-         
+    applyAttribute('aiSamples', queryPanelValue(samplesInputField, 'int'))
+
 #Cast Shadows Attribute Function#
 def castShadowOff(castShadowCheckBox):
-    sel = cmds.ls (sl=1)         
-    for each in sel:
-        cmds.setAttr( each + ('.aiCastShadows'), 0)
-        
+    applyAttribute('aiCastShadows', 0)
+
 def castShadowOn(castShadowCheckBox):
-    sel = cmds.ls (sl=1)         
-    for each in sel:
-        cmds.setAttr( each + ('.aiCastShadows'), 1)        
-         
+    applyAttribute('aiCastShadows', 1)
+
 #Shadow Density Attribute Function#
 def shadowDensityAttribute(shadowDensityInputField):
-    sel = cmds.ls (sl = 1)
-    queryShadowDensityInputField= cmds.floatField(shadowDensityInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiShadowDensity'), queryShadowDensityInputField)        
-         
+    applyAttribute('aiShadowDensity', queryPanelValue(shadowDensityInputField, 'slider'))
+
 #Shadow Color Attribute Function#
 def shadowColorAtrribute(shadowColor):
-    sel = cmds.ls (sl = 1)
-    queryShadowColor= cmds.colorSliderGrp(shadowColor, query=True, rgbValue= True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiShadowColorR'),queryShadowColor[0] )
-         cmds.setAttr ( each + ('.aiShadowColorG'),queryShadowColor[1] )
-         cmds.setAttr ( each + ('.aiShadowColorB'),queryShadowColor[2] )
-                               
-                               
+    applyAttribute('aiShadowColor', queryPanelValue(shadowColor, 'color'))
+
 #Diffuse Visibility Function#
 def diffuseVisibility(diffuseInputField):
-    sel = cmds.ls (sl = 1)
-    queryDiffuseInputField= cmds.floatField(diffuseInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiDiffuse'), queryDiffuseInputField)
-         
+    applyAttribute('aiDiffuse', queryPanelValue(diffuseInputField, 'float'))
+
 #Specular Visibility Function#
 def specularVisibility(specularInputField):
-    sel = cmds.ls (sl = 1)
-    querySpecularInputField= cmds.floatField(specularInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiSpecular'), querySpecularInputField)
-                  
+    applyAttribute('aiSpecular', queryPanelValue(specularInputField, 'float'))
+
 #SSS Visibility Function#
 def sssVisibility(sssInputField):
-    sel = cmds.ls (sl = 1)
-    querySSSInputField= cmds.floatField(sssInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiSss'), querySSSInputField)   
+    applyAttribute('aiSss', queryPanelValue(sssInputField, 'float'))
 
 #Indirect Visibility Function#
 def indirectVisibility(indirectInputField):
-    sel = cmds.ls (sl = 1)
-    queryIndirectInputField= cmds.floatField(indirectInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiIndirect'), queryIndirectInputField)                                 
+    applyAttribute('aiIndirect', queryPanelValue(indirectInputField, 'float'))
 
 #Volume Visibility Function#
 def volumeVisibility(volumeInputField):
-    sel = cmds.ls (sl = 1)
-    queryVolumeInputField= cmds.floatField(volumeInputField, query=True,value=True)
-    for each in sel:
-         cmds.setAttr ( each + ('.aiVolume'), queryVolumeInputField)
-         
+    applyAttribute('aiVolume', queryPanelValue(volumeInputField, 'float'))
+
+#Light Index Functions#
+lightIndexes = []
+
+def getLightIndex():
+    if not lightIndexes:
+        lightIndexes.append(LightIndex())
+        lightIndexes[0].start()
+    return lightIndexes[0]
+
+def stopLightIndex():
+    for index in lightIndexes:
+        index.stop()
+    del lightIndexes[:]
+
+#Find Lights Function#
+def selectFoundLights(addToSelection):
+    nodeType = cmds.optionMenu(findTypeMenu, query=True, value=True)
+    try:
+        ranges = parseRanges(cmds.textField(findRangeField, query=True, text=True))
+    except ValueError as e:
+        cmds.warning(str(e))
+        return
+    lights = getLightIndex().find(None if nodeType == 'All' else nodeType,
+                                  cmds.textField(findNameField, query=True, text=True),
+                                  cmds.textField(findGroupField, query=True, text=True), ranges)
+    if lights:
+        cmds.select(lights, add=addToSelection)
+    elif not addToSelection:
+        cmds.select(clear=True)
+    cmds.text(findReport, edit=True, label='%d lights found' % len(lights))
+
+#Snapshots#
+SNAPSHOT_FILTER = 'Light Snapshots (*.json *.json.gz)'
+diffRows = []
+
+#Restore Snapshot Function#
+def restoreSnapshot(filePath):
+    startTime = time.time()
+    differences, missing = litAfCore.restoreSnapshot(loadSnapshot(filePath))
+    report = '%d values restored on %d lights in %.2fs' % (len(differences), len(set(row[0] for row in differences)), time.time() - startTime)
+    if missing:
+        report += ', %d lights not in the scene' % len(missing)
+    reportApply(report)
+
+#Snapshot Dialog Functions#
+def saveSnapshotDialog():
+    filePath = cmds.fileDialog2(fileFilter=SNAPSHOT_FILTER, dialogStyle=2, fileMode=0, caption='Save Light Snapshot')
+    if filePath:
+        snapshot = captureSnapshot()
+        saveSnapshot(filePath[0], snapshot)
+        reportApply('%d lights saved to %s' % (len(snapshot['lights']), os.path.basename(filePath[0])))
+
+def restoreSnapshotDialog():
+    filePath = cmds.fileDialog2(fileFilter=SNAPSHOT_FILTER, dialogStyle=2, fileMode=1, caption='Restore Light Snapshot')
+    if filePath:
+        restoreSnapshot(filePath[0])
+
+def compareSnapshotsDialog():
+    # One file is compared with the scene, two files with each other
+    filePaths = cmds.fileDialog2(fileFilter=SNAPSHOT_FILTER, dialogStyle=2, fileMode=4, caption='Compare Light Snapshots')
+    if not filePaths:
+        return
+    source = loadSnapshot(filePaths[0])
+    if len(filePaths) > 1:
+        target, targetLabel = loadSnapshot(filePaths[1]), os.path.basename(filePaths[1])
+    else:
+        target, targetLabel = captureSnapshot(), 'Scene'
+    showSnapshotDiff(source, target, os.path.basename(filePaths[0]), targetLabel)
+
+#Snapshot Diff Window Function#
+def formatSnapshotValue(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join('%.3f' % channel for channel in value)
+    return '%.4g' % value
+
+def showSnapshotDiff(source, target, sourceLabel, targetLabel):
+    differences, missing = diffSnapshots(source, target)
+    del diffRows[:]
+    lines = []
+    for light, attribute, value, current in sorted(differences):
+        diffRows.append(light)
+        lines.append('%-32s %-16s %-20s %-20s' % (light.split('|')[-2], attribute, formatSnapshotValue(value), formatSnapshotValue(current)))
+    for light in sorted(missing):
+        lines.append('%-32s only in %s' % (light.split('|')[-2], sourceLabel))
+    if cmds.window('lightSnapshotDiff', exists=True):
+        cmds.deleteUI('lightSnapshotDiff', window=True)
+    cmds.window('lightSnapshotDiff', title='LIT AF Snapshot Diff', widthHeight=(640, 400))
+    cmds.columnLayout(adj=True)
+    cmds.text(label='%d values differ, %d lights missing' % (len(differences), len(missing)), align='center')
+    cmds.text(label='%-32s %-16s %-20s %-20s' % ('Light', 'Attribute', sourceLabel[:20], targetLabel[:20]), align='left', font='fixedWidthFont')
+    cmds.textScrollList('lightSnapshotDiffList', append=lines, allowMultiSelection=True, height=330, font='fixedWidthFont')
+    cmds.button(label='Select Lights', command='selectDiffLights()', annotation='Select the lights of the highlighted rows')
+    cmds.showWindow('lightSnapshotDiff')
+
+def selectDiffLights():
+    indexes = cmds.textScrollList('lightSnapshotDiffList', query=True, selectIndexedItem=True) or []
+    lights = sorted(set(diffRows[index - 1].rsplit('|', 1)[0] for index in indexes if index <= len(diffRows)))
+    if lights:
+        cmds.select(lights)
+
 #Light Rename Function#        
 def lightRename(lightName):
     sel = cmds.ls (sl = 1)   
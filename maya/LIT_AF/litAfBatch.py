@@ -0,0 +1,178 @@
+""" LIT AF Batch
+    Author: Rahul Nathan
+    Description: Applies a rule file of light edits to a list of scenes, without opening Maya by hand.
+                 The scenes are shared between a pool of mayapy worker processes. Each worker keeps one Maya
+                 session and opens the scenes it is sent one after the other, a crashed worker only fails its scene.
+                 Writes a report of the changes made to each scene.
+    Usage: mayapy litAfBatch.py rules.json shot010.ma shot020.ma [--scene-list FILE] [--jobs N] [--mayapy PATH]
+                                [--report FILE] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+import maya.cmds as cmds
+import litAfCore
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+#Marks the result lines in the worker output, everything else is Maya logging#
+RESULT_PREFIX = 'LIT_AF_RESULT '
+REPORT_FILE = 'litAfBatchReport.json'
+
+#Initialize Maya Function#
+def initializeMaya():
+    import maya.standalone
+    maya.standalone.initialize()
+    cmds.undoInfo(state=False)
+    # Without mtoa the Arnold lights are unknown nodes, and rules on them match nothing
+    try:
+        cmds.loadPlugin('mtoa', quiet=True)
+    except RuntimeError as e:
+        print('Could not load mtoa, only the Maya lights are edited: %s' % e)
+
+#Scene Function#
+def processScene(scenePath, rules, dryRun):
+    startTime = time.time()
+    try:
+        cmds.file(scenePath, open=True, force=True, prompt=False)
+        changes, matches = litAfCore.applyRules(rules)
+        if changes and not dryRun:
+            cmds.file(save=True, force=True)
+        return {'scene': scenePath, 'status': 'ok', 'matches': matches, 'changes': changes,
+                'saved': bool(changes) and not dryRun, 'seconds': round(time.time() - startTime, 3)}
+    except Exception as e:
+        return {'scene': scenePath, 'status': 'failed', 'error': str(e), 'traceback': traceback.format_exc(),
+                'seconds': round(time.time() - startTime, 3)}
+
+#Worker Function#
+def runWorker(rulesPath, dryRun):
+    # One json line per scene on stdin, one result line per scene on stdout
+    initializeMaya()
+    rules = litAfCore.loadRules(rulesPath)
+    for line in iter(sys.stdin.readline, ''):
+        if not line.strip():
+            continue
+        result = processScene(json.loads(line)['scene'], rules, dryRun)
+        sys.stdout.write(RESULT_PREFIX + json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+#Pool Function#
+def runBatch(scenes, rulesPath, jobs, mayapy=None, dryRun=False):
+    command = [mayapy or sys.executable, os.path.abspath(__file__), rulesPath, '--worker'] + (['--dry-run'] if dryRun else [])
+    sceneQueue = queue.Queue()
+    for scenePath in scenes:
+        sceneQueue.put(scenePath)
+    results = {}
+    threads = []
+    for workerId in range(max(1, min(jobs, len(scenes)))):
+        # One stop marker per worker
+        sceneQueue.put(None)
+        thread = threading.Thread(target=workerThread, args=(workerId, command, sceneQueue, results))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return [results[scenePath] for scenePath in scenes]
+
+#Worker Thread Function#
+def workerThread(workerId, command, sceneQueue, results):
+    process = None
+    while True:
+        scenePath = sceneQueue.get()
+        if scenePath is None:
+            break
+        if process is None:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       universal_newlines=True, bufsize=1)
+        result = sendScene(workerId, process, scenePath)
+        if result is None:
+            result = {'scene': scenePath, 'status': 'failed', 'error': 'worker %d exited with code %s' % (workerId, process.wait())}
+            print('[worker %d] crashed on %s, restarting' % (workerId, scenePath))
+            process = None
+        results[scenePath] = result
+        print('[worker %d] %s' % (workerId, describeResult(result)))
+    if process is not None:
+        process.stdin.close()
+        process.wait()
+
+#Send Scene Function#
+def sendScene(workerId, process, scenePath):
+    try:
+        process.stdin.write(json.dumps({'scene': scenePath}) + '\n')
+        process.stdin.flush()
+    except (IOError, OSError):
+        return None
+    for line in iter(process.stdout.readline, ''):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+        # Forward the worker logging
+        sys.stdout.write('[worker %d] %s' % (workerId, line))
+    return None
+
+#Report Functions#
+def describeResult(result):
+    if result['status'] != 'ok':
+        return 'FAILED %s: %s' % (result['scene'], result['error'])
+    lights = len(set(change['light'] for change in result['changes']))
+    return '%s: %d values changed on %d lights%s' % (result['scene'], len(result['changes']), lights,
+                                                    '' if result['saved'] or not result['changes'] else ', not saved')
+
+def writeReport(reportPath, results, rulesPath, dryRun):
+    report = {'rules': os.path.abspath(rulesPath), 'dryRun': dryRun, 'time': time.time(), 'scenes': results}
+    with open(reportPath, 'w') as reportFile:
+        json.dump(report, reportFile, indent=1, sort_keys=True)
+
+def readSceneList(filePath):
+    # One scene per line, blank lines and lines starting with # are skipped
+    with open(filePath) as sceneFile:
+        return [line.strip() for line in sceneFile if line.strip() and not line.strip().startswith('#')]
+
+#Execution#
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply a LIT_AF rule file to the lights of a list of scenes.')
+    parser.add_argument('rulesPath', help='Json rule file, see the README.')
+    parser.add_argument('scenes', nargs='*', help='Scene files to edit.')
+    parser.add_argument('--scene-list', default=None, help='Text file with one scene path per line, added to the scenes.')
+    parser.add_argument('--jobs', '-j', type=int, default=4, help='Number of mayapy worker processes.')
+    parser.add_argument('--mayapy', default=None, help='mayapy executable of the workers. Defaults to the current interpreter.')
+    parser.add_argument('--report', default=REPORT_FILE, help='Json file the changes of each scene are written to.')
+    parser.add_argument('--dry-run', action='store_true', help='Report the changes without saving the scenes.')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        runWorker(args.rulesPath, args.dry_run)
+        sys.exit(0)
+
+    # Broken rules fail here, before any worker starts
+    try:
+        rules = litAfCore.loadRules(args.rulesPath)
+    except ValueError as e:
+        parser.error(str(e))
+    scenes = [os.path.abspath(scenePath) for scenePath in args.scenes + (readSceneList(args.scene_list) if args.scene_list else [])]
+    scenes = sorted(set(scenes), key=scenes.index)
+    if not scenes:
+        parser.error('No scenes to edit')
+
+    startTime = time.time()
+    print('Applying %d rules to %d scenes with %d workers%s' % (len(rules), len(scenes), min(args.jobs, len(scenes)),
+                                                              ', dry run' if args.dry_run else ''))
+    results = runBatch(scenes, args.rulesPath, args.jobs, args.mayapy, args.dry_run)
+    writeReport(args.report, results, args.rulesPath, args.dry_run)
+
+    failed = [result for result in results if result['status'] != 'ok']
+    changes = sum(len(result['changes']) for result in results if result['status'] == 'ok')
+    print('%d scenes edited, %d values changed, %d failed in %.1fs, report in %s' % (
+        len(results) - len(failed), changes, len(failed), time.time() - startTime, args.report))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,409 @@
+""" LIT AF Core
+    Author: Rahul Nathan
+    Description: Light functions of LIT AF without the window, used by the editor and by mayapy batches.
+                 Resolves lights, writes their attributes in one undo step, indexes the lights of the scene,
+                 saves and restores snapshots and applies rule files.
+"""
+
+import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import collections
+import fnmatch
+import gzip
+import json
+import operator
+import re
+
+#Arnold light shapes, the Maya ones are all of the 'light' type#
+ARNOLD_LIGHT_TYPES = ('aiAreaLight', 'aiMeshLight', 'aiPhotometricLight', 'aiSkyDomeLight', 'aiLightPortal')
+MAYA_LIGHT_TYPES = ('ambientLight', 'directionalLight', 'pointLight', 'spotLight', 'areaLight', 'volumeLight')
+
+#Light Attributes: light attribute and kind of value#
+LIGHT_ATTRIBUTES = [
+    ('color', 'color'),
+    ('intensity', 'float'),
+    ('aiExposure', 'float'),
+    ('aiSpread', 'float'),
+    ('aiRoundness', 'float'),
+    ('aiSoftEdge', 'float'),
+    ('aiSamples', 'int'),
+    ('aiCastShadows', 'bool'),
+    ('aiShadowDensity', 'float'),
+    ('aiShadowColor', 'color'),
+    ('aiDiffuse', 'float'),
+    ('aiSpecular', 'float'),
+    ('aiSss', 'float'),
+    ('aiIndirect', 'float'),
+    ('aiVolume', 'float'),
+]
+COLOR_ATTRIBUTES = set(attribute for attribute, kind in LIGHT_ATTRIBUTES if kind == 'color')
+
+#Caches of the light types of the session and of the attributes each light type has#
+#Cleared when the window is opened and when mtoa is loaded or unloaded, which adds the Arnold types and attributes#
+lightTypesCache = []
+attributeSupportCache = {}
+cacheState = {}
+
+#Clear Caches Function#
+def clearCaches():
+    del lightTypesCache[:]
+    attributeSupportCache.clear()
+    cacheState.clear()
+
+#Light Types Function#
+def lightTypes():
+    mtoaLoaded = bool(cmds.pluginInfo('mtoa', query=True, loaded=True))
+    if cacheState.get('mtoaLoaded') != mtoaLoaded:
+        clearCaches()
+        cacheState['mtoaLoaded'] = mtoaLoaded
+    # The Arnold types only exist once mtoa is loaded, listing an unknown type fails
+    if not lightTypesCache:
+        knownTypes = set(cmds.ls(nodeTypes=True))
+        lightTypesCache.extend(['light'] + [nodeType for nodeType in ARNOLD_LIGHT_TYPES if nodeType in knownTypes])
+    return lightTypesCache
+
+#Resolve Lights Function#
+def resolveLights(nodes):
+    # The given lights, and the lights under the given groups and transforms, in one dag query
+    if not nodes:
+        return []
+    lightsAndTypes = cmds.ls(nodes, dag=True, long=True, showType=True, type=lightTypes()) or []
+    return list(zip(lightsAndTypes[0::2], lightsAndTypes[1::2]))
+
+#Attribute Support Function#
+def supportsAttribute(light, nodeType, attribute):
+    key = (nodeType, attribute)
+    if key not in attributeSupportCache:
+        attributeSupportCache[key] = bool(cmds.attributeQuery(attribute, node=light, exists=True))
+    return attributeSupportCache[key]
+
+#Attribute Value Function#
+def attributeValue(current):
+    # getAttr returns compounds as a list holding one tuple
+    if isinstance(current, list) and current and isinstance(current[0], (list, tuple)):
+        return tuple(current[0])
+    if isinstance(current, list):
+        return tuple(current)
+    return current
+
+#Compare Value Function#
+def sameValue(current, value, tolerance=1e-4):
+    current = attributeValue(current)
+    if isinstance(value, tuple):
+        if not isinstance(current, (list, tuple)) or len(current) != len(value):
+            return False
+        return all(abs(current[i] - value[i]) <= tolerance for i in range(len(value)))
+    if isinstance(current, (list, tuple)):
+        return False
+    return abs(current - value) <= tolerance
+
+#Write Attributes Function#
+def writeLightAttributes(writes):
+    # One undo step for all the writes, with the viewport refresh suspended until they are done
+    cmds.undoInfo(openChunk=True, chunkName='LIT_AF')
+    cmds.refresh(suspend=True)
+    try:
+        for plug, value in writes:
+            setPlug(plug, value)
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+
+#Write Without Undo Function#
+def writeWithoutUndo(writes):
+    undoState = cmds.undoInfo(query=True, state=True)
+    cmds.undoInfo(stateWithoutFlush=False)
+    try:
+        for plug, value in writes:
+            setPlug(plug, value)
+    finally:
+        cmds.undoInfo(stateWithoutFlush=undoState)
+
+#Set Plug Function#
+def setPlug(plug, value):
+    if isinstance(value, tuple):
+        cmds.setAttr(plug, value[0], value[1], value[2], type='double3')
+    else:
+        cmds.setAttr(plug, value)
+
+#Plug Value Function#
+def plugValue(plug):
+    try:
+        return plug.asDouble()
+    except RuntimeError:
+        # Compound attributes like color, and strings or messages, have no single number
+        return None
+
+#Light Index#
+class LightIndex(object):
+    # Lights of the scene with their type and path, kept current by OpenMaya callbacks instead of rescanning.
+    # Paths are read again only after a rename or a reparent, attribute values once per attribute.
+
+    def __init__(self):
+        self.lights = {}
+        self.values = {}
+        self.pending = []
+        self.pathsDirty = False
+        self.callbacks = []
+        self.attributeCallbacks = {}
+        self.build()
+
+    #Build and Callbacks#
+    def build(self):
+        self.lights.clear()
+        self.values.clear()
+        del self.pending[:]
+        self.removeAttributeCallbacks()
+        selectionList = om.MSelectionList()
+        for light in cmds.ls(type=lightTypes(), long=True) or []:
+            selectionList.add(light)
+        for index in range(selectionList.length()):
+            self.add(om.MObjectHandle(selectionList.getDependNode(index)))
+
+    def start(self):
+        for nodeType in lightTypes():
+            self.callbacks.append(om.MDGMessage.addNodeAddedCallback(self.nodeAdded, nodeType))
+            self.callbacks.append(om.MDGMessage.addNodeRemovedCallback(self.nodeRemoved, nodeType))
+        self.callbacks.append(om.MNodeMessage.addNameChangedCallback(om.MObject(), self.pathChanged))
+        self.callbacks.append(om.MDagMessage.addAllDagChangesCallback(self.pathChanged))
+        self.callbacks.append(om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.sceneChanged))
+        self.callbacks.append(om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.sceneChanged))
+
+    def stop(self):
+        om.MMessage.removeCallbacks(self.callbacks)
+        del self.callbacks[:]
+        self.removeAttributeCallbacks()
+
+    def removeAttributeCallbacks(self):
+        om.MMessage.removeCallbacks(list(self.attributeCallbacks.values()))
+        self.attributeCallbacks.clear()
+
+    def add(self, handle):
+        node = handle.object()
+        key = handle.hashCode()
+        self.lights[key] = [handle, om.MFnDependencyNode(node).typeName, om.MFnDagNode(node).fullPathName()]
+        self.attributeCallbacks[key] = om.MNodeMessage.addAttributeChangedCallback(node, self.attributeChanged)
+        for attribute, values in self.values.items():
+            values[key] = self.readValue(node, attribute)
+
+    def nodeAdded(self, node, clientData):
+        # The new node has no parent yet, it is read at the next query
+        self.pending.append(om.MObjectHandle(node))
+
+    def nodeRemoved(self, node, clientData):
+        key = om.MObjectHandle(node).hashCode()
+        self.lights.pop(key, None)
+        for values in self.values.values():
+            values.pop(key, None)
+        if key in self.attributeCallbacks:
+            om.MMessage.removeCallback(self.attributeCallbacks.pop(key))
+
+    def pathChanged(self, *args):
+        self.pathsDirty = True
+
+    def attributeChanged(self, message, plug, otherPlug, clientData):
+        if message & om.MNodeMessage.kAttributeSet:
+            values = self.values.get(plug.partialName(useLongNames=True))
+            if values is not None:
+                values[om.MObjectHandle(plug.node()).hashCode()] = plugValue(plug)
+
+    def sceneChanged(self, clientData):
+        self.build()
+
+    #Queries#
+    def update(self):
+        pending = [handle for handle in self.pending if handle.isValid()]
+        del self.pending[:]
+        for handle in pending:
+            self.add(handle)
+        if self.pathsDirty:
+            for light in self.lights.values():
+                light[2] = om.MFnDagNode(light[0].object()).fullPathName()
+            self.pathsDirty = False
+
+    def readValue(self, node, attribute):
+        function = om.MFnDependencyNode(node)
+        if not function.hasAttribute(attribute):
+            return None
+        return plugValue(function.findPlug(attribute, False))
+
+    def attributeValues(self, attribute):
+        # Read for every light the first time the attribute is filtered on, then kept by the callbacks
+        if attribute not in self.values:
+            self.values[attribute] = dict((key, self.readValue(light[0].object(), attribute)) for key, light in self.lights.items())
+        return self.values[attribute]
+
+    def find(self, nodeType=None, namePattern=None, groupPattern=None, ranges=None, shapes=False):
+        self.update()
+        keys = list(self.lights)
+        if nodeType:
+            keys = [key for key in keys if self.lights[key][1] == nodeType]
+        if namePattern:
+            # The name of a light is the name of its transform
+            keys = [key for key in keys if fnmatch.fnmatchcase(self.lights[key][2].split('|')[-2], namePattern)]
+        if groupPattern:
+            keys = [key for key in keys if fnmatch.filter(self.lights[key][2].split('|')[1:-2], groupPattern)]
+        for attribute, compare, value in ranges or []:
+            values = self.attributeValues(attribute)
+            keys = [key for key in keys if values.get(key) is not None and compare(values[key], value)]
+        if shapes:
+            return [self.lights[key][2] for key in keys]
+        # The transforms, like the artist selects them in the outliner
+        return [self.lights[key][2].rsplit('|', 1)[0] for key in keys]
+
+#Attribute Ranges Function#
+RANGE_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq, '!=': operator.ne}
+
+def parseRanges(text):
+    ranges = []
+    for term in text.split(','):
+        if not term.strip():
+            continue
+        match = re.match(r'^\s*(\w+)\s*(>=|<=|==|!=|>|<)\s*(-?[\d.]+)\s*$', term)
+        if not match:
+            raise ValueError('Could not read %s, write ranges like intensity > 10, aiSamples >= 2' % term.strip())
+        ranges.append((match.group(1), RANGE_OPERATORS[match.group(2)], float(match.group(3))))
+    return ranges
+
+#Snapshots#
+#A snapshot holds the LIT_AF attributes of every light, the values in the order of its attribute list, None where the
+#light does not have the attribute. Lights are keyed by uuid and matched by path when the uuid is not in the scene.
+SNAPSHOT_VERSION = 1
+
+#Capture Snapshot Function#
+def captureSnapshot():
+    attributes = [attribute for attribute, kind in LIGHT_ATTRIBUTES]
+    lightsAndTypes = cmds.ls(type=lightTypes(), long=True, showType=True) or []
+    selectionList = om.MSelectionList()
+    for light in lightsAndTypes[0::2]:
+        selectionList.add(light)
+    lights = {}
+    for index in range(selectionList.length()):
+        node = selectionList.getDependNode(index)
+        lights[om.MFnDependencyNode(node).uuid().asString()] = {'path': om.MFnDagNode(node).fullPathName(), 'type': lightsAndTypes[index * 2 + 1],
+                                                                'values': readNodeValues(node, attributes)}
+    return {'version': SNAPSHOT_VERSION, 'scene': cmds.file(query=True, sceneName=True), 'attributes': attributes, 'lights': lights}
+
+#Read Light Values Function#
+def readLightValues(lights, attributes):
+    # The values of each light in the order of attributes, for comparing many lights without one getAttr per value
+    selectionList = om.MSelectionList()
+    for light in lights:
+        selectionList.add(light)
+    return [readNodeValues(selectionList.getDependNode(index), attributes) for index in range(selectionList.length())]
+
+#Read Node Values Function#
+def readNodeValues(node, attributes):
+    # Read through OpenMaya, one plug per value instead of one getAttr, None where the node does not have the attribute
+    function = om.MFnDependencyNode(node)
+    values = []
+    for attribute in attributes:
+        if not function.hasAttribute(attribute):
+            values.append(None)
+        elif attribute in COLOR_ATTRIBUTES:
+            plug = function.findPlug(attribute, False)
+            values.append([plug.child(i).asDouble() for i in range(3)])
+        else:
+            values.append(function.findPlug(attribute, False).asDouble())
+    return values
+
+#Save Snapshot Function#
+def saveSnapshot(filePath, snapshot):
+    text = json.dumps(snapshot, separators=(',', ':'))
+    if filePath.endswith('.gz'):
+        with gzip.open(filePath, 'wb') as snapshotFile:
+            snapshotFile.write(text.encode('utf-8'))
+    else:
+        with open(filePath, 'w') as snapshotFile:
+            snapshotFile.write(text)
+
+#Load Snapshot Function#
+def loadSnapshot(filePath):
+    if filePath.endswith('.gz'):
+        with gzip.open(filePath, 'rb') as snapshotFile:
+            snapshot = json.loads(snapshotFile.read().decode('utf-8'))
+    else:
+        with open(filePath) as snapshotFile:
+            snapshot = json.load(snapshotFile)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError('%s is not a LIT_AF snapshot of version %d' % (filePath, SNAPSHOT_VERSION))
+    return snapshot
+
+#Diff Snapshots Function#
+def diffSnapshots(source, target):
+    # Values of source that differ in target, as (target light path, attribute, source value, target value)
+    targetPaths = dict((light['path'], uuid) for uuid, light in target['lights'].items())
+    targetIndex = dict((attribute, index) for index, attribute in enumerate(target['attributes']))
+    differences = []
+    missing = []
+    for uuid, light in source['lights'].items():
+        match = uuid if uuid in target['lights'] else targetPaths.get(light['path'])
+        if match is None:
+            missing.append(light['path'])
+            continue
+        targetLight = target['lights'][match]
+        for index, attribute in enumerate(source['attributes']):
+            value = light['values'][index]
+            current = targetLight['values'][targetIndex[attribute]] if attribute in targetIndex else None
+            if value is None or current is None:
+                continue
+            if isinstance(value, list):
+                value = tuple(value)
+            if not sameValue(current, value):
+                differences.append((targetLight['path'], attribute, value, attributeValue(current)))
+    return differences, missing
+
+#Restore Snapshot Function#
+def restoreSnapshot(snapshot):
+    differences, missing = diffSnapshots(snapshot, captureSnapshot())
+    if differences:
+        writeLightAttributes([(light + '.' + attribute, value) for light, attribute, value, current in differences])
+    return differences, missing
+
+#Rules#
+#A rule file is json, {"rules": [{"type": "aiAreaLight", "name": "KEY_*", "group": "*_RIG", "where": "intensity > 10",
+#"set": {"aiSamples": 3}}]}. The selectors are those of Find Lights, all optional, and a light must match all of them.
+#Selectors see the scene as it was opened, a later rule setting the same attribute of a light wins.
+RULE_KEYS = ('type', 'name', 'group', 'where', 'set')
+
+#Load Rules Function#
+def loadRules(filePath):
+    with open(filePath) as rulesFile:
+        rules = json.load(rulesFile).get('rules')
+    if not isinstance(rules, list):
+        raise ValueError('%s has no list of rules' % filePath)
+    for number, rule in enumerate(rules, 1):
+        unknown = sorted(set(rule) - set(RULE_KEYS))
+        if unknown:
+            raise ValueError('Rule %d of %s has unknown keys %s, expected %s' % (number, filePath, ', '.join(unknown), ', '.join(RULE_KEYS)))
+        if not rule.get('set'):
+            raise ValueError('Rule %d of %s sets no attribute' % (number, filePath))
+        parseRanges(rule.get('where', ''))
+    return rules
+
+#Apply Rules Function#
+def applyRules(rules):
+    # Only the values that differ are written, all of them in one undo step
+    index = LightIndex()
+    try:
+        types = dict((light[2], light[1]) for light in index.lights.values())
+        matches = []
+        planned = collections.OrderedDict()
+        for number, rule in enumerate(rules, 1):
+            lights = index.find(rule.get('type'), rule.get('name'), rule.get('group'), parseRanges(rule.get('where', '')), shapes=True)
+            matches.append(len(lights))
+            for light in lights:
+                for attribute, value in sorted(rule['set'].items()):
+                    if supportsAttribute(light, types[light], attribute):
+                        planned[light + '.' + attribute] = (number, tuple(value) if isinstance(value, list) else value)
+    finally:
+        index.stop()
+    changes = []
+    for plug, (number, value) in planned.items():
+        current = attributeValue(cmds.getAttr(plug))
+        if not sameValue(current, value):
+            light, attribute = plug.rsplit('.', 1)
+            changes.append({'light': light, 'attribute': attribute, 'old': current, 'new': value, 'rule': number})
+    if changes:
+        writeLightAttributes([(change['light'] + '.' + change['attribute'], change['new']) for change in changes])
+    return changes, matches